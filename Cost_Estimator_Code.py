@@ -1,15 +1,347 @@
-
+import base64
+import calendar
+import io
+import os
+import uuid
 
 import streamlit as st
-import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from PIL import Image
 
-# Load watermark image once
-watermark_img = Image.open("b.jpg")
+# pandas, the charting stack (plotly.express, charts.py), PIL and the export
+# readers built on pandas (metering, auto_suspend, multi_cluster, attribution)
+# are imported on first use inside the builders and expanders below, so a
+# cold container renders the sidebar and headline metrics before paying for
+# them.
+from cost_engine import (
+    CostInputs,
+    horizon_totals,
+    size_credit_mapping,
+    template_defaults,
+)
+from downsample import lttb_indices
+from execution import ResultCache, make_backend
+from fleet import Fleet, fleet_base_credits, optimization_shares
+from incremental import IncrementalEstimate
+from monte_carlo import DISTRIBUTIONS, UncertaintySpec, sample_noise, simulate
+from optimizer import optimize
+from profiling import TraceFile, span, start_trace
+from projection import GRANULARITIES, HORIZON_YEARS, project_horizon, projection_start
+from rate_card import builtin_rate_card, load_rate_card
+from sections import Section, SectionRunner
+from sensitivity import DEFAULT_SWING_PCT, SENSITIVITY_INPUTS, SENSITIVITY_METRICS, sensitivity
+from usage_log import UsageLogWriter, default_backend
+
+FIGURE_CACHE_ENTRIES = 32  # per figure type, least recently used evicted first
+WATERMARK_PATH = "static/b.jpg"
+WATERMARK_URL = "app/static/b.jpg"  # served by Streamlit when server.enableStaticServing is on
+LOGO_WIDTH = 1460  # Streamlit's maximum content width; wider images get resized on every rerun
+
+
+# === CACHED BUILDERS ===
+
+@st.cache_resource(show_spinner=False)
+def load_watermark():
+    """
+    Watermark source shared by every figure and session.
+
+    With static file serving the figures only carry the URL of the served
+    file; otherwise the JPEG is base64-encoded once into a data URI instead
+    of Plotly re-encoding a PIL image into every figure on every rerun.
+    """
+    if st.get_option("server.enableStaticServing"):
+        return WATERMARK_URL
+    with open(WATERMARK_PATH, "rb") as f:
+        return "data:image/jpeg;base64," + base64.b64encode(f.read()).decode()
+
+
+@st.cache_resource(show_spinner=False)
+def load_logo():
+    """Sidebar logo, pre-scaled once so st.image can send the bytes as they are"""
+    from PIL import Image
+
+    logo = Image.open("boolean.png")
+    if logo.width > LOGO_WIDTH:
+        logo = logo.resize((LOGO_WIDTH, int(logo.height * LOGO_WIDTH / logo.width)), Image.BILINEAR)
+    buffer = io.BytesIO()
+    logo.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def local_file_digest(path, mtime_ns, size):
+    """Content hash of a local export, re-read only when the file changes"""
+    from metering import file_digest
+    return file_digest(path)
+
+
+@st.cache_data(max_entries=8, show_spinner="Aggregating metering history...")
+def cached_metering_profile(digest, _source, name):
+    """Keyed on the content hash only; re-opening the same export is a cache hit"""
+    from metering import read_metering_history
+    return read_metering_history(_source, name=name)
+
+
+@st.cache_resource(max_entries=4, show_spinner="Merging query history...")
+def cached_query_trace(digest, _source, name):
+    """Keyed on the content hash; a resource, so reruns share the arrays instead of unpickling copies"""
+    from auto_suspend import read_query_trace
+    return read_query_trace(_source, name=name)
+
+
+@st.cache_resource(max_entries=2, show_spinner="Reading queries...")
+def cached_query_workload(digest, _source, name):
+    from multi_cluster import read_query_workload
+    return read_query_workload(_source, name=name)
+
+
+@st.cache_data(max_entries=64, show_spinner="Simulating clusters...")
+def cached_cluster_summary(digest, warehouse, policy, _workload):
+    from multi_cluster import simulate_clusters
+
+    arrival, service = _workload.queries(warehouse)
+    return simulate_clusters(arrival, service, policy).summary()
+
+
+@st.cache_resource(max_entries=2, show_spinner="Aggregating query time per warehouse-hour...")
+def cached_query_usage(digest, _source, name):
+    """Partial aggregates of one export; pricing them against another metering export does not re-read it"""
+    from attribution import read_query_usage
+    return read_query_usage(_source, name=name)
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def cached_hourly_credits(digest, _source, name):
+    from attribution import read_hourly_credits
+    return read_hourly_credits(_source, name=name)
+
+
+@st.cache_resource(max_entries=8, show_spinner="Attributing query time to consumers...")
+def cached_cost_attribution(usage_digest, credits_digest, _usage, _credits, _source, name):
+    """Reads the query export a second time, adding each query's credits to its consumers"""
+    from attribution import attribute_costs
+    return attribute_costs(_usage, _credits, _source, name=name)
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def cached_suspend_result(digest, _trace, timeouts):
+    return _trace.simulate(timeouts)
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def cached_fleet_frame(digest, _source, name):
+    import pandas as pd
+
+    if name.lower().endswith(".parquet"):
+        return pd.read_parquet(_source)
+    return pd.read_csv(_source)
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def cached_fleet_base_credits(fleet):
+    return fleet_base_credits(fleet)
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def cached_projection(inputs, months, granularity, fleet, start):
+    """`start` is part of the key, so a long-running server moves to the new calendar year"""
+    base_credits, optimized_base_credits = cached_fleet_base_credits(fleet) if fleet is not None else (None, None)
+    return project_horizon(inputs, months, granularity, base_credits, optimized_base_credits, start=start)
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def cached_sensitivity(inputs, swing_pct, fleet):
+    return sensitivity(inputs, swing_pct, fleet)
+
+
+@st.cache_data(max_entries=64, show_spinner="Searching optimization settings...")
+def cached_optimize(inputs, capacity_floor_pct, months, fleet):
+    return optimize(inputs, capacity_floor_pct, months=months, fleet=fleet)
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def load_monte_carlo_noise(distribution, trajectories, seed):
+    """Standardized samples are independent of the pricing inputs, so keep them across reruns"""
+    return sample_noise(distribution, trajectories, seed)
+
+
+# EXECUTION_BACKEND=threads|processes spreads the trajectories over EXECUTION_WORKERS
+# workers (default: all cores); unset, they are priced on the script thread
+@st.cache_resource(show_spinner=False)
+def execution_backend():
+    """One backend, and so one worker pool, per server process"""
+    workers = os.environ.get("EXECUTION_WORKERS")
+    return make_backend(os.environ.get("EXECUTION_BACKEND", "inline"), int(workers) if workers else None)
+
+
+@st.cache_resource(show_spinner=False)
+def simulation_cache():
+    """Simulations shared by all sessions; not st.cache_data, which would not let a run draw its progress bar"""
+    return ResultCache(max_entries=16)
+
+
+def cached_simulate(inputs, uncertainty, status):
+    """
+    A cache miss shows its progress in the `status` placeholder. A widget
+    change during the run stops the rerun at the next progress update, which
+    stops the backend's remaining chunks; nothing is cached.
+    """
+    def run():
+        noise = load_monte_carlo_noise(uncertainty.distribution, uncertainty.trajectories, uncertainty.seed)
+        label = f"Simulating {uncertainty.trajectories:,} trajectories..."
+        status.progress(0.0, text=label)
+        shown = [0]
+
+        def progress(done, rows):
+            percent = 100 * done // rows
+            if percent != shown[0]:
+                shown[0] = percent
+                status.progress(percent / 100, text=label)
+
+        try:
+            return simulate(inputs, uncertainty, noise=noise, backend=execution_backend(), progress=progress)
+        finally:
+            status.empty()
+
+    return simulation_cache().get_or_compute((inputs, uncertainty), run)
+
+
+# Figures are memoized on exactly the values they plot; the watermark is constant
+@st.cache_resource(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def cached_donut_chart(compute_total, storage_total, transfer_total, total_annual_cost):
+    from charts import donut_chart
+    return donut_chart(compute_total, storage_total, transfer_total, total_annual_cost, load_watermark())
+
+
+@st.cache_resource(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def cached_trend_chart(months, compute_costs, storage_costs, transfer_costs, total_costs, bands):
+    from charts import trend_chart
+    return trend_chart(months, compute_costs, storage_costs, transfer_costs, total_costs, load_watermark(), bands)
+
+
+# Long or fine-grained projections are downsampled on their total before plotting
+@st.cache_resource(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def cached_projection_trend_chart(projection):
+    from charts import projection_trend_chart
+    keep = lttb_indices(projection.total_costs)
+    return projection_trend_chart(
+        projection.period_start[keep],
+        projection.compute_costs[keep],
+        projection.storage_costs[keep],
+        projection.transfer_costs[keep],
+        projection.total_costs[keep],
+        projection.granularity,
+        load_watermark(),
+    )
+
+
+@st.cache_resource(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def cached_projection_savings_chart(projection):
+    from charts import projection_savings_chart
+    keep = lttb_indices(projection.total_costs)
+    return projection_savings_chart(
+        projection.period_start[keep],
+        projection.total_costs[keep],
+        projection.total_optimized_costs[keep],
+        projection.granularity,
+        load_watermark(),
+    )
+
+
+@st.cache_resource(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def cached_tornado_chart(input_sensitivity, metric_label):
+    from charts import tornado_chart
+    order = input_sensitivity.order(SENSITIVITY_METRICS[metric_label])
+    base, low, high = input_sensitivity.swings(SENSITIVITY_METRICS[metric_label])
+    return tornado_chart(
+        [SENSITIVITY_INPUTS[input_sensitivity.inputs[i]] for i in order],
+        base,
+        low[order],
+        high[order],
+        input_sensitivity.low_values[order],
+        input_sensitivity.high_values[order],
+        input_sensitivity.swing_pct,
+        metric_label,
+    )
+
+
+@st.cache_resource(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def cached_comparison_chart(total_annual_cost, total_optimized_annual):
+    from charts import comparison_chart
+    return comparison_chart(total_annual_cost, total_optimized_annual, load_watermark())
+
+
+@st.cache_resource(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def cached_savings_trend_chart(months, total_costs, total_optimized_costs):
+    from charts import savings_trend_chart
+    return savings_trend_chart(months, total_costs, total_optimized_costs, load_watermark())
+
+
+# === USAGE LOGGING ===
+# Records go to APP_COST_ESTIMATORS.USAGE_LOG from a background thread in
+# batches; logging never waits on Snowflake.
+
+@st.cache_resource(show_spinner=False)
+def usage_log():
+    """One writer per server process; None when there is nowhere to log to"""
+    backend = default_backend()
+    return UsageLogWriter(backend) if backend is not None else None
+
+
+def current_user_name():
+    try:
+        return st.user.get("user_name") or st.user.get("email")
+    except Exception:  # no user info outside Snowflake / without auth
+        return None
+
+
+def log_action(action, remarks=None):
+    writer = usage_log()
+    if writer is not None:
+        writer.log(action, remarks, user_name=current_user_name())
+
+
+def log_template_choice():
+    log_action("template_chosen", st.session_state.template)
+
+
+# === PROFILING ===
+# Opt-in: ?profile=1 adds a timing panel to the page, PROFILE_TRACE_PATH appends
+# every rerun of every session to a rotating JSON-lines file. Off, spans are no-ops.
+
+@st.cache_resource(show_spinner=False)
+def trace_file():
+    path = os.environ.get("PROFILE_TRACE_PATH")
+    return TraceFile(path) if path else None
+
+
+def plotly_chart(name, fig):
+    """st.plotly_chart, timed as render:<name> (figure serialization happens here)"""
+    with span(f"render:{name}"):
+        st.plotly_chart(fig, width="stretch")
+
+
+def show_profile_panel(trace, section_runner, estimate_graph):
+    import pandas as pd
+
+    with st.expander("⏱️ Profiling: this rerun", expanded=True):
+        st.caption(
+            f"{trace.total_ms:,.1f} ms traced · sections rebuilt: {', '.join(section_runner.rebuilt) or 'none'} · "
+            f"estimate nodes recomputed: {len(estimate_graph.recomputed)} of {len(estimate_graph.graph)}"
+        )
+        st.dataframe(
+            pd.DataFrame(
+                [("\u2003" * depth + name, start, duration, duration / trace.total_ms * 100)
+                 for name, depth, start, duration in trace.spans],
+                columns=["Span", "Start (ms)", "Duration (ms)", "Share (%)"],
+            ).round(2),
+            width="stretch",
+            hide_index=True,
+        )
+        st.json(
+            {"section builds": section_runner.build_counts, "estimate node computations": estimate_graph.recompute_counts},
+            expanded=False,
+        )
+
 
 # === PROFESSIONAL STYLING ===
 st.set_page_config(
@@ -19,6 +351,9 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+profile_panel = st.query_params.get("profile") == "1"
+trace = start_trace() if profile_panel or trace_file() is not None else None
+
 st.markdown("""
 <style>
     /* Import Google Fonts */
@@ -184,8 +519,8 @@ st.markdown("""
 
 # === SIDEBAR CONFIGURATION ===
 # === SIDEBAR CONFIGURATION ===
-with st.sidebar:
-    st.image("boolean.png", use_container_width=True, width=200)
+with st.sidebar, span("sidebar"):
+    st.image(load_logo(), width="stretch")
     st.markdown("### 🎛️ Configuration Panel")
     
     # Quick Setup Templates
@@ -196,36 +531,231 @@ with st.sidebar:
         "Large Enterprise",
         "Data Lake Workload",
         "Analytics Heavy"
-    ])
-    
-    # Default settings by template
-    template_defaults = {
-        "Small Business": {"vws": 1, "size": "Small", "hours": 8, "days": 20, "storage": 2.0, "transfer": 0.5, "credit": 1.5},
-        "Mid-Market Enterprise": {"vws": 3, "size": "Medium", "hours": 12, "days": 25, "storage": 10.0, "transfer": 2.0, "credit": 2.0},
-        "Large Enterprise": {"vws": 8, "size": "Large", "hours": 16, "days": 30, "storage": 50.0, "transfer": 10.0, "credit": 2.5},
-        "Data Lake Workload": {"vws": 2, "size": "X-Large", "hours": 20, "days": 28, "storage": 100.0, "transfer": 5.0, "credit": 3.0},
-        "Analytics Heavy": {"vws": 5, "size": "Large", "hours": 14, "days": 26, "storage": 25.0, "transfer": 8.0, "credit": 3.5},
-        "Custom Configuration": {"vws": 1, "size": "X-Small", "hours": 12, "days": 22, "storage": 5.0, "transfer": 2.0, "credit": 2.0}
-    }
-
+    ], key="template", on_change=log_template_choice)
+    
     defaults = template_defaults[template]
+    compute_growth_default = 10
+
+    # Calibrate the usage inputs from a real metering-history export
+    with st.expander("📥 Calibrate from Metering History"):
+        metering_upload = st.file_uploader(
+            "WAREHOUSE_METERING_HISTORY export",
+            type=["csv", "gz"],
+            help="CSV export of SNOWFLAKE.ACCOUNT_USAGE.WAREHOUSE_METERING_HISTORY (hourly rows)"
+        )
+        metering_path = st.text_input(
+            "...or local file path",
+            help="For exports larger than the upload limit"
+        ).strip()
+
+        metering = metering_digest = metering_source = metering_name = None
+        try:
+            if metering_upload is not None:
+                from metering import file_digest
+
+                metering_digest = file_digest(metering_upload)
+                metering_source, metering_name = metering_upload, metering_upload.name
+            elif metering_path:
+                if os.path.isfile(metering_path):
+                    stat = os.stat(metering_path)
+                    metering_digest = local_file_digest(metering_path, stat.st_mtime_ns, stat.st_size)
+                    metering_source = metering_name = metering_path
+                else:
+                    st.warning(f"File not found: {metering_path}")
+            if metering_source is not None:
+                metering = cached_metering_profile(metering_digest, metering_source, metering_name)
+        except ValueError as error:
+            st.error(str(error))
+
+        if metering is not None:
+            st.caption(
+                f"{metering.rows:,} hourly rows · {metering.active_warehouses} warehouses · "
+                f"{metering.days[0]} to {metering.days[-1]} · {metering.credits_per_hour:.1f} credits/active hour"
+                + (f" · {metering.dropped_rows:,} rows without a start time or warehouse skipped" if metering.dropped_rows else "")
+            )
+            if st.checkbox("Use calibrated values", value=True):
+                defaults = {**defaults, **metering.calibrated_defaults()}
+                if metering.compute_growth is not None:
+                    compute_growth_default = metering.compute_growth
+
+    # Replay query start/end times under different auto-suspend timeouts
+    pause_hours_default = 1
+    attribution_table = attribution_dimension = attribution_key = None
+    with st.expander("⏸️ Simulate Auto-Suspend and Scaling from Query History"):
+        trace_upload = st.file_uploader(
+            "QUERY_HISTORY export",
+            type=["csv", "gz", "parquet"],
+            help="SNOWFLAKE.ACCOUNT_USAGE.QUERY_HISTORY with WAREHOUSE_NAME, START_TIME and END_TIME"
+        )
+        trace_path = st.text_input(
+            "...or local file path",
+            key="query_history_path",
+            help="For exports larger than the upload limit (tens of millions of queries)"
+        ).strip()
+
+        query_trace = trace_digest = trace_source = trace_name = None
+        try:
+            if trace_upload is not None:
+                from metering import file_digest
+
+                trace_digest = file_digest(trace_upload)
+                trace_source, trace_name = trace_upload, trace_upload.name
+            elif trace_path:
+                if os.path.isfile(trace_path):
+                    stat = os.stat(trace_path)
+                    trace_digest = local_file_digest(trace_path, stat.st_mtime_ns, stat.st_size)
+                    trace_source = trace_name = trace_path
+                else:
+                    st.warning(f"File not found: {trace_path}")
+            if trace_source is not None:
+                query_trace = cached_query_trace(trace_digest, trace_source, trace_name)
+        except ValueError as error:
+            st.error(str(error))
+
+        if query_trace is not None:
+            from auto_suspend import DEFAULT_TIMEOUTS
+
+            current_timeout = st.number_input(
+                "Current auto-suspend (s)", min_value=0, max_value=86_400, value=600, step=60,
+                help="AUTO_SUSPEND the warehouses ran with; sets the hours per day"
+            )
+            target_timeout = st.number_input(
+                "Target auto-suspend (s)", min_value=0, max_value=86_400, value=60, step=60,
+                help="Setting to evaluate; the billed hours it saves become the auto-pause hours"
+            )
+            timeouts = tuple(sorted({*DEFAULT_TIMEOUTS, float(current_timeout), float(target_timeout)}))
+            suspend = cached_suspend_result(trace_digest, query_trace, timeouts)
+            st.caption(
+                f"{query_trace.queries:,} queries · {len(query_trace.warehouses)} warehouses · "
+                f"{len(query_trace):,} busy intervals · {query_trace.busy_seconds().sum() / 3600:,.0f} busy hours"
+            )
+            st.dataframe(
+                suspend.frame().style.format({"Billed hours": "{:,.0f}", "Idle share": "{:.0%}", "Resumes": "{:,}"}),
+                hide_index=True
+            )
+            if st.checkbox("Use simulated hours and auto-pause", value=True):
+                calibrated = suspend.calibrated_defaults(current_timeout, target_timeout)
+                defaults = {**defaults, "hours": calibrated["hours"]}
+                pause_hours_default = calibrated["pause"]
+
+            # Replay one warehouse's queries through multi-cluster scaling
+            if st.checkbox("Simulate multi-cluster scaling", help="Queues each query of one warehouse for a slot; reads the export again"):
+                import pandas as pd
+                from multi_cluster import MAX_CLUSTERS, SCALING_POLICIES, ClusterPolicy
+
+                workload = cached_query_workload(trace_digest, trace_source, trace_name)
+                counts = dict(zip(workload.warehouses, workload.query_counts().tolist()))
+                cluster_warehouse = st.selectbox(
+                    "Warehouse", sorted(counts, key=counts.get, reverse=True),
+                    format_func=lambda name: f"{name} ({counts[name]:,} queries)"
+                )
+                cluster_size = st.selectbox("Cluster size", list(size_credit_mapping), index=list(size_credit_mapping).index(defaults["size"]))
+                scaling_policy = st.radio("Scaling policy", SCALING_POLICIES, horizontal=True, format_func=str.title)
+                min_clusters, max_clusters = st.slider("Clusters (min, max)", 1, MAX_CLUSTERS, (1, 3))
+                max_concurrency = st.number_input("Max concurrency per cluster", min_value=1, max_value=64, value=8)
+                st.caption(f"Rows run the limits up to the maximum, suspending after {target_timeout:,} s idle.")
+                st.dataframe(
+                    pd.DataFrame([
+                        cached_cluster_summary(
+                            trace_digest, cluster_warehouse,
+                            ClusterPolicy(
+                                size=cluster_size, min_clusters=min_clusters, max_clusters=limit,
+                                scaling_policy=scaling_policy, max_concurrency=max_concurrency, auto_suspend=target_timeout,
+                            ),
+                            workload,
+                        )
+                        for limit in range(min_clusters, max_clusters + 1)
+                    ]).style.format({
+                        "Credits": "{:,.1f}", "Queued share": "{:.1%}",
+                        "P50 queue (s)": "{:,.1f}", "P90 queue (s)": "{:,.1f}", "P99 queue (s)": "{:,.1f}",
+                    }),
+                    hide_index=True
+                )
+
+            # Split the metered credits of each warehouse-hour over the queries that ran in it
+            if st.checkbox("Attribute compute cost by user, role and query tag", help="Needs the metering export above; reads the query export again"):
+                if metering is None:
+                    st.info("Load a metering history export under Calibrate from Metering History to attribute its credits.")
+                else:
+                    from attribution import DIMENSION_LABELS, DIMENSIONS
+
+                    attribution = cached_cost_attribution(
+                        trace_digest, metering_digest,
+                        cached_query_usage(trace_digest, trace_source, trace_name),
+                        cached_hourly_credits(metering_digest, metering_source, metering_name),
+                        trace_source, trace_name,
+                    )
+                    attribution_dimension = st.radio("Break down by", list(DIMENSIONS), horizontal=True, format_func=DIMENSION_LABELS.get)
+                    attribution_top = st.slider("Top consumers", 3, 50, 10)
+                    attribution_table = attribution.top(attribution_dimension, attribution_top)
+                    attribution_key = (trace_digest, metering_digest, attribution_dimension, attribution_top)
+                    st.caption(
+                        f"{attribution.attributed_share:.0%} of {attribution.metered_credits:,.0f} metered credits "
+                        f"went to hours with queries · {attribution.covered_share:.0%} of query time is in metered hours"
+                    )
 
     st.markdown("#### 💵 Cost per Credit")
-    
+
+    # Compiled once per process, recompiled when the rate card file changes
+    try:
+        rates = load_rate_card()
+    except (OSError, ValueError) as error:
+        st.error(f"Could not load the rate card: {error}")
+        rates = builtin_rate_card()
+
+    region = st.selectbox(
+        "Region",
+        rates.regions,
+        index=rates.regions.index(rates.default_region),
+        help="Cloud and region of the account; sets the storage and data transfer rates"
+    )
+    use_list_price = st.checkbox(
+        "Use list price",
+        value=False,
+        help=f"Price credits at the {rates.name} rate for this region and edition"
+    )
+    # The edition only sets the credit price, so it is off while a custom price is entered
+    edition = st.selectbox(
+        "Edition",
+        rates.editions,
+        index=rates.editions.index(rates.default_edition),
+        disabled=not use_list_price,
+        help="Snowflake edition; sets the list price per credit when list pricing is on"
+    )
+    list_price = rates.list_price(region, edition)
+
     credit_cost = st.number_input(
         "Cost per Credit ($)",
         min_value=0.1,
         max_value=20.0,
-        value=defaults["credit"],
+        value=list_price if use_list_price else defaults["credit"],
         step=1.0,
+        disabled=use_list_price,
         help="Adjust the cost per Snowflake credit according to your pricing tier"
     )
+    if use_list_price:
+        credit_cost = list_price
+        st.caption(f"List price for {edition} in {region}: ${list_price:.2f}/credit")
     
     st.markdown("---")
     
     # Compute Configuration
     st.markdown("#### 💻 Compute Configuration")
     
+    # Per-warehouse fleet instead of N identical warehouses
+    with st.expander("🏢 Warehouse Fleet"):
+        fleet_upload = st.file_uploader(
+            "Fleet file (one row per warehouse)",
+            type=["csv", "parquet"],
+            help="Columns: vw_size, hours_per_day, active_days_per_month and optionally use_gen2, pause_hours_per_day, reduce_vw_size; missing columns take the values set below"
+        )
+        fleet_from_metering = metering is not None and st.checkbox(
+            "Build fleet from metering history",
+            value=False,
+            help="One warehouse per metered warehouse, sized and scheduled from its own usage"
+        )
+    fleet_mode = fleet_upload is not None or fleet_from_metering
+    
     use_gen2 = st.checkbox(
         "🚀 Enable Gen 2 Warehouse Pricing",
         value=False,
@@ -259,7 +789,7 @@ with st.sidebar:
     
     compute_growth = st.slider(
         "Monthly Compute Growth (%)",
-        0, 50, 10,
+        0, 50, compute_growth_default,
         help="Expected monthly growth in compute usage"
     )
     
@@ -287,6 +817,13 @@ with st.sidebar:
         value=defaults["transfer"], step=0.1,
         help="Monthly outbound data transfer"
     )
+
+    transfer_destination = st.selectbox(
+        "Transfer Destination",
+        rates.destinations,
+        index=rates.destinations.index(rates.default_destination),
+        help="Where outbound data goes; the per-TB rate depends on it and on the region"
+    )
     
     transfer_growth = st.slider(
         "Monthly Transfer Growth (%)",
@@ -316,7 +853,7 @@ with st.sidebar:
     pause_hours_per_day = st.number_input(
         "Auto-Pause Hours Per Day",
         min_value=0, max_value=12,
-        value=1,
+        value=pause_hours_default,
         help="Hours of automatic warehouse suspension"
     )
     
@@ -331,513 +868,638 @@ with st.sidebar:
         0, 25, 5,
         help="Extra discount from usage optimization"
     )
+    
+    auto_optimize = st.checkbox(
+        "🤖 Auto-Optimize Settings",
+        value=False,
+        help="Search warehouse size and auto-pause hours (per group of identical warehouses in a fleet) for the cheapest setup over the projection horizon that keeps the capacity below, using the discount above as a ceiling"
+    )
+    
+    if auto_optimize:
+        capacity_floor_pct = st.slider(
+            "Minimum Capacity Kept (%)",
+            10, 100, 80,
+            help="Share of today's credit-hours the optimized setup must still deliver"
+        )
+    
+    st.markdown("---")
+    
+    # Projection Horizon
+    st.markdown("#### 📅 Projection")
+    
+    horizon_years = st.selectbox(
+        "Horizon",
+        HORIZON_YEARS,
+        format_func=lambda years: f"{years} year{'s' if years > 1 else ''}",
+        help="Length of the cost trend charts"
+    )
+    
+    granularity = st.selectbox(
+        "Granularity",
+        GRANULARITIES,
+        help="Points per month, day or hour; long series are downsampled for display"
+    )
+    
+    st.markdown("---")
+    
+    # Sensitivity Analysis
+    st.markdown("#### 🌪️ Sensitivity Analysis")
+    
+    sensitivity_enabled = st.checkbox(
+        "Show Sensitivity Tornado",
+        value=False,
+        help="Move each input down and up by the same percentage, one at a time, and rank the inputs by their effect"
+    )
+    
+    if sensitivity_enabled:
+        sensitivity_swing = st.slider("Swing (± %)", 5, 50, DEFAULT_SWING_PCT, 5)
+        sensitivity_metric = st.selectbox("Measure", list(SENSITIVITY_METRICS))
+    
+    st.markdown("---")
+    
+    # Uncertainty Analysis
+    st.markdown("#### 🎲 Uncertainty Analysis")
+    
+    monte_carlo_enabled = st.checkbox(
+        "Enable Monte Carlo Mode",
+        value=False,
+        disabled=fleet_mode,
+        help="Sample growth rates and usage around the values above and show P10/P50/P90 cost bands"
+    ) and not fleet_mode
+    
+    if monte_carlo_enabled:
+        mc_distribution = st.selectbox(
+            "Distribution",
+            DISTRIBUTIONS,
+            help="Shape of the spread around each input"
+        )
+        
+        mc_trajectories = st.selectbox(
+            "Trajectories",
+            [10_000, 50_000, 100_000, 250_000],
+            index=2,
+            format_func=lambda n: f"{n:,}"
+        )
+        
+        mc_seed = st.number_input(
+            "Random Seed",
+            min_value=0, max_value=2**32 - 1,
+            value=42,
+            help="Same seed, same trajectories"
+        )
+        
+        uncertainty = UncertaintySpec(
+            distribution=mc_distribution,
+            trajectories=mc_trajectories,
+            seed=mc_seed,
+            compute_growth_spread=st.slider("Compute Growth Spread (± pp)", 0, 25, 5),
+            storage_growth_spread=st.slider("Storage Growth Spread (± pp)", 0, 15, 5),
+            transfer_growth_spread=st.slider("Transfer Growth Spread (± pp)", 0, 15, 3),
+            hours_per_day_spread=st.slider("Hours per Day Spread (± h)", 0, 12, 2),
+            active_days_per_month_spread=st.slider("Active Days Spread (± days)", 0, 15, 2),
+        )
 
 
 
 # === CALCULATIONS ===
 
-STORAGE_COST_PER_TB = 40
-DATA_TRANSFER_COST_PER_TB = 90
-size_credit_mapping = {"X-Small": 1, "Small": 2, "Medium": 4, "Large": 8, "X-Large": 16}
-
-def gen2_scaling_discount(num_warehouses):
-    """Enhanced Gen 2 scaling with progressive discounts"""
-    if num_warehouses <= 1:
-        return 1.0
-    elif num_warehouses <= 3:
-        return 0.95  # 5% discount
-    elif num_warehouses <= 6:
-        return 0.90  # 10% discount
-    else:
-        return 0.85  # 15% discount for large deployments
-
-# Monthly calculations
-months = pd.date_range(start="2024-01-01", periods=12, freq='ME').strftime("%b")
-compute_costs, storage_costs, transfer_costs = [], [], []
-storage_current = storage_tb
-transfer_current = data_transfer_tb
-
-for month in range(12):
-    # Base compute calculation
-    base_credits = num_vws * size_credit_mapping[vw_size] * hours_per_day * active_days_per_month
-    
-    # Gen 2 optimizations
-    if use_gen2:
-        base_credits *= 0.70  # 30% efficiency
-        base_credits *= gen2_scaling_discount(num_vws)
-    
-    monthly_compute = base_credits * credit_cost * (1 + (month * compute_growth / 100))
-    compute_costs.append(monthly_compute)
-    
-    # Storage with compound growth
-    monthly_storage = storage_current * STORAGE_COST_PER_TB
-    storage_costs.append(monthly_storage)
-    storage_current *= (1 + storage_growth / 100)
-    
-    # Transfer with compound growth
-    monthly_transfer = transfer_current * DATA_TRANSFER_COST_PER_TB
-    transfer_costs.append(monthly_transfer)
-    transfer_current *= (1 + transfer_growth / 100)
-
-# Apply base discount
-compute_costs = [c * (1 - discount_pct / 100) for c in compute_costs]
-storage_costs = [s * (1 - discount_pct / 100) for s in storage_costs]
-transfer_costs = [t * (1 - discount_pct / 100) for t in transfer_costs]
-
-total_costs = np.array(compute_costs) + np.array(storage_costs) + np.array(transfer_costs)
-total_annual_cost = total_costs.sum()
-
-# Optimization calculations
-optimized_size_credit = size_credit_mapping[vw_size] if reduce_vw_size == "No Change" else size_credit_mapping[reduce_vw_size]
-optimized_compute_costs = []
-storage_current_opt = storage_tb
-transfer_current_opt = data_transfer_tb
-
-for month in range(12):
-    effective_hours = max(hours_per_day - pause_hours_per_day, 0)
-    base_credits_opt = num_vws * optimized_size_credit * effective_hours * active_days_per_month
-    
-    if use_gen2:
-        base_credits_opt *= 0.70
-        base_credits_opt *= gen2_scaling_discount(num_vws)
-        if pause_hours_per_day > 0:
-            base_credits_opt *= 0.90  # Additional pause efficiency
-    
-    monthly_compute_opt = base_credits_opt * credit_cost * (1 + (month * compute_growth / 100))
-    optimized_compute_costs.append(monthly_compute_opt)
-    
-    storage_current_opt *= (1 + storage_growth / 100)
-    transfer_current_opt *= (1 + transfer_growth / 100)
-
-# Apply combined discount
-total_discount_opt = discount_pct + additional_discount
-optimized_compute_costs = [c * (1 - total_discount_opt / 100) for c in optimized_compute_costs]
-optimized_storage_costs = [s * (1 - total_discount_opt / 100) for s in storage_costs]
-optimized_transfer_costs = [t * (1 - total_discount_opt / 100) for t in transfer_costs]
-
-total_optimized_costs = (
-    np.array(optimized_compute_costs) +
-    np.array(optimized_storage_costs) +
-    np.array(optimized_transfer_costs)
+storage_cost_per_tb, transfer_cost_per_tb = rates.rates(region, transfer_destination)
+inputs = CostInputs(
+    num_vws=num_vws,
+    vw_size=vw_size,
+    hours_per_day=hours_per_day,
+    active_days_per_month=active_days_per_month,
+    credit_cost=credit_cost,
+    use_gen2=use_gen2,
+    compute_growth=compute_growth,
+    storage_tb=storage_tb,
+    storage_growth=storage_growth,
+    data_transfer_tb=data_transfer_tb,
+    transfer_growth=transfer_growth,
+    discount_pct=discount_pct,
+    pause_hours_per_day=pause_hours_per_day,
+    reduce_vw_size=reduce_vw_size,
+    additional_discount=additional_discount,
+    storage_cost_per_tb=storage_cost_per_tb,
+    transfer_cost_per_tb=transfer_cost_per_tb,
 )
-total_optimized_annual = total_optimized_costs.sum()
-total_savings = total_annual_cost - total_optimized_annual
-savings_pct = (total_savings / total_annual_cost) * 100 if total_annual_cost > 0 else 0
+
+# A loaded fleet replaces the N identical warehouses; the sidebar values fill its missing columns
+fleet = fleet_key = None
+if fleet_mode:
+    try:
+        with span("fleet"):
+            if fleet_upload is not None:
+                from metering import file_digest
+
+                fleet_digest = file_digest(fleet_upload)
+                fleet_frame = cached_fleet_frame(fleet_digest, fleet_upload, fleet_upload.name)
+                fleet = Fleet.from_frame(fleet_frame, inputs)
+            else:
+                fleet_digest = metering_digest
+                fleet = Fleet.from_metering(metering, inputs)
+            fleet_key = (fleet_digest, inputs)
+    except (ValueError, KeyError) as error:
+        st.sidebar.error(f"Could not load the fleet: {error}")
+
+# Let the solver pick the optimization settings; a fleet gets them per group of identical warehouses
+optimization = optimization_key = None
+if auto_optimize:
+    with span("optimize"):
+        optimization = cached_optimize(inputs, capacity_floor_pct, horizon_years * 12, fleet)
+    optimization_key = (inputs, capacity_floor_pct, horizon_years * 12, fleet_key)
+    inputs = optimization.best
+    additional_discount = inputs.additional_discount
+    if fleet is not None:
+        fleet = optimization.best_fleet
+        fleet_key = optimization_key
+    else:
+        pause_hours_per_day = inputs.pause_hours_per_day
+        reduce_vw_size = inputs.reduce_vw_size
+
+# Only the parts of the estimate downstream of a changed input are recomputed;
+# a fleet pins the base credits to its own totals
+estimate_graph = IncrementalEstimate(st.session_state)
+with span("estimate"):
+    base_credits = cached_fleet_base_credits(fleet) if fleet is not None else (None, None)
+    result = estimate_graph.estimate(inputs, *base_credits)
+
+months = tuple(calendar.month_abbr[1:13])
+compute_costs = result.compute_costs
+storage_costs = result.storage_costs
+transfer_costs = result.transfer_costs
+total_costs = result.total_costs
+total_annual_cost = result.total_annual_cost
+
+optimized_compute_costs = result.optimized_compute_costs
+optimized_storage_costs = result.optimized_storage_costs
+optimized_transfer_costs = result.optimized_transfer_costs
+total_optimized_costs = result.total_optimized_costs
+total_optimized_annual = result.total_optimized_annual
+total_savings = result.total_savings
+savings_pct = result.savings_pct
+
+
+# Trend charts beyond the 12 monthly points use the long-horizon projection;
+# the 3-year savings are the closed-form 36-month totals
+projection = projection_key = None
+if (horizon_years, granularity) != (1, "Monthly"):
+    with span("projection"):
+        projection_key = (inputs, horizon_years * 12, granularity, fleet_key, projection_start())
+        projection = cached_projection(inputs, horizon_years * 12, granularity, fleet, projection_key[-1])
+with span("three_year_totals"):
+    three_year_savings = horizon_totals(inputs, 36, *base_credits).savings
+
+
+# All -/+ swings are priced in one batch
+input_sensitivity = sensitivity_key = None
+if sensitivity_enabled:
+    with span("sensitivity"):
+        input_sensitivity = cached_sensitivity(inputs, sensitivity_swing, fleet)
+    sensitivity_key = (inputs, sensitivity_swing, fleet_key)
+
+simulation = simulation_key = None
+if monte_carlo_enabled:
+    with span("monte_carlo"):
+        simulation = cached_simulate(inputs, uncertainty, st.empty())
+    simulation_key = (inputs, uncertainty)
 
 
 # === MAIN DASHBOARD ===
+# Each section declares the values it depends on; sections whose values did
+# not change since the previous rerun reuse their content instead of rebuilding.
+
+values = dict(
+    vars(inputs),
+    region=region,
+    edition=edition if use_list_price else None,  # a custom credit price has no edition
+    transfer_destination=transfer_destination,
+    months=months,
+    compute_costs=compute_costs,
+    storage_costs=storage_costs,
+    transfer_costs=transfer_costs,
+    total_costs=total_costs,
+    total_annual_cost=total_annual_cost,
+    optimized_compute_costs=optimized_compute_costs,
+    total_optimized_costs=total_optimized_costs,
+    total_optimized_annual=total_optimized_annual,
+    total_savings=total_savings,
+    savings_pct=savings_pct,
+    annual_credits=result.annual_credits,
+    avg_storage_tb=result.avg_storage_tb,
+    simulation=simulation,
+    uncertainty=uncertainty if simulation is not None else None,
+    optimization=optimization,
+    capacity_floor_pct=capacity_floor_pct if optimization is not None else None,
+    fleet=fleet,
+    projection=projection,
+    three_year_savings=three_year_savings,
+    sensitivity=input_sensitivity,
+    sensitivity_metric=sensitivity_metric if input_sensitivity is not None else None,
+    attribution=attribution_table,
+    attribution_dimension=attribution_dimension,
+)
+
+# The sections fingerprint these stand-ins instead of pickling the large
+# values: each is what the value's cached builder was called with
+value_keys = dict(
+    fleet=fleet_key,
+    optimization=optimization_key,
+    projection=projection_key,
+    sensitivity=sensitivity_key,
+    simulation=simulation_key,
+    attribution=attribution_key,
+)
 
-# Key Metrics Row
-col1, col2, col3, col4 = st.columns(4)
 
-with col1:
-    st.markdown(f"""
+# Key Metrics Row
+def build_metrics(v):
+    roi_indicator = "🟢" if v.savings_pct > 20 else "🟡" if v.savings_pct > 10 else "🔴"
+    return [
+        f"""
     <div class="metric-card">
-        <div class="metric-value">${int(round(total_annual_cost)):,}</div>
+        <div class="metric-value">${int(round(v.total_annual_cost)):,}</div>
         <div class="metric-label">📊 Annual Cost</div>
     </div>
-    """, unsafe_allow_html=True)
-
-with col2:
-    st.markdown(f"""
+    """,
+        f"""
     <div class="metric-card">
-        <div class="metric-value">${int(round(total_annual_cost/12)):,}</div>
+        <div class="metric-value">${int(round(v.total_annual_cost/12)):,}</div>
         <div class="metric-label">📅 Monthly Average</div>
     </div>
-    """, unsafe_allow_html=True)
-
-with col3:
-    st.markdown(f"""
+    """,
+        f"""
     <div class="savings-card">
-        <div class="savings-value">${int(round(total_savings)):,}</div>
+        <div class="savings-value">${int(round(v.total_savings)):,}</div>
         <div class="savings-label">💰 Potential Savings</div>
     </div>
-    """, unsafe_allow_html=True)
-
-with col4:
-    roi_indicator = "🟢" if savings_pct > 20 else "🟡" if savings_pct > 10 else "🔴"
-    st.markdown(f"""
+    """,
+        f"""
     <div class="metric-card">
-        <div class="metric-value">{roi_indicator} {savings_pct:.1f}%</div>
+        <div class="metric-value">{roi_indicator} {v.savings_pct:.1f}%</div>
         <div class="metric-label">📈 Savings Percentage</div>
     </div>
-    """, unsafe_allow_html=True)
+    """,
+    ]
+
+
+def show_metrics(cards):
+    for col, card in zip(st.columns(4), cards):
+        with col:
+            st.markdown(card, unsafe_allow_html=True)
+
 
-# Configuration Summary
 # === CONFIGURATION SUMMARY ===
-st.markdown('<div class="section-header">🎯 Current Configuration</div>', unsafe_allow_html=True)
-
-config_col1, config_col2, config_col3, config_col4 = st.columns(4)
-
-# Compute credits consumed
-annual_credits = num_vws * size_credit_mapping[vw_size] * hours_per_day * active_days_per_month * 12
-if use_gen2:
-    annual_credits *= 0.70
-    annual_credits *= gen2_scaling_discount(num_vws)
-
-with config_col1:
-    st.markdown(f"""
-    **Compute Setup:**
-    - {num_vws} × {vw_size} Warehouses
-    - {hours_per_day}h/day × {active_days_per_month} days/month
-    - {'Gen 2 Warehouse Enabled' if use_gen2 else 'Gen 1 Warehouse'}
-    - Credits Consumed (Annual): {int(round(annual_credits)):,}
-    - Cost per Credit: ${credit_cost:.2f}
-    - **Annual Compute Cost:** ${int(round(sum(compute_costs))):,}
-    """)
-
-with config_col2:
-    # Calculate average storage over the year
-    avg_storage_tb = sum([
-        storage_tb * ((1 + storage_growth / 100) ** month) for month in range(12)
-    ]) / 12
-
-    st.markdown(f"""
+def build_configuration(v):
+    if v.fleet is not None:
+        size_mix = ", ".join(f"{count:,} × {size}" for size, count in v.fleet.size_mix().items())
+        compute_setup = f"""
+    - {len(v.fleet):,} Warehouses: {size_mix}
+    - avg {v.fleet.mean_hours_per_day:.1f}h/day × {v.fleet.mean_active_days:.1f} days/month
+    - {v.fleet.gen2_count:,} Gen 2 / {len(v.fleet) - v.fleet.gen2_count:,} Gen 1 Warehouses"""
+    else:
+        compute_setup = f"""
+    - {v.num_vws} × {v.vw_size} Warehouses
+    - {v.hours_per_day}h/day × {v.active_days_per_month} days/month
+    - {'Gen 2 Warehouse Enabled' if v.use_gen2 else 'Gen 1 Warehouse'}"""
+    return [
+        f"""
+    **Compute Setup:**{compute_setup}
+    - Credits Consumed (Annual): {int(round(v.annual_credits)):,}
+    - Cost per Credit: ${v.credit_cost:.2f} ({f"{v.edition} list price, {v.region}" if v.edition else "custom price"})
+    - **Annual Compute Cost:** ${int(round(sum(v.compute_costs))):,}
+    """,
+        f"""
     **Storage & Transfer:**
     - **Storage Setup:**
-      - Starting Storage: {storage_tb:.1f} TB
-      - Growth: {storage_growth}% per month
-      - Avg Storage: {avg_storage_tb:.2f} TB
-      - Rate: ${STORAGE_COST_PER_TB}/TB/month
-      - **Annual Storage Cost:** ${int(round(sum(storage_costs))):,}
-
-    """)
-
-with config_col3:
-    st.markdown(f"""
+      - Starting Storage: {v.storage_tb:.1f} TB
+      - Growth: {v.storage_growth}% per month
+      - Avg Storage: {v.avg_storage_tb:.2f} TB
+      - Rate: ${v.storage_cost_per_tb:g}/TB/month
+      - **Annual Storage Cost:** ${int(round(sum(v.storage_costs))):,}
+
+    """,
+        f"""
    - **Data Transfer Setup:**
-      - Monthly Transfer: {data_transfer_tb:.1f} TB
-      - Rate: ${DATA_TRANSFER_COST_PER_TB}/TB
-      - Monthly Cost: ${data_transfer_tb * DATA_TRANSFER_COST_PER_TB:,.0f}
-      - **Annual Transfer Cost:** ${int(round(sum(transfer_costs))):,}
-    """)
-
-
-with config_col4:
-    st.markdown(f"""
+      - Monthly Transfer: {v.data_transfer_tb:.1f} TB
+      - Rate: ${v.transfer_cost_per_tb:g}/TB to {v.transfer_destination}
+      - Monthly Cost: ${v.data_transfer_tb * v.transfer_cost_per_tb:,.0f}
+      - **Annual Transfer Cost:** ${int(round(sum(v.transfer_costs))):,}
+    """,
+        f"""
     **Discounts Applied:**
-    - {discount_pct}% Base Discount
-    - {additional_discount}% Optimization Discount
-    """)
+    - {v.discount_pct}% Base Discount
+    - {v.additional_discount}% Optimization Discount
+    """,
+    ]
 
 
-# === ENHANCED VISUALIZATIONS ===
+def show_configuration(blocks):
+    st.markdown('<div class="section-header">🎯 Current Configuration</div>', unsafe_allow_html=True)
+    for col, block in zip(st.columns(4), blocks):
+        with col:
+            st.markdown(block)
 
-st.markdown('<div class="section-header">📊 Cost Analysis Dashboard</div>', unsafe_allow_html=True)
-
-# Enhanced Cost Breakdown with Donut Chart
-fig_donut = go.Figure(data=[go.Pie(
-    labels=['Compute', 'Storage', 'Data Transfer'],
-    values=[round(sum(compute_costs)), round(sum(storage_costs)), round(sum(transfer_costs))],
-    hole=0.6,
-    marker_colors=['#667eea', '#764ba2', '#f093fb'],
-    textinfo='label+percent',
-    textfont_size=12,
-    hovertemplate='<b>%{label}</b><br>Cost: $%{value:,.0f}<br>Percentage: %{percent}<extra></extra>'
-)])
-
-# Add watermark to donut chart
-fig_donut.add_layout_image(
-     dict(
-        source=watermark_img,
-        xref="paper", yref="paper",
-        x=0.5, y=0.5,
-        sizex=1, sizey=1,  # exactly fill the plot area
-        opacity=0.11,
-        layer="below",
-        xanchor="center",
-        yanchor="middle"
-    )
-)
 
-fig_donut.update_layout(
-    title={'text': "Annual Cost Distribution", 'x': 0.5, 'xanchor': 'center'},
-    annotations=[dict(text=f'Total<br>${total_annual_cost:,.0f}', x=0.5, y=0.5, font_size=16, showarrow=False)],
-    showlegend=True,
-    height=400,
-    font=dict(family="Inter, sans-serif")
-)
-
-# Monthly trend with dual axis
-monthly_df = pd.DataFrame({
-    "Month": months,
-    "Compute": compute_costs,
-    "Storage": storage_costs,
-    "Data Transfer": transfer_costs,
-    "Total": total_costs
-})
-
-fig_trend = make_subplots()
-
-fig_trend.add_trace(
-    go.Scatter(
-        x=months,
-        y=[round(v) for v in compute_costs],  # Rounded data
-        fill='tozeroy',
-        name='Compute',
-        line=dict(color='#667eea'),
-        fillcolor='rgba(102,126,234,0.35)',
-        hovertemplate='<b>Compute</b><br>$%{y:,.0f}<extra></extra>'
-    )
-)
-
-fig_trend.add_trace(
-    go.Scatter(
-        x=months,
-        y=[round(v) for v in storage_costs],  # Rounded data
-        fill='tonexty',
-        name='Storage',
-        line=dict(color='#764ba2'),
-        fillcolor='rgba(118,75,162,0.35)',
-        hovertemplate='<b>Storage</b><br>$%{y:,.0f}<extra></extra>'
-    )
-)
-
-fig_trend.add_trace(
-    go.Scatter(
-        x=months,
-        y=[round(v) for v in transfer_costs],  # Rounded data
-        fill='tonexty',
-        name='Data Transfer',
-        line=dict(color='#f093fb'),
-        fillcolor='rgba(240,147,251,0.35)',
-        hovertemplate='<b>Data Transfer</b><br>$%{y:,.0f}<extra></extra>'
-    )
-)
-
-fig_trend.add_trace(
-    go.Scatter(
-        x=months,
-        y=total_costs,
-        mode='lines+markers+text',
-        name='Total Cost',
-        line=dict(color='#1f2937', width=3),
-        marker=dict(size=7),
-        text=[f"${int(round(v)):,}" for v in total_costs],  # Rounded
-        textposition="top center",
-        hovertemplate='<b>Total Cost</b><br>$%{y:,.0f}<extra></extra>'
-    )
-)
-
-# Add watermark to monthly trend chart
-fig_trend.add_layout_image(
-    dict(
-        source=watermark_img,
-        xref="paper", yref="paper",
-        x=0.5, y=0.5,
-        sizex=1, sizey=1,  # exactly fill the plot area
-        opacity=0.11,
-        layer="below",
-        xanchor="center",
-        yanchor="middle"
+# === ENHANCED VISUALIZATIONS ===
+def build_cost_dashboard(v):
+    with span("fig_donut"):
+        fig_donut = cached_donut_chart(sum(v.compute_costs), sum(v.storage_costs), sum(v.transfer_costs), v.total_annual_cost)
+
+    # Monthly trend, with the Monte Carlo fan band when enabled
+    bands = None
+    caption = None
+    if v.simulation is not None:
+        bands = (v.simulation.band(10), v.simulation.band(50), v.simulation.band(90))
+        caption = (
+            f"🎲 {v.uncertainty.trajectories:,} {v.uncertainty.distribution.lower()} trajectories (seed {v.uncertainty.seed}): "
+            f"annual cost P50 ${v.simulation.annual(50):,.0f} · P90 ${v.simulation.annual(90):,.0f}; "
+            f"optimized P50 ${v.simulation.annual(50, optimized=True):,.0f} · P90 ${v.simulation.annual(90, optimized=True):,.0f}"
+        )
+    if v.projection is not None:
+        with span("fig_trend"):
+            fig_trend = cached_projection_trend_chart(v.projection)
+        if caption:
+            caption += " (bands are drawn on the 1-year monthly view)"
+    else:
+        with span("fig_trend"):
+            fig_trend = cached_trend_chart(v.months, v.compute_costs, v.storage_costs, v.transfer_costs, v.total_costs, bands)
+
+    # Tornado of the -/+ swings, with the elasticity of the top driver
+    fig_tornado = None
+    tornado_caption = None
+    if v.sensitivity is not None:
+        metric = SENSITIVITY_METRICS[v.sensitivity_metric]
+        with span("fig_tornado"):
+            fig_tornado = cached_tornado_chart(v.sensitivity, v.sensitivity_metric)
+        top = v.sensitivity.order(metric)[0]
+        tornado_caption = (
+            f"🌪️ Each input moved ±{v.sensitivity.swing_pct}% with the others held. "
+            f"{SENSITIVITY_INPUTS[v.sensitivity.inputs[top]]} matters most: 1% more changes "
+            f"{v.sensitivity_metric.lower()} by {v.sensitivity.elasticities(metric)[top]:+.2f}%. "
+            "Inputs at 0 show no swing."
+        )
+    return fig_donut, fig_trend, caption, fig_tornado, tornado_caption
+
+
+def show_cost_dashboard(content):
+    fig_donut, fig_trend, caption, fig_tornado, tornado_caption = content
+    st.markdown('<div class="section-header">📊 Cost Analysis Dashboard</div>', unsafe_allow_html=True)
+
+    # Display charts side by side
+    chart_col1, chart_col2 = st.columns(2)
+    with chart_col1:
+        plotly_chart("fig_donut", fig_donut)
+    with chart_col2:
+        plotly_chart("fig_trend", fig_trend)
+        if caption:
+            st.caption(caption)
+
+    if fig_tornado is not None:
+        plotly_chart("fig_tornado", fig_tornado)
+        st.caption(tornado_caption)
+
+
+# === COST ATTRIBUTION ===
+def build_attribution(v):
+    if v.attribution is None:
+        return None
+    from attribution import DIMENSION_LABELS
+
+    table = v.attribution.assign(**{"Annual compute cost": v.attribution["Share"] * sum(v.compute_costs)})
+    return DIMENSION_LABELS[v.attribution_dimension], table
+
+
+def show_attribution(content):
+    if content is None:
+        return
+    label, table = content
+    st.markdown(f'<div class="section-header">🧾 Compute Cost by {label}</div>', unsafe_allow_html=True)
+    st.dataframe(
+        table.style.format({"Credits": "{:,.1f}", "Share": "{:.1%}", "Annual compute cost": "${:,.0f}"}),
+        hide_index=True, width="stretch"
     )
-)
-
-fig_trend.update_layout(
-    title="Monthly Cost Trend & Breakdown",
-    xaxis_title="Month",
-    yaxis_title="Cost ($)",
-    hovermode='x unified',
-    height=500,
-    font=dict(family="Inter, sans-serif"),
-    legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-)
+    st.caption("Shares of the metered credits in the exports, applied to the estimate's annual compute cost")
 
-fig_trend.update_yaxes(range=[0, max(total_costs) * 1.15])
-
-# Display charts side by side
-chart_col1, chart_col2 = st.columns(2)
-with chart_col1:
-    st.plotly_chart(fig_donut, use_container_width=True)
-with chart_col2:
-    st.plotly_chart(fig_trend, use_container_width=True)
 
 # === OPTIMIZATION ANALYSIS ===
-st.markdown('<div class="section-header">⚡ Optimization Analysis</div>', unsafe_allow_html=True)
-
-optimizations = []
-if pause_hours_per_day > 0:
-    optimizations.append(f"🔄 Auto-pause {pause_hours_per_day}h daily reduces compute by ~{pause_hours_per_day/hours_per_day*100:.0f}%")
-if reduce_vw_size != "No Change":
-    original_credits = size_credit_mapping[vw_size]
-    new_credits = size_credit_mapping[reduce_vw_size]
-    reduction = (1 - new_credits/original_credits) * 100
-    optimizations.append(f"📉 Warehouse downsizing saves {reduction:.0f}% on compute credits")
-if use_gen2:
-    optimizations.append(f"🚀 Gen 2 warehouses provide 30% better price-performance")
-if additional_discount > 0:
-    optimizations.append(f"🏷️ Usage optimization unlocks {additional_discount}% additional discount")
-
-if optimizations:
-    st.markdown('<div class="optimization-summary">', unsafe_allow_html=True)
-    for opt in optimizations:
-        st.markdown(f'<div class="optimization-item">{opt}</div>', unsafe_allow_html=True)
-    st.markdown('</div>', unsafe_allow_html=True)
-
-# Before/After Comparison
-comparison_data = {
-    'Scenario': ['Current Configuration', 'Optimized Configuration'],
-    'Annual Cost': [total_annual_cost, total_optimized_annual],
-    'Monthly Average': [total_annual_cost/12, total_optimized_annual/12],
-    'Compute %': [sum(compute_costs)/total_annual_cost*100, sum(optimized_compute_costs)/total_optimized_annual*100],
-    'Storage %': [sum(storage_costs)/total_annual_cost*100, sum(optimized_storage_costs)/total_optimized_annual*100]
-}
-
-comparison_df = pd.DataFrame(comparison_data)
-
-fig_comparison = px.bar(
-    comparison_df, x='Scenario', y='Annual Cost',
-    title='Cost Comparison: Current vs Optimized',
-    color='Scenario',
-    color_discrete_map={
-        'Current Configuration': '#ef4444',
-        'Optimized Configuration': '#10b981'
-    },
-    text='Annual Cost'
-)
-
-fig_comparison.update_traces(
-    texttemplate='$%{text:,.0f}',
-    textposition='outside'
-)
+def build_optimization(v):
+    optimizations = []
+    if v.fleet is not None:
+        paused_pct, downsized_pct = optimization_shares(v.fleet)
+        if v.fleet.paused_count:
+            optimizations.append(f"🔄 Auto-pause on {v.fleet.paused_count:,} warehouses reduces fleet compute by ~{paused_pct:.0f}%")
+        if v.fleet.downsized_count:
+            optimizations.append(f"📉 Downsizing {v.fleet.downsized_count:,} warehouses saves {downsized_pct:.0f}% of fleet compute credits")
+        if v.fleet.gen2_count:
+            optimizations.append(f"🚀 Gen 2 on {v.fleet.gen2_count:,} warehouses provides 30% better price-performance")
+    elif v.pause_hours_per_day > 0:
+        optimizations.append(f"🔄 Auto-pause {v.pause_hours_per_day}h daily reduces compute by ~{v.pause_hours_per_day/v.hours_per_day*100:.0f}%")
+    if v.fleet is None and v.reduce_vw_size != "No Change":
+        original_credits = size_credit_mapping[v.vw_size]
+        new_credits = size_credit_mapping[v.reduce_vw_size]
+        reduction = (1 - new_credits/original_credits) * 100
+        optimizations.append(f"📉 Warehouse downsizing saves {reduction:.0f}% on compute credits")
+    if v.fleet is None and v.use_gen2:
+        optimizations.append(f"🚀 Gen 2 warehouses provide 30% better price-performance")
+    if v.additional_discount > 0:
+        optimizations.append(f"🏷️ Usage optimization unlocks {v.additional_discount}% additional discount")
+
+    # Auto-optimizer frontier
+    frontier = None
+    if v.optimization is not None:
+        from charts import frontier_chart
+
+        optimization = v.optimization
+        baseline_capacity = optimization.current_capacity
+        if v.fleet is not None:
+            settings = f"{v.fleet.downsized_count:,} of {len(v.fleet):,} warehouses downsized and {v.fleet.paused_count:,} auto-paused"
+        else:
+            optimized_vw_size = v.vw_size if v.reduce_vw_size == "No Change" else v.reduce_vw_size
+            settings = f"{optimized_vw_size} warehouses with {v.pause_hours_per_day}h auto-pause"
+        space = optimization.search_space
+        space = f"{space:,}" if space < 10**9 else f"~10^{len(str(space)) - 1}"
+        search = f"reached {optimization.evaluated:,} of {space} configurations in {optimization.nodes:,} search steps"
+        if not optimization.exhaustive:
+            search += f", within {optimization.gap:.2%} of the cheapest"
+        years = optimization.months // 12
+        with span("fig_frontier"):
+            frontier = (
+                f"🤖 Auto-optimizer: {settings} keep {optimization.best_capacity / baseline_capacity * 100:.0f}% of capacity ({search})",
+                frontier_chart(
+                    optimization.frontier_capacity / baseline_capacity * 100,
+                    optimization.frontier_cost,
+                    optimization.frontier_labels,
+                    optimization.best_capacity / baseline_capacity * 100,
+                    optimization.best_cost,
+                    v.capacity_floor_pct,
+                    "Annual" if years == 1 else f"{years}-Year",
+                ),
+            )
+
+    # Before/After Comparison and monthly savings trend
+    with span("fig_comparison"):
+        fig_comparison = cached_comparison_chart(v.total_annual_cost, v.total_optimized_annual)
+    with span("fig_savings_trend"):
+        if v.projection is not None:
+            fig_savings_trend = cached_projection_savings_chart(v.projection)
+        else:
+            fig_savings_trend = cached_savings_trend_chart(v.months, v.total_costs, v.total_optimized_costs)
+    return optimizations, frontier, fig_comparison, fig_savings_trend
+
+
+def show_optimization(content):
+    optimizations, frontier, fig_comparison, fig_savings_trend = content
+    st.markdown('<div class="section-header">⚡ Optimization Analysis</div>', unsafe_allow_html=True)
+
+    if optimizations:
+        st.markdown('<div class="optimization-summary">', unsafe_allow_html=True)
+        for opt in optimizations:
+            st.markdown(f'<div class="optimization-item">{opt}</div>', unsafe_allow_html=True)
+        st.markdown('</div>', unsafe_allow_html=True)
+
+    if frontier is not None:
+        label, fig_frontier = frontier
+        with st.expander(label):
+            plotly_chart("fig_frontier", fig_frontier)
+
+    # Display comparison charts
+    comp_col1, comp_col2 = st.columns(2)
+    with comp_col1:
+        plotly_chart("fig_comparison", fig_comparison)
+    with comp_col2:
+        plotly_chart("fig_savings_trend", fig_savings_trend)
 
-max_value = max(comparison_df['Annual Cost']) * 1.15
 
-fig_comparison.update_layout(
-    yaxis=dict(range=[0, max_value]),
-    yaxis_title="Annual Cost ($)",
-    showlegend=False,
-    height=400,
-    font=dict(family="Inter, sans-serif")
-)
+# === ROI ANALYSIS ===
+def build_roi(v):
+    months_to_roi = 1  # Immediate savings
+    three_year_savings = int(round(v.three_year_savings))
+    cost_per_tb_processed = int(round(v.total_annual_cost / (v.storage_tb * 12))) if v.storage_tb > 0 else 0
+    return [
+        ("Time to ROI", f"{months_to_roi} month{'s' if months_to_roi != 1 else ''}", "Immediate impact"),
+        ("3-Year Savings Projection", f"${three_year_savings:,}", f"{int(round(v.savings_pct))}% annually"),
+        ("Cost per TB (Annual)", f"${cost_per_tb_processed:,}", "Including all costs"),
+    ]
 
-# Add watermark to comparison chart
-fig_comparison.add_layout_image(
-    dict(
-        source=watermark_img,
-        xref="paper", yref="paper",
-        x=0.5, y=0.5,
-        sizex=1, sizey=1,  # exactly fill the plot area
-        opacity=0.11,
-        layer="below",
-        xanchor="center",
-        yanchor="middle"
-    )
-)
 
-# Monthly savings trend
-savings_trend_df = pd.DataFrame({
-    "Month": months,
-    "Current": np.round(total_costs),
-    "Optimized": np.round(total_optimized_costs),
-    "Monthly Savings": np.round(total_costs - total_optimized_costs)
-})
-
-fig_savings_trend = px.line(
-    savings_trend_df,
-    x="Month",
-    y=["Current", "Optimized"],
-    title="Monthly Cost Trajectory",
-    color_discrete_map={"Current": "#ef4444", "Optimized": "#10b981"}
-)
+def show_roi(metrics):
+    st.markdown('<div class="section-header">💼 ROI & Business Impact</div>', unsafe_allow_html=True)
+    for col, (label, value, delta) in zip(st.columns(3), metrics):
+        with col:
+            st.metric(label, value, delta=delta)
 
-fig_savings_trend.update_traces(
-    mode='lines+markers',
-    line=dict(width=3),
-    hovertemplate='%{y:,.0f}'  # Rounded with commas
-)
 
-# Add watermark to savings trend chart
-fig_savings_trend.add_layout_image(
-    dict(
-        source=watermark_img,
-        xref="paper", yref="paper",
-        x=0.5, y=0.5,
-        sizex=1, sizey=1,  # exactly fill the plot area
-        opacity=0.11,
-        layer="below",
-        xanchor="center",
-        yanchor="middle"
+# Summary Report Card
+def build_executive_summary(v):
+    summary_metrics = {
+        'Current Annual Spend': f"${int(round(v.total_annual_cost)):,}",
+        'Optimized Annual Spend': f"${int(round(v.total_optimized_annual)):,}",
+        'Annual Savings': f"${int(round(v.total_savings)):,} ({int(round(v.savings_pct))}%)",
+        'Monthly Savings': f"${int(round(v.total_savings/12)):,}",
+        'Compute Efficiency': f"{int(round(100 - (sum(v.optimized_compute_costs)/sum(v.compute_costs)*100)))}% improvement",
+        'Primary Optimization': 'Gen 2 Warehouses' if v.use_gen2 else 'Auto-pause & Right-sizing'
+    }
+    import pandas as pd
+
+    with span("summary_df"):
+        summary_df = pd.DataFrame(list(summary_metrics.items()), columns=['Metric', 'Value'])
+    with span("monthly_csv"):
+        monthly_csv = pd.DataFrame({
+            'Month': v.months,
+            'Compute': np.round(v.compute_costs, 2),
+            'Storage': np.round(v.storage_costs, 2),
+            'Data Transfer': np.round(v.transfer_costs, 2),
+            'Total': np.round(v.total_costs, 2),
+            'Optimized Total': np.round(v.total_optimized_costs, 2),
+        }).to_csv(index=False).encode()
+
+    # Action Items
+    actions = []
+    if v.savings_pct > 0:
+        actions.append((st.success, f"🎯 **Recommendation**: Implement the optimization strategy to achieve ${v.total_savings:,.0f} in annual savings ({v.savings_pct:.1f}%)"))
+
+        if v.use_gen2:
+            actions.append((st.info, "💡 **Pro Tip**: Gen 2 warehouses provide the highest ROI with automatic scaling and 30% efficiency gains"))
+
+        if v.pause_hours_per_day > 0:
+            actions.append((st.info, f"⏱️ **Quick Win**: Auto-pause configuration can be implemented immediately for {v.pause_hours_per_day}h daily savings"))
+    return summary_df, actions, monthly_csv
+
+
+def show_executive_summary(content):
+    summary_df, actions, monthly_csv = content
+    st.markdown('<div class="section-header">📋 Executive Summary</div>', unsafe_allow_html=True)
+
+    st.dataframe(
+        summary_df,
+        width="stretch",
+        hide_index=True,
+        column_config={
+            "Metric": st.column_config.TextColumn("Key Metrics", width="medium"),
+            "Value": st.column_config.TextColumn("Values", width="medium")
+        }
     )
-)
-
-fig_savings_trend.update_layout(
-    yaxis_title="Monthly Cost ($)",
-    height=400,
-    font=dict(family="Inter, sans-serif")
-)
-
-# Display comparison charts
-comp_col1, comp_col2 = st.columns(2)
-with comp_col1:
-    st.plotly_chart(fig_comparison, use_container_width=True)
-with comp_col2:
-    st.plotly_chart(fig_savings_trend, use_container_width=True)
-
-# === ROI ANALYSIS ===
-st.markdown('<div class="section-header">💼 ROI & Business Impact</div>', unsafe_allow_html=True)
 
-roi_col1, roi_col2, roi_col3 = st.columns(3)
+    for show_message, message in actions:
+        show_message(message)
 
-with roi_col1:
-    months_to_roi = 1  # Immediate savings
-    st.metric(
-        "Time to ROI",
-        f"{months_to_roi} month{'s' if months_to_roi != 1 else ''}",
-        delta="Immediate impact"
+    st.download_button(
+        "⬇️ Download monthly breakdown (CSV)",
+        monthly_csv,
+        file_name="snowflake_cost_estimate.csv",
+        mime="text/csv",
+        on_click=log_action,
+        args=("export_run", "snowflake_cost_estimate.csv"),
     )
 
-with roi_col2:
-    three_year_savings = int(round(total_savings * 3))
-    st.metric(
-        "3-Year Savings Projection",
-        f"${three_year_savings:,}",
-        delta=f"{int(round(savings_pct))}% annually"
-    )
 
-with roi_col3:
-    cost_per_tb_processed = int(round(total_annual_cost / (storage_tb * 12))) if storage_tb > 0 else 0
-    st.metric(
-        "Cost per TB (Annual)",
-        f"${cost_per_tb_processed:,}",
-        delta="Including all costs"
+SECTIONS = [
+    Section("metrics", ("total_annual_cost", "total_savings", "savings_pct"), build_metrics, show_metrics),
+    Section(
+        "configuration",
+        ("num_vws", "vw_size", "hours_per_day", "active_days_per_month", "use_gen2", "credit_cost",
+         "storage_tb", "storage_growth", "data_transfer_tb", "discount_pct", "additional_discount",
+         "region", "edition", "transfer_destination", "storage_cost_per_tb", "transfer_cost_per_tb", "annual_credits", "avg_storage_tb", "compute_costs", "storage_costs", "transfer_costs", "fleet"),
+        build_configuration, show_configuration,
+    ),
+    Section(
+        "cost_dashboard",
+        ("months", "compute_costs", "storage_costs", "transfer_costs", "total_costs", "total_annual_cost",
+         "simulation", "uncertainty", "projection", "sensitivity", "sensitivity_metric"),
+        build_cost_dashboard, show_cost_dashboard,
+    ),
+    Section("attribution", ("attribution", "attribution_dimension", "compute_costs"), build_attribution, show_attribution),
+    Section(
+        "optimization",
+        ("num_vws", "vw_size", "hours_per_day", "active_days_per_month", "use_gen2", "pause_hours_per_day",
+         "reduce_vw_size", "additional_discount", "optimization", "capacity_floor_pct", "months",
+         "total_costs", "total_optimized_costs", "total_annual_cost", "total_optimized_annual", "fleet",
+         "projection"),
+        build_optimization, show_optimization,
+    ),
+    Section("roi", ("three_year_savings", "savings_pct", "total_annual_cost", "storage_tb"), build_roi, show_roi),
+    Section(
+        "executive_summary",
+        ("total_annual_cost", "total_optimized_annual", "total_savings", "savings_pct", "compute_costs",
+         "optimized_compute_costs", "use_gen2", "pause_hours_per_day", "months", "storage_costs",
+         "transfer_costs", "total_costs", "total_optimized_costs"),
+        build_executive_summary, show_executive_summary,
+    ),
+]
+
+section_runner = SectionRunner(st.session_state)
+for section in SECTIONS:
+    section_runner.run(section, values, value_keys)
+
+# One record per distinct estimate a session looks at, not per rerun
+if "metrics" in section_runner.rebuilt:
+    log_action(
+        "estimate_viewed",
+        f"{template}: {len(fleet) if fleet is not None else num_vws} warehouses, "
+        f"${total_annual_cost:,.0f}/yr, savings {savings_pct:.1f}%",
     )
 
-
-# Summary Report Card
-st.markdown('<div class="section-header">📋 Executive Summary</div>', unsafe_allow_html=True)
-
-summary_metrics = {
-    'Current Annual Spend': f"${int(round(total_annual_cost)):,}",
-    'Optimized Annual Spend': f"${int(round(total_optimized_annual)):,}",
-    'Annual Savings': f"${int(round(total_savings)):,} ({int(round(savings_pct))}%)",
-    'Monthly Savings': f"${int(round(total_savings/12)):,}",
-    'Compute Efficiency': f"{int(round(100 - (sum(optimized_compute_costs)/sum(compute_costs)*100)))}% improvement",
-    'Primary Optimization': 'Gen 2 Warehouses' if use_gen2 else 'Auto-pause & Right-sizing'
-}
-
-summary_df = pd.DataFrame(list(summary_metrics.items()), columns=['Metric', 'Value'])
-
-st.dataframe(
-    summary_df,
-    use_container_width=True,
-    hide_index=True,
-    column_config={
-        "Metric": st.column_config.TextColumn("Key Metrics", width="medium"),
-        "Value": st.column_config.TextColumn("Values", width="medium")
-    }
-)
-
-# Action Items
-if savings_pct > 0:
-    st.success(f"🎯 **Recommendation**: Implement the optimization strategy to achieve ${total_savings:,.0f} in annual savings ({savings_pct:.1f}%)")
-    
-    if use_gen2:
-        st.info("💡 **Pro Tip**: Gen 2 warehouses provide the highest ROI with automatic scaling and 30% efficiency gains")
-    
-    if pause_hours_per_day > 0:
-        st.info(f"⏱️ **Quick Win**: Auto-pause configuration can be implemented immediately for {pause_hours_per_day}h daily savings")
-
 # Footer
 st.markdown("---")
 st.markdown("""
@@ -846,3 +1508,15 @@ st.markdown("""
     <p>Made by <strong>Boolean Data Systems<sup>©</sup></strong> | All Rights Reserved. </p>
 </div>
 """, unsafe_allow_html=True)
+
+# The panel itself is not part of the trace
+if trace is not None:
+    trace.finish()
+    if trace_file() is not None:
+        trace_file().write(trace.to_record(
+            session=st.session_state.setdefault("_trace_session", uuid.uuid4().hex[:8]),
+            rebuilt=section_runner.rebuilt,
+            recomputed=estimate_graph.recomputed,
+        ))
+    if profile_panel:
+        show_profile_panel(trace, section_runner, estimate_graph)
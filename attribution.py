@@ -0,0 +1,222 @@
+"""
+Compute cost attribution from query history.
+
+The donut shows compute as one slice. `attribute_costs` breaks it down by
+user, role and query tag: the credits a warehouse was metered for in an
+hour go to the queries that ran on it during that hour, in proportion to
+the seconds each ran inside the hour. Idle time between queries is billed
+too, so it is shared by the same queries and every credit of an hour with
+queries is attributed. Hours with credits but no queries stay idle.
+
+Attribution makes two chunked passes over a QUERY_HISTORY export, cutting
+each query at hour boundaries. `read_query_usage` sums the query-seconds of
+each warehouse-hour; it does not depend on the metering data, so the page
+caches it per export and prices it against any metering history.
+`attribute_costs` turns each metered warehouse-hour into credits per
+query-second and reads the export again, adding every piece of query time
+at its hour's rate straight into per-consumer totals. Memory holds the
+warehouse-hours and one total per distinct user, role and tag; nothing is
+kept per query or per (hour, consumer) pair:
+
+    usage = read_query_usage("query_history.parquet")
+    credits = read_hourly_credits("metering_history.csv")
+    attribution = attribute_costs(usage, credits, "query_history.parquet")
+    attribution.top("user", 10)   # top 10 users, the rest and idle time: credits and share
+
+Both exports are placed in UTC hours by their timestamps' offsets (exports
+without offsets must come from sessions in the same time zone).
+"""
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+import metering
+from auto_suspend import DEFAULT_CHUNK_ROWS, MS_PER_HOUR, parse_timestamps, read_query_history_chunks
+
+DIMENSIONS = {"user": "USER_NAME", "role": "ROLE_NAME", "query_tag": "QUERY_TAG"}  # dimension -> export column
+DIMENSION_LABELS = {"user": "User", "role": "Role", "query_tag": "Query tag"}
+UNSET = "(none)"                # consumer of queries without a value, such as untagged ones
+WAREHOUSE_SHIFT = 32            # slot = warehouse code << WAREHOUSE_SHIFT | UTC epoch hour
+
+
+@dataclass(frozen=True, eq=False)
+class QueryUsage:
+    """Query time of an export per warehouse-hour, independent of credits."""
+    warehouses: Tuple[str, ...]
+    slots: np.ndarray         # sorted int64 warehouse-hours with query time
+    slot_seconds: np.ndarray  # query-seconds in each
+    queries: int
+
+
+@dataclass(frozen=True, eq=False)
+class HourlyCredits:
+    """Compute credits per warehouse per UTC hour of a metering export."""
+    warehouses: Tuple[str, ...]
+    warehouse: np.ndarray  # code per row
+    hour: np.ndarray       # int64 UTC epoch hour
+    credits: np.ndarray
+
+
+@dataclass(frozen=True, eq=False)
+class CostAttribution:
+    """Metered credits per consumer of each dimension."""
+    names: Dict[str, Tuple[str, ...]]
+    credits: Dict[str, np.ndarray]  # dimension -> credits per consumer
+    metered_credits: float
+    idle_credits: float             # metered in warehouse-hours without queries
+    covered_share: float            # share of query time inside metered warehouse-hours
+
+    @property
+    def attributed_share(self):
+        return 1 - self.idle_credits / self.metered_credits if self.metered_credits else 0.0
+
+    def top(self, dimension, n=10):
+        """The `n` consumers with the most credits, then the rest and idle time; shares of the metered credits"""
+        names, credits = self.names[dimension], self.credits[dimension]
+        n = min(n, len(credits))
+        top = np.argpartition(-credits, n - 1)[:n] if n else np.array([], dtype=np.int64)
+        top = top[np.lexsort((top, -credits[top]))]
+        labels = [names[i] for i in top]
+        values = credits[top].tolist()
+        if len(credits) > n:
+            labels.append(f"Other ({len(credits) - n:,})")
+            values.append(float(credits.sum() - credits[top].sum()))
+        labels.append("Idle (no queries)")
+        values.append(self.idle_credits)
+        values = np.array(values)
+        share = values / self.metered_credits if self.metered_credits else np.zeros_like(values)
+        return pd.DataFrame({DIMENSION_LABELS[dimension]: labels, "Credits": values, "Share": share})
+
+
+def hour_pieces(start, end):
+    """(query index, UTC epoch hour, seconds) of each part of a query inside one hour"""
+    first = start // MS_PER_HOUR
+    spans = np.where(end > start, (end - 1) // MS_PER_HOUR - first + 1, 0)
+    query = np.repeat(np.arange(len(start)), spans)
+    hour = first[query] + np.arange(len(query)) - np.repeat(np.cumsum(spans) - spans, spans)
+    seconds = (np.minimum(end[query], (hour + 1) * MS_PER_HOUR) - np.maximum(start[query], hour * MS_PER_HOUR)) / 1000
+    return query, hour, seconds
+
+
+def _reduce(keys, seconds):
+    """
+    (key, seconds) summed per distinct key, in no particular order.
+    Hashing keeps this linear, where sorting the keys was half of a pass.
+    """
+    codes, uniques = pd.factorize(keys)
+    return uniques, np.bincount(codes, weights=seconds, minlength=len(uniques))
+
+
+def _codes(values, codes):
+    """Global codes of `values`, adding new names to `codes`; missing values are UNSET"""
+    local, uniques = pd.factorize(values)
+    lookup = [codes.setdefault(str(name), len(codes)) for name in uniques]
+    if (local < 0).any():
+        lookup.append(codes.setdefault(UNSET, len(codes)))  # where local is -1
+    return np.array(lookup, dtype=np.int32)[local]
+
+
+def _pieces(chunk, warehouse_codes):
+    """(query index, warehouse-hour slot, seconds) of each hour piece of a chunk's queries"""
+    warehouse = _codes(chunk["WAREHOUSE_NAME"], warehouse_codes).astype(np.int64)
+    query, hour, seconds = hour_pieces(parse_timestamps(chunk["START_TIME"]), parse_timestamps(chunk["END_TIME"]))
+    return query, warehouse[query] << WAREHOUSE_SHIFT | hour, seconds
+
+
+def read_query_usage(source, name=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Query-seconds per warehouse-hour of a QUERY_HISTORY export (as read by
+    `auto_suspend.read_query_trace`), in one chunked pass.
+    """
+    warehouse_codes = {}
+    slots, slot_seconds = np.zeros(0, dtype=np.int64), np.zeros(0)
+    queries = 0
+    for chunk in read_query_history_chunks(source, name, chunk_rows):
+        _, slot, seconds = _pieces(chunk, warehouse_codes)
+        slots, slot_seconds = _reduce(np.concatenate([slots, slot]), np.concatenate([slot_seconds, seconds]))
+        queries += len(chunk)
+
+    if not queries:
+        raise ValueError("Query history export has no queries with a warehouse")
+    order = np.argsort(slots)
+    return QueryUsage(
+        warehouses=tuple(warehouse_codes),
+        slots=slots[order],
+        slot_seconds=slot_seconds[order],
+        queries=queries,
+    )
+
+
+def read_hourly_credits(source, name=None, chunk_rows=metering.DEFAULT_CHUNK_ROWS):
+    """
+    Compute credits per warehouse per UTC hour of a WAREHOUSE_METERING_HISTORY
+    CSV (path or file-like, optionally gzipped), `chunk_rows` rows at a time,
+    through the calibration's reader (`metering.read_metering_chunks`), so rows
+    without a start time or warehouse are dropped the same way.
+    """
+    warehouse_codes = {}
+    parts = []
+    for chunk, _ in metering.read_metering_chunks(source, name, chunk_rows):
+        for warehouse in chunk["WAREHOUSE_NAME"].unique():
+            warehouse_codes.setdefault(warehouse, len(warehouse_codes))
+        warehouse = chunk["WAREHOUSE_NAME"].map(warehouse_codes).to_numpy(dtype=np.int64)
+        hour = parse_timestamps(chunk["START_TIME"]) // MS_PER_HOUR
+        credit_column = "CREDITS_USED_COMPUTE" if "CREDITS_USED_COMPUTE" in chunk else "CREDITS_USED"
+        parts.append((warehouse << WAREHOUSE_SHIFT | hour, chunk[credit_column].fillna(0).to_numpy(dtype=float)))
+
+    if not parts or not sum(len(slot) for slot, _ in parts):
+        raise ValueError("Metering history export has no rows with a start time and warehouse")
+    slot, credits = (np.concatenate(column) for column in zip(*parts))
+    slots, inverse = np.unique(slot, return_inverse=True)
+    return HourlyCredits(
+        warehouses=tuple(str(warehouse) for warehouse in warehouse_codes),
+        warehouse=slots >> WAREHOUSE_SHIFT,
+        hour=slots & ((1 << WAREHOUSE_SHIFT) - 1),
+        credits=np.bincount(inverse, weights=credits),
+    )
+
+
+def attribute_costs(usage, hourly_credits, source, name=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Split each warehouse-hour's metered credits over its queries by
+    query-seconds, in a second chunked pass over the export `usage` was read
+    from (`source`, `name`). Dimension columns the export lacks leave every
+    query UNSET.
+    """
+    codes = {warehouse: code for code, warehouse in enumerate(usage.warehouses)}
+    warehouse = np.array([codes.get(warehouse, -1) for warehouse in hourly_credits.warehouses], dtype=np.int64)
+    warehouse = warehouse[hourly_credits.warehouse]
+    slot = warehouse << WAREHOUSE_SHIFT | hourly_credits.hour
+    index = np.minimum(np.searchsorted(usage.slots, slot), max(len(usage.slots) - 1, 0))
+    matched = (warehouse >= 0) & (usage.slots[index] == slot) if len(usage.slots) else np.zeros(len(slot), dtype=bool)
+
+    # Credits per query-second of each warehouse-hour; zero where nothing was metered
+    rate = np.zeros(len(usage.slots))
+    rate[index[matched]] = hourly_credits.credits[matched] / usage.slot_seconds[index[matched]]
+
+    consumer_codes = {dimension: {} for dimension in DIMENSIONS}
+    credits = {dimension: np.zeros(0) for dimension in DIMENSIONS}
+    for chunk in read_query_history_chunks(source, name, chunk_rows, optional=tuple(DIMENSIONS.values())):
+        query, piece_slot, seconds = _pieces(chunk, codes)
+        position = np.minimum(np.searchsorted(usage.slots, piece_slot), max(len(usage.slots) - 1, 0))
+        if len(piece_slot) and (usage.slots[position] != piece_slot).any():
+            raise ValueError("Query history export changed since its usage was read")
+        piece_credits = seconds * rate[position]
+        for dimension, column in DIMENSIONS.items():
+            values = chunk[column] if column in chunk else pd.Series(None, index=chunk.index, dtype=object)
+            consumer = _codes(values, consumer_codes[dimension])[query]
+            totals = np.bincount(consumer, weights=piece_credits, minlength=len(consumer_codes[dimension]))
+            totals[:len(credits[dimension])] += credits[dimension]
+            credits[dimension] = totals
+
+    metered = float(hourly_credits.credits.sum())
+    query_seconds = usage.slot_seconds.sum()
+    return CostAttribution(
+        names={dimension: tuple(names) for dimension, names in consumer_codes.items()},
+        credits=credits,
+        metered_credits=metered,
+        idle_credits=metered - float(hourly_credits.credits[matched].sum()),
+        covered_share=float(usage.slot_seconds[index[matched]].sum() / query_seconds) if query_seconds else 0.0,
+    )
@@ -0,0 +1,222 @@
+"""
+Headless batch estimator.
+
+Prices every row of a CSV or Parquet file of configurations without
+Streamlit. Input columns are `CostInputs` field names (num_vws, vw_size,
+hours_per_day, ..., additional_discount) or the short `template_defaults`
+keys (vws, size, hours, days, storage, transfer, credit); missing fields
+take the page defaults and any other columns (e.g. business_unit) are
+passed through. `region`, `edition` and `transfer_destination` columns are
+priced from the rate card (`rate_card.py`); an explicit credit column wins
+over the edition's list price. The file is streamed in chunks, chunks are
+priced on a process pool with a bounded number in flight, and results are
+written in input order, so memory stays flat regardless of input size.
+
+    python batch_estimate.py configs.csv results.csv
+    python batch_estimate.py configs.parquet results.parquet --workers 8 --chunk-size 100000
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from cost_engine import MONTHS_PER_YEAR, TEMPLATE_ALIASES
+from rate_card import load_rate_card
+from scenario_sweep import SCENARIO_FIELDS, evaluate_monthly
+
+MONTH_COLUMNS = [f"m{month + 1:02d}" for month in range(MONTHS_PER_YEAR)]
+DEFAULT_CHUNK_SIZE = 50_000
+
+
+# === READING & WRITING ===
+
+def is_parquet(path):
+    return Path(path).suffix.lower() in (".parquet", ".pq")
+
+
+def read_chunks(path, chunk_size):
+    """Yield DataFrames of at most `chunk_size` rows from a CSV or Parquet file."""
+    if is_parquet(path):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+def encode_chunk(frame, parquet):
+    """Serialize a result chunk in the worker: an Arrow table for Parquet, header-less CSV text otherwise."""
+    if parquet:
+        import pyarrow as pa
+        return len(frame), list(frame.columns), pa.Table.from_pandas(frame, preserve_index=False)
+    return len(frame), list(frame.columns), frame.to_csv(header=False, index=False)
+
+
+def widen_schema(schema, other):
+    """
+    Schema holding the columns of both Arrow schemas: all-null columns take
+    the other type, integers widen to floats, and columns whose types still
+    disagree (numbers in one chunk, text in another) become strings.
+    """
+    import pyarrow as pa
+
+    fields = []
+    for field in schema:
+        try:
+            merged = pa.unify_schemas([pa.schema([field]), pa.schema([other.field(field.name)])], promote_options="permissive")
+            fields.append(merged.field(0))
+        except (pa.ArrowTypeError, pa.ArrowInvalid):
+            fields.append(pa.field(field.name, pa.string()))
+    return pa.schema(fields)
+
+
+class ResultWriter:
+    """
+    Appends encoded result chunks to a CSV or Parquet file.
+
+    Each chunk's Parquet schema is inferred from its own rows, so a column
+    can change type between chunks (e.g. a pass-through column that is
+    empty in the first chunk). Chunks are cast to the file's schema; when
+    that schema has to widen, the row groups written so far are rewritten
+    with the wider one, one at a time.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.parquet = is_parquet(path)
+        self._writer = None
+        self._file = None
+        self.rows = 0
+
+    def write(self, encoded):
+        rows, columns, payload = encoded
+        if self.parquet:
+            import pyarrow.parquet as pq
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, payload.schema)
+            elif not payload.schema.equals(self._writer.schema, check_metadata=False):
+                schema = widen_schema(self._writer.schema, payload.schema)
+                if not schema.equals(self._writer.schema, check_metadata=False):
+                    self._rewrite(schema)
+                payload = payload.cast(self._writer.schema)
+            self._writer.write_table(payload)
+        else:
+            if self._file is None:
+                self._file = open(self.path, "w", newline="")
+                self._file.write(",".join(columns) + "\n")
+            self._file.write(payload)
+        self.rows += rows
+
+    def _rewrite(self, schema):
+        """Reopen the Parquet file with `schema`, casting the row groups already written"""
+        import pyarrow.parquet as pq
+
+        self._writer.close()
+        written = f"{self.path}.partial"
+        os.replace(self.path, written)
+        self._writer = pq.ParquetWriter(self.path, schema)
+        source = pq.ParquetFile(written)
+        for group in range(source.num_row_groups):
+            self._writer.write_table(source.read_row_group(group).cast(schema))
+        source.close()
+        os.remove(written)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# === PRICING ===
+
+def _as_bool(column):
+    if column.dtype == object:
+        return column.astype(str).str.strip().str.lower().isin(["true", "1", "yes", "y"])
+    return column.astype(bool)
+
+
+def price_chunk(frame):
+    """Monthly and annual current/optimized costs for every row of `frame`."""
+    frame = frame.rename(columns=TEMPLATE_ALIASES)
+    scenario = {field: frame[field].to_numpy() for field in SCENARIO_FIELDS if field in frame}
+    if "use_gen2" in frame:
+        scenario["use_gen2"] = _as_bool(frame["use_gen2"]).to_numpy()
+    if not scenario:
+        raise ValueError("Input has none of the configuration columns")
+    pricing = {column: frame[column] for column in ("region", "edition", "transfer_destination") if column in frame}
+    if pricing:
+        for field, column in load_rate_card().price_columns(**pricing).items():
+            scenario.setdefault(field, column)
+    scenario.setdefault("num_vws", np.ones(len(frame), dtype=np.int64))
+
+    monthly = evaluate_monthly(**scenario)
+    total_costs = monthly.total_costs
+    total_optimized_costs = monthly.total_optimized_costs
+    annual_cost = total_costs.sum(axis=1)
+    optimized_annual_cost = total_optimized_costs.sum(axis=1)
+
+    results = pd.DataFrame(
+        np.hstack([total_costs, total_optimized_costs]),
+        columns=[f"cost_{m}" for m in MONTH_COLUMNS] + [f"optimized_{m}" for m in MONTH_COLUMNS],
+        index=frame.index,
+    )
+    results["annual_cost"] = annual_cost
+    results["optimized_annual_cost"] = optimized_annual_cost
+    results["savings"] = annual_cost - optimized_annual_cost
+    with np.errstate(divide="ignore", invalid="ignore"):
+        results["savings_pct"] = np.where(annual_cost > 0, results["savings"] / annual_cost * 100, 0.0)
+    return pd.concat([frame, results], axis=1)
+
+
+def price_and_encode(frame, parquet):
+    """Worker entry point: price a chunk and serialize it for the writer."""
+    return encode_chunk(price_chunk(frame), parquet)
+
+
+def run_batch(input_path, output_path, chunk_size=DEFAULT_CHUNK_SIZE, workers=None):
+    """Stream `input_path` through the pricing pool into `output_path`; returns the row count."""
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers * 2  # bounds memory to a few chunks per worker
+
+    with ResultWriter(output_path) as writer:
+        if workers == 1:
+            for chunk in read_chunks(input_path, chunk_size):
+                writer.write(price_and_encode(chunk, writer.parquet))
+            return writer.rows
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = []
+            for chunk in read_chunks(input_path, chunk_size):
+                pending.append(pool.submit(price_and_encode, chunk, writer.parquet))
+                if len(pending) >= max_in_flight:
+                    writer.write(pending.pop(0).result())
+            for future in pending:
+                writer.write(future.result())
+        return writer.rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="CSV or Parquet file of configurations")
+    parser.add_argument("output", help="CSV or Parquet file to write (format follows the extension)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows per chunk")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    args = parser.parse_args(argv)
+
+    rows = run_batch(args.input, args.output, args.chunk_size, args.workers)
+    print(f"Priced {rows:,} configurations -> {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Auto-suspend replay throughput.
+
+Generates a synthetic query history (bursty arrivals during business hours,
+log-normal runtimes, many warehouses), writes it as Parquet or CSV, then
+times reading and merging it into busy intervals and replaying the intervals
+under the default auto-suspend timeouts. One warehouse is replayed again by
+a per-query event loop and the billed seconds must match:
+
+    python benchmarks/auto_suspend_replay.py                          # 20M queries, Parquet
+    python benchmarks/auto_suspend_replay.py --queries 2000000 --csv  # exported-CSV timestamps
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from auto_suspend import DEFAULT_TIMEOUTS, MIN_BILLED_SECONDS, merge_intervals, read_query_trace  # noqa: E402
+
+MB = 1024 * 1024
+DAY_MS = 86_400_000
+
+
+def synthetic_history(queries, warehouses, days, seed=0):
+    """(warehouse codes, start ms, end ms): bursts of queries inside 08:00-20:00, runtimes ~ log-normal around 4 s"""
+    rng = np.random.default_rng(seed)
+    bursts = max(queries // 20, 1)
+    burst_warehouse = rng.integers(0, warehouses, bursts)
+    burst_start = rng.integers(0, days, bursts) * DAY_MS + rng.integers(8 * 3_600_000, 20 * 3_600_000, bursts)
+    burst = rng.integers(0, bursts, queries)
+    start = burst_start[burst] + rng.exponential(90_000, queries).astype(np.int64)
+    end = start + rng.lognormal(np.log(4_000), 1.2, queries).astype(np.int64)
+    epoch = pd.Timestamp("2024-01-01").value // 1_000_000
+    return burst_warehouse[burst], start + epoch, end + epoch
+
+
+def write_history(path, warehouse, start, end, csv):
+    frame = pd.DataFrame({
+        "WAREHOUSE_NAME": pd.Categorical.from_codes(warehouse, [f"WH_{i:03d}" for i in range(warehouse.max() + 1)]),
+        "START_TIME": pd.to_datetime(start, unit="ms").tz_localize("UTC"),
+        "END_TIME": pd.to_datetime(end, unit="ms").tz_localize("UTC"),
+    })
+    if csv:
+        for column in ("START_TIME", "END_TIME"):
+            # Snowflake's default export layout, session time zone -0800
+            local = frame[column].dt.tz_convert("Etc/GMT+8")
+            frame[column] = local.dt.strftime("%Y-%m-%d %H:%M:%S.%f").str.slice(0, 23) + " -0800"
+        frame.to_csv(path, index=False)
+    else:
+        frame.to_parquet(path, row_group_size=1_000_000)
+
+
+def event_loop_billed(start, end, timeout_ms, minimum_ms=MIN_BILLED_SECONDS * 1000):
+    """Billed seconds of one warehouse, one query at a time"""
+    order = np.argsort(start, kind="stable")
+    billed = 0
+    run_start = reach = None
+    for s, e in zip(start[order].tolist(), np.maximum(end, start)[order].tolist()):
+        if run_start is None or s > reach + timeout_ms:
+            if run_start is not None:
+                billed += max(reach + timeout_ms - run_start, minimum_ms)
+            run_start, reach = s, e
+        else:
+            reach = max(reach, e)
+    billed += max(reach + timeout_ms - run_start, minimum_ms)
+    return billed / 1000
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=20_000_000)
+    parser.add_argument("--warehouses", type=int, default=200)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--csv", action="store_true", help="Write and read a CSV export instead of Parquet")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable JSON")
+    args = parser.parse_args()
+
+    warehouse, start, end = synthetic_history(args.queries, args.warehouses, args.days)
+    directory = Path(tempfile.mkdtemp(prefix="query-history-"))
+    try:
+        path = directory / ("history.csv" if args.csv else "history.parquet")
+        write_history(path, warehouse, start, end, args.csv)
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        read_s, trace = timed(lambda: read_query_trace(path))
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        file_mb = os.path.getsize(path) / MB
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    merge_s, _ = timed(lambda: merge_intervals(warehouse, start, end))
+    simulate_s, result = timed(lambda: trace.simulate(DEFAULT_TIMEOUTS))
+
+    # The warehouse with the most queries, replayed query by query at the default timeout
+    busiest = int(np.bincount(warehouse).argmax())
+    selected = warehouse == busiest
+    code = trace.warehouses.index(f"WH_{busiest:03d}")
+    column = DEFAULT_TIMEOUTS.index(600)
+    loop_s, expected = timed(lambda: event_loop_billed(start[selected], end[selected], 600_000))
+    assert abs(result.billed_seconds[code, column] - expected) < 1e-6, "replay differs from the event loop"
+
+    report = {
+        "queries": trace.queries,
+        "warehouses": len(trace.warehouses),
+        "busy_intervals": len(trace),
+        "format": "csv" if args.csv else "parquet",
+        "file_mb": file_mb,
+        "read_and_merge_s": read_s,
+        "merge_in_memory_s": merge_s,
+        "simulate_s": simulate_s,
+        "timeouts": len(DEFAULT_TIMEOUTS),
+        "peak_rss_growth_mb": rss_after - rss_before,
+        "event_loop_queries": int(selected.sum()),
+        "event_loop_s": loop_s,
+        "billed_hours": dict(zip(map(int, result.timeouts), result.billed_hours().sum(axis=0).round(1).tolist())),
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{report['queries']:,} queries on {report['warehouses']} warehouses -> {report['busy_intervals']:,} busy intervals")
+    print(f"  read + merge {report['format']} ({file_mb:,.0f} MB) : {read_s:7.2f} s, peak RSS +{report['peak_rss_growth_mb']:,.0f} MB")
+    print(f"  merge in memory              : {merge_s:7.2f} s")
+    print(f"  replay {len(DEFAULT_TIMEOUTS)} timeouts             : {simulate_s:7.2f} s")
+    print(f"  event loop, one warehouse    : {loop_s:7.2f} s for {report['event_loop_queries']:,} queries (same billed seconds)")
+    for timeout, hours in report["billed_hours"].items():
+        print(f"    auto-suspend {timeout:>5} s: {hours:>12,.1f} billed hours")
+
+
+if __name__ == "__main__":
+    main()
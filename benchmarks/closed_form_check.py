@@ -0,0 +1,148 @@
+"""
+Closed-form growth series: equivalence checks and timings.
+
+Draws random configurations across (and just beyond) the sidebar ranges,
+plus edge cases (zero and near-zero growth, one-month horizons, pause
+longer than the day, no storage), and compares `cost_engine.horizon_totals`
+and `scenario_sweep.evaluate_totals` with the page's original month-by-month
+loops, run for each horizon. Also checks that `estimate` still reproduces
+the 12-month loop bit for bit. Exits non-zero if any quantity differs by
+more than `--rtol`.
+
+    python benchmarks/closed_form_check.py
+    python benchmarks/closed_form_check.py --cases 20000 --seed 7 --json
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from cost_engine import CostInputs, estimate, horizon_totals, project  # noqa: E402
+from scenario_sweep import SCENARIO_FIELDS, evaluate_scenarios, evaluate_totals  # noqa: E402
+from tests.closed_form_reference import HORIZONS, loop_totals, random_inputs  # noqa: E402
+
+QUANTITIES = ["total_cost", "total_optimized_cost", "avg_storage_tb"]
+
+
+def relative_error(expected, actual):
+    return abs(actual - expected) / max(abs(expected), 1e-9)
+
+
+def check(cases, seed, rtol):
+    rng = np.random.default_rng(seed)
+    inputs_list = [random_inputs(rng) for _ in range(cases)]
+    worst = {quantity: 0.0 for quantity in QUANTITIES}
+    failures = []
+
+    # horizon_totals against the loops, every case at every horizon
+    for inputs in inputs_list:
+        for months in HORIZONS:
+            expected = loop_totals(inputs, months)
+            totals = horizon_totals(inputs, months)
+            for quantity in QUANTITIES:
+                error = relative_error(expected[quantity], getattr(totals, quantity))
+                worst[quantity] = max(worst[quantity], error)
+                if error > rtol:
+                    failures.append((quantity, months, inputs, error))
+
+    # The page's 12-month path stays bit for bit
+    estimate_exact = all(
+        estimate(inputs).total_annual_cost == loop_totals(inputs, 12)["total_cost"]
+        and estimate(inputs).total_optimized_annual == loop_totals(inputs, 12)["total_optimized_cost"]
+        for inputs in inputs_list[:1000]
+    )
+
+    # Vectorized closed form against the loops
+    columns = {field: [getattr(inputs, field) for inputs in inputs_list] for field in SCENARIO_FIELDS}
+    sweep_worst = 0.0
+    for months in HORIZONS:
+        results = evaluate_totals(months=months, **columns)
+        for i, inputs in enumerate(inputs_list[:500]):
+            expected = loop_totals(inputs, months)
+            sweep_worst = max(
+                sweep_worst,
+                relative_error(expected["total_cost"], results.annual_cost[i]),
+                relative_error(expected["total_optimized_cost"], results.optimized_annual_cost[i]),
+            )
+    if sweep_worst > rtol:
+        failures.append(("evaluate_totals", None, None, sweep_worst))
+
+    return {
+        "cases": cases,
+        "horizons": HORIZONS,
+        "rtol": rtol,
+        "worst_relative_error": worst,
+        "sweep_worst_relative_error": sweep_worst,
+        "estimate_bit_exact": estimate_exact,
+        "failures": len(failures) + (not estimate_exact),
+        "first_failures": [f"{q} months={m} error={e:.3g} {i}" for q, m, i, e in failures[:5]],
+    }
+
+
+def timings(scenarios=1_000_000, seed=0):
+    """Per-call cost of the O(1) totals vs summing a projection, and sweep throughput."""
+    inputs = CostInputs.from_template("Large Enterprise", use_gen2=True)
+    result = {}
+    for months in (12, 600):
+        start = time.perf_counter()
+        for _ in range(2000):
+            horizon_totals(inputs, months)
+        closed = (time.perf_counter() - start) / 2000
+        start = time.perf_counter()
+        for _ in range(2000):
+            project(inputs, 1.0, 1.0, months=months).total_costs.sum()
+        summed = (time.perf_counter() - start) / 2000
+        result[f"{months}_months_us"] = {"closed_form": closed * 1e6, "projection_sum": summed * 1e6}
+
+    rng = np.random.default_rng(seed)
+    scenario = dict(
+        num_vws=rng.integers(1, 21, scenarios),
+        vw_size=rng.integers(0, 5, scenarios),
+        hours_per_day=rng.integers(1, 25, scenarios),
+        compute_growth=rng.integers(0, 51, scenarios),
+        storage_growth=rng.integers(0, 31, scenarios),
+    )
+    for name, run in (("evaluate_scenarios (12 months)", lambda: evaluate_scenarios(**scenario)),
+                      ("evaluate_totals (12 months)", lambda: evaluate_totals(**scenario)),
+                      ("evaluate_totals (600 months)", lambda: evaluate_totals(months=600, **scenario))):
+        start = time.perf_counter()
+        run()
+        result[name] = scenarios / (time.perf_counter() - start)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rtol", type=float, default=1e-12)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable JSON")
+    args = parser.parse_args()
+
+    result = check(args.cases, args.seed, args.rtol)
+    result["timings"] = timings()
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"{result['cases']} cases x horizons {result['horizons']} (rtol {result['rtol']:g})")
+        for quantity, error in result["worst_relative_error"].items():
+            print(f"  horizon_totals {quantity:<22} worst {error:.2e}")
+        print(f"  evaluate_totals                       worst {result['sweep_worst_relative_error']:.2e}")
+        print(f"  estimate == 12-month loop (bit exact) : {result['estimate_bit_exact']}")
+        for name, value in result["timings"].items():
+            if isinstance(value, dict):
+                print(f"  {name:<32} closed form {value['closed_form']:7.1f} us   projection sum {value['projection_sum']:7.1f} us")
+            else:
+                print(f"  {name:<32} {value / 1e6:6.2f} M scenarios/s")
+        for failure in result["first_failures"]:
+            print(f"  FAIL {failure}")
+    sys.exit(1 if result["failures"] else 0)
+
+
+if __name__ == "__main__":
+    main()
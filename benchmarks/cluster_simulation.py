@@ -0,0 +1,108 @@
+"""
+Multi-cluster simulation throughput.
+
+Generates a day of queries on one warehouse (arrivals peaking at midday,
+log-normal runtimes), times `simulate_clusters` for each scaling policy
+and cluster limit, and prints credits against queueing. Two limiting
+cases are checked against independent models first: one cluster with
+unlimited concurrency bills what the auto-suspend replay bills, and one
+cluster of k slots queues queries as a k-server FIFO queue does:
+
+    python benchmarks/cluster_simulation.py                        # 1M queries, 1-10 clusters
+    python benchmarks/cluster_simulation.py --queries 200000 --size Large --json
+"""
+import argparse
+import heapq
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from auto_suspend import QueryTrace, merge_intervals  # noqa: E402
+from cost_engine import size_credit_mapping  # noqa: E402
+from multi_cluster import MAX_CLUSTERS, SCALING_POLICIES, ClusterPolicy, simulate_clusters  # noqa: E402
+
+DAY_SECONDS = 86_400
+
+
+def synthetic_day(queries, seed=0):
+    """(arrival seconds, service seconds): minute-level load following a midday peak, runtimes ~ log-normal around 2 s"""
+    rng = np.random.default_rng(seed)
+    load = 1 + np.sin(np.linspace(0, 2 * np.pi, 1440) - np.pi / 2)
+    minute = rng.choice(1440, queries, p=load / load.sum())
+    arrival = np.sort(minute * 60 + rng.random(queries) * 60)
+    return arrival, rng.lognormal(np.log(2), 1.0, queries)
+
+
+def fifo_waits(arrival, service, servers):
+    """Queue seconds of each query on `servers` slots served first come, first served"""
+    free = [0.0] * servers
+    waits = []
+    for a, s in zip(arrival.tolist(), service.tolist()):
+        begin = max(heapq.heappop(free), a)
+        waits.append(begin - a)
+        heapq.heappush(free, begin + s)
+    return np.array(waits)
+
+
+def check_limits(arrival, service, auto_suspend):
+    """The limiting cases, on the peak hour at midday"""
+    hour = (arrival >= DAY_SECONDS / 2) & (arrival < DAY_SECONDS / 2 + 3600)
+    arrival, service = arrival[hour], service[hour]
+
+    result = simulate_clusters(arrival, service, ClusterPolicy(max_concurrency=len(arrival), auto_suspend=auto_suspend))
+    ms = np.round(arrival * 1000).astype(np.int64)
+    warehouse, start, end = merge_intervals(np.zeros(len(ms), dtype=np.int64), ms, ms + np.round(service * 1000).astype(np.int64))
+    trace = QueryTrace(warehouses=("WH",), warehouse=warehouse, start=start, end=end, active_days=np.ones(1, dtype=np.int64), queries=len(ms))
+    expected = trace.simulate([auto_suspend]).billed_seconds[0, 0]
+    assert abs(result.cluster_seconds - expected) < 1e-3 * len(start), "unlimited concurrency differs from the auto-suspend replay"
+
+    for slots in (1, 4, 8):
+        result = simulate_clusters(arrival, service, ClusterPolicy(max_concurrency=slots, auto_suspend=auto_suspend))
+        assert np.allclose(result.queue_seconds, fifo_waits(arrival, service, slots), atol=1e-6), f"{slots} slots differ from FIFO"
+    return int(hour.sum())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=1_000_000, help="Queries in the day")
+    parser.add_argument("--size", choices=list(size_credit_mapping), default="Medium")
+    parser.add_argument("--max-clusters", type=int, nargs="+", default=list(range(1, MAX_CLUSTERS + 1)))
+    parser.add_argument("--auto-suspend", type=float, default=600)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable JSON")
+    args = parser.parse_args()
+
+    arrival, service = synthetic_day(args.queries)
+    checked = check_limits(arrival, service, args.auto_suspend)
+
+    runs = []
+    for scaling in SCALING_POLICIES:
+        for limit in args.max_clusters:
+            policy = ClusterPolicy(size=args.size, max_clusters=limit, scaling_policy=scaling, auto_suspend=args.auto_suspend)
+            start = time.perf_counter()
+            result = simulate_clusters(arrival, service, policy)
+            seconds = time.perf_counter() - start
+            p50, p90, p99 = result.queue_percentiles()
+            runs.append({
+                "scaling_policy": scaling, "max_clusters": limit, "s": seconds,
+                "queries_per_s": args.queries / seconds, "credits": result.credits,
+                "peak_clusters": result.peak_clusters, "cluster_starts": result.cluster_starts,
+                "queued_share": result.queued_share(), "p50_queue_s": p50, "p90_queue_s": p90, "p99_queue_s": p99,
+            })
+
+    if args.json:
+        print(json.dumps({"queries": args.queries, "size": args.size, "checked_queries": checked, "runs": runs}, indent=2))
+        return
+    print(f"{args.queries:,} queries over a day on {args.size} clusters; limiting cases match on the midday hour ({checked:,} queries)")
+    print(f"{'policy':<9} {'max':>3} {'time':>7} {'credits':>9} {'peak':>4} {'starts':>6} {'queued':>7} {'p50 s':>8} {'p90 s':>8} {'p99 s':>8}")
+    for run in runs:
+        print(f"{run['scaling_policy']:<9} {run['max_clusters']:>3} {run['s']:>6.2f}s {run['credits']:>9,.1f} {run['peak_clusters']:>4} "
+              f"{run['cluster_starts']:>6,} {run['queued_share']:>7.1%} {run['p50_queue_s']:>8,.1f} {run['p90_queue_s']:>8,.1f} {run['p99_queue_s']:>8,.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Cold-start and import-time benchmark for the Streamlit page.
+
+Each sample runs in a fresh interpreter, like a new container:
+
+- import times: wall time to import each module the page can load, on top
+  of an already imported Streamlit (the server always has it);
+- cold start: one AppTest run of the page, timed from before
+  `import streamlit` to the first headline metric, the first chart and the
+  finished page, plus which deferrable modules (pandas, charts.py,
+  plotly.express; Streamlit itself already loads plotly.graph_objects and
+  PIL) were loaded when the metrics were sent.
+
+AppTest imports pandas for its own element wrappers after the run, so the
+pandas check is only meaningful at the first-metrics mark.
+
+Medians over `--runs` samples; `--json` output is meant to be kept per
+release and compared.
+
+    python benchmarks/cold_start.py
+    python benchmarks/cold_start.py --runs 10 --json > cold_start.json
+    python benchmarks/cold_start.py --app /path/to/old/Cost_Estimator_Code.py
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+DEFAULT_APP = Path(__file__).resolve().parent.parent / "Cost_Estimator_Code.py"
+MODULES = [
+    "numpy",
+    "pandas",
+    "PIL.Image",
+    "plotly.graph_objects",
+    "plotly.express",
+    "cost_engine",
+    "monte_carlo",
+    "optimizer",
+    "sections",
+    "charts",
+]
+METRIC_MARKER = 'class="metric-card"'
+DEFERRABLE_MODULES = ("pandas", "charts", "plotly.express", "plotly.subplots")
+
+
+def _import_time(module, app_dir):
+    code = (
+        "import sys, time\n"
+        f"sys.path.insert(0, {str(app_dir)!r})\n"
+        "import streamlit\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "print(time.perf_counter() - start)\n"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def _child(app_path):
+    """Runs in the fresh interpreter: one cold AppTest run, timed from the first import."""
+    start = time.perf_counter()
+    from streamlit.runtime.forward_msg_queue import ForwardMsgQueue
+    from streamlit.testing.v1 import AppTest
+
+    marks = {}
+    enqueue = ForwardMsgQueue.enqueue
+
+    def recording_enqueue(queue, msg):
+        if msg.WhichOneof("type") == "delta":
+            element = msg.delta.new_element
+            kind = element.WhichOneof("type")
+            now = time.perf_counter() - start
+            if kind == "markdown" and METRIC_MARKER in element.markdown.body and "first_metrics_s" not in marks:
+                marks["first_metrics_s"] = now
+                marks["loaded_before_metrics"] = [m for m in DEFERRABLE_MODULES if m in sys.modules]
+            elif kind == "plotly_chart" and "first_chart_s" not in marks:
+                marks["first_chart_s"] = now
+        return enqueue(queue, msg)
+
+    ForwardMsgQueue.enqueue = recording_enqueue
+    os.chdir(Path(app_path).parent)  # the page loads its images by relative path
+    at = AppTest.from_file(str(app_path), default_timeout=120)
+    at.run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    marks["full_page_s"] = time.perf_counter() - start
+    print(json.dumps(marks))
+
+
+def _cold_start(app_path):
+    out = subprocess.run(
+        [sys.executable, __file__, "--child", str(app_path)],
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def measure_cold_start(app_path=DEFAULT_APP, runs=5):
+    """Median import times and cold-start milestones over `runs` fresh interpreters."""
+    app_path = Path(app_path).resolve()
+    imports = {
+        module: statistics.median(_import_time(module, app_path.parent) for _ in range(runs))
+        for module in MODULES
+    }
+    samples = [_cold_start(app_path) for _ in range(runs)]
+    return {
+        "app": str(app_path),
+        "runs": runs,
+        "python": sys.version.split()[0],
+        "import_s": imports,
+        "first_metrics_s": statistics.median(s["first_metrics_s"] for s in samples),
+        "first_chart_s": statistics.median(s["first_chart_s"] for s in samples),
+        "full_page_s": statistics.median(s["full_page_s"] for s in samples),
+        "loaded_before_metrics": sorted({m for s in samples for m in s["loaded_before_metrics"]}),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", default=DEFAULT_APP, help="Streamlit script to measure")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable JSON")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child)
+        return
+
+    result = measure_cold_start(args.app, args.runs)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"{result['app']}")
+        for module, seconds in result["import_s"].items():
+            print(f"  import {module:<22} {seconds * 1000:8.1f} ms")
+        print(f"  first metrics : {result['first_metrics_s'] * 1000:8.1f} ms")
+        print(f"  first chart   : {result['first_chart_s'] * 1000:8.1f} ms")
+        print(f"  full page     : {result['full_page_s'] * 1000:8.1f} ms")
+        print(f"  loaded before metrics: {', '.join(result['loaded_before_metrics']) or 'none of ' + ', '.join(DEFERRABLE_MODULES)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Query-cost attribution throughput and memory.
+
+Writes a synthetic QUERY_HISTORY export (users, roles and query tags with
+skewed popularity, bursty business-hours arrivals, log-normal runtimes)
+chunk by chunk, so exports of any size can be generated, plus an hourly
+metering export for the same warehouses. Then times the pass of
+`read_query_usage` over it, reading the metering export and the second pass
+of `attribute_costs`, and reports peak memory. A small export is first attributed query by query
+in plain Python and must give the same credits per user, role and tag:
+
+    python benchmarks/cost_attribution.py                          # 10M queries, Parquet
+    python benchmarks/cost_attribution.py --queries 50000000       # the 50M-row target
+    python benchmarks/cost_attribution.py --queries 2000000 --csv  # exported-CSV timestamps
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from attribution import DIMENSIONS, UNSET, attribute_costs, read_hourly_credits, read_query_usage  # noqa: E402
+
+MB = 1024 * 1024
+HOUR_MS = 3_600_000
+DAY_MS = 24 * HOUR_MS
+EPOCH_MS = pd.Timestamp("2024-01-01", tz="UTC").value // 1_000_000
+CHUNK_QUERIES = 1_000_000
+
+
+def synthetic_chunk(rng, queries, warehouses, days, users):
+    """One chunk of queries: dimension values (None where unset), warehouse codes, start and end ms"""
+    start = EPOCH_MS + rng.integers(0, days, queries) * DAY_MS + rng.integers(7 * HOUR_MS, 21 * HOUR_MS, queries)
+    end = start + rng.lognormal(np.log(4_000), 1.5, queries).astype(np.int64)
+    user = np.minimum(rng.zipf(1.3, queries), users) - 1
+    tags = np.array([f"dbt_model_{i % 997}" if i % 3 else None for i in range(5000)], dtype=object)
+    return {
+        "WAREHOUSE_NAME": np.array([f"WH_{i:03d}" for i in range(warehouses)])[user % warehouses],
+        "USER_NAME": np.array([f"USER_{i:05d}" for i in range(users)])[user],
+        "ROLE_NAME": np.array([f"ROLE_{i:02d}" for i in range(40)])[user % 40],
+        "QUERY_TAG": tags[rng.integers(0, len(tags), queries)],
+    }, start, end
+
+
+def timestamp_text(ms):
+    """Snowflake's default CSV layout in a -0800 session"""
+    local = pd.to_datetime(ms - 8 * HOUR_MS, unit="ms")
+    return local.strftime("%Y-%m-%d %H:%M:%S.%f").str.slice(0, 23) + " -0800"
+
+
+def write_query_history(path, queries, warehouses, days, users, csv, seed=0):
+    """Writes the export in chunks; returns its (warehouse, hour) query seconds for the metering export"""
+    rng = np.random.default_rng(seed)
+    writer = None
+    busy = {}
+    for offset in range(0, queries, CHUNK_QUERIES):
+        columns, start, end = synthetic_chunk(rng, min(CHUNK_QUERIES, queries - offset), warehouses, days, users)
+        hours = pd.Series(end - start).groupby([columns["WAREHOUSE_NAME"], start // HOUR_MS]).sum()
+        for key, value in hours.items():
+            busy[key] = busy.get(key, 0) + value
+        frame = pd.DataFrame(columns)
+        if csv:
+            frame["START_TIME"], frame["END_TIME"] = timestamp_text(start), timestamp_text(end)
+            frame.to_csv(path, mode="a", header=offset == 0, index=False)
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            frame["START_TIME"] = pd.to_datetime(start, unit="ms", utc=True)
+            frame["END_TIME"] = pd.to_datetime(end, unit="ms", utc=True)
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            writer = writer or pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+    if writer is not None:
+        writer.close()
+    return busy
+
+
+def write_metering(path, busy, warehouses, days, seed=0):
+    """Every warehouse-hour of the period: credits that rise with query time, plus idle hours with a little usage"""
+    rng = np.random.default_rng(seed)
+    names = [f"WH_{i:03d}" for i in range(warehouses)]
+    hours = EPOCH_MS // HOUR_MS + np.arange(days * 24)
+    frame = pd.DataFrame({"WAREHOUSE_NAME": np.repeat(names, len(hours)), "HOUR": np.tile(hours, warehouses)})
+    seconds = np.array([busy.get((name, hour), 0) for name, hour in zip(frame.WAREHOUSE_NAME, frame.HOUR)]) / 1000
+    idle = rng.random(len(frame)) < 0.05
+    frame["CREDITS_USED_COMPUTE"] = np.where(seconds > 0, np.minimum(seconds / 3600, 4) + 0.1, np.where(idle, 0.2, 0.0))
+    frame["CREDITS_USED_CLOUD_SERVICES"] = 0.0
+    frame["CREDITS_USED"] = frame["CREDITS_USED_COMPUTE"]
+    frame["START_TIME"] = timestamp_text(frame.pop("HOUR").to_numpy() * HOUR_MS)
+    frame.to_csv(path, index=False)
+
+
+def reference_credits(query_path, metering_path):
+    """Credits per consumer, query by query and hour by hour"""
+    queries = pd.read_csv(query_path)
+    meter = pd.read_csv(metering_path)
+    def to_ms(text):
+        utc = pd.to_datetime(text, format="%Y-%m-%d %H:%M:%S.%f %z").dt.tz_convert(None)
+        return utc.to_numpy().astype("datetime64[ms]").astype(np.int64)
+
+    credits = dict(zip(zip(meter.WAREHOUSE_NAME, to_ms(meter.START_TIME) // HOUR_MS), meter.CREDITS_USED_COMPUTE))
+    pieces = []
+    for row, start, end in zip(queries.itertuples(), to_ms(queries.START_TIME).tolist(), to_ms(queries.END_TIME).tolist()):
+        hour = start // HOUR_MS
+        while hour * HOUR_MS < end:
+            seconds = (min(end, (hour + 1) * HOUR_MS) - max(start, hour * HOUR_MS)) / 1000
+            pieces.append((row, (row.WAREHOUSE_NAME, hour), seconds))
+            hour += 1
+    hour_seconds = {}
+    for _, key, seconds in pieces:
+        hour_seconds[key] = hour_seconds.get(key, 0) + seconds
+    expected = {dimension: {} for dimension in DIMENSIONS}
+    for row, key, seconds in pieces:
+        share = credits.get(key, 0) * seconds / hour_seconds[key]
+        for dimension, column in DIMENSIONS.items():
+            value = getattr(row, column)
+            consumer = UNSET if pd.isna(value) else value
+            expected[dimension][consumer] = expected[dimension].get(consumer, 0) + share
+    return expected
+
+
+def check_small(directory):
+    query_path, metering_path = directory / "check.csv", directory / "check_metering.csv"
+    busy = write_query_history(query_path, 20_000, 5, 3, 50, csv=True, seed=1)
+    write_metering(metering_path, busy, 5, 3, seed=1)
+    usage = read_query_usage(query_path, chunk_rows=3_000)
+    attribution = attribute_costs(usage, read_hourly_credits(metering_path), query_path, chunk_rows=3_000)
+    for dimension, expected in reference_credits(query_path, metering_path).items():
+        got = dict(zip(attribution.names[dimension], attribution.credits[dimension]))
+        for consumer in set(got) | set(expected):
+            assert abs(got.get(consumer, 0) - expected.get(consumer, 0)) < 1e-6, f"{dimension} {consumer} differs"
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=10_000_000)
+    parser.add_argument("--warehouses", type=int, default=50)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--users", type=int, default=20_000)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--csv", action="store_true", help="Write and read a CSV export instead of Parquet")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable JSON")
+    args = parser.parse_args()
+
+    directory = Path(tempfile.mkdtemp(prefix="attribution-"))
+    try:
+        check_small(directory)
+        query_path = directory / ("history.csv" if args.csv else "history.parquet")
+        metering_path = directory / "metering.csv"
+        write_s, busy = timed(lambda: write_query_history(query_path, args.queries, args.warehouses, args.days, args.users, args.csv))
+        write_metering(metering_path, busy, args.warehouses, args.days)
+        del busy
+
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        usage_s, usage = timed(lambda: read_query_usage(query_path))
+        metering_s, credits = timed(lambda: read_hourly_credits(metering_path))
+        attribute_s, attribution = timed(lambda: attribute_costs(usage, credits, query_path))
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        top_s, tops = timed(lambda: {dimension: attribution.top(dimension, args.top) for dimension in DIMENSIONS})
+        file_mb = os.path.getsize(query_path) / MB
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    for dimension, table in tops.items():
+        assert abs(table["Credits"].sum() - attribution.metered_credits) < 1e-6 * attribution.metered_credits
+    report = {
+        "queries": usage.queries,
+        "format": "csv" if args.csv else "parquet",
+        "file_mb": file_mb,
+        "write_s": write_s,
+        "read_usage_s": usage_s,
+        "queries_per_s": usage.queries / usage_s,
+        "peak_rss_growth_mb": rss_after - rss_before,
+        "warehouse_hours": len(usage.slots),
+        "consumers": {dimension: len(names) for dimension, names in attribution.names.items()},
+        "read_metering_s": metering_s,
+        "attribute_s": attribute_s,
+        "top_s": top_s,
+        "attributed_share": attribution.attributed_share,
+        "top": {dimension: table.head(3).to_dict("records") for dimension, table in tops.items()},
+    }
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{usage.queries:,} queries ({report['format']}, {file_mb:,.0f} MB); a 20,000-query export matches the per-query reference")
+    print(f"  read_query_usage pass        : {usage_s:7.2f} s ({report['queries_per_s'] / 1e6:.2f}M queries/s)")
+    print(f"  attribute_costs pass         : {attribute_s:7.2f} s; read metering {metering_s:.2f} s, top-{args.top} {top_s * 1e3:.0f} ms")
+    print(f"  held                         : {len(usage.slots):,} warehouse-hours; " + ", ".join(f"{count:,} {dimension}s" for dimension, count in report["consumers"].items()) + f"; peak RSS +{report['peak_rss_growth_mb']:,.0f} MB")
+    print(f"  {attribution.attributed_share:.1%} of {attribution.metered_credits:,.0f} credits attributed to queries")
+    for dimension, table in tops.items():
+        print(f"  top {dimension}: " + ", ".join(f"{row[0]} {row[2]:.1%}" for row in table.head(3).itertuples(index=False)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Figure build time and spec size per chart.
+
+Builds each chart of the page for the default 12-month view and for longer
+or finer projections, and reports the size of the JSON spec Streamlit sends
+for it, the time to build the figure from new values (the figure caches
+miss whenever an input changes) and the time `st.plotly_chart` spends
+turning it into that spec:
+
+    python benchmarks/figure_payload.py
+    python benchmarks/figure_payload.py --horizons 1:Monthly 5:Daily --json
+"""
+import argparse
+import calendar
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import plotly.io as pio  # noqa: E402
+import streamlit.elements.plotly_chart  # noqa: E402,F401  registers the "streamlit" Plotly template the page uses
+
+import charts  # noqa: E402
+from cost_engine import CostInputs, estimate  # noqa: E402
+from downsample import lttb_indices  # noqa: E402
+from projection import project_horizon  # noqa: E402
+
+WATERMARK = "app/static/b.jpg"
+DEFAULT_HORIZONS = ("1:Monthly", "3:Monthly", "5:Monthly", "1:Daily", "5:Daily", "2:Hourly")
+
+
+def timed(function, repeats):
+    """(best seconds, last result) over `repeats` calls"""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def figure_builders(years, granularity, discount):
+    """(points per series, {chart: builder}) for one horizon, as the page builds them"""
+    inputs = CostInputs.from_template("Large Enterprise", additional_discount=discount)
+    if (years, granularity) == (1, "Monthly"):
+        months = tuple(calendar.month_abbr[1:13])
+        result = estimate(inputs)
+        return len(months), {
+            "donut": lambda: charts.donut_chart(
+                result.compute_costs.sum(), result.storage_costs.sum(), result.transfer_costs.sum(),
+                result.total_annual_cost, WATERMARK,
+            ),
+            "trend": lambda: charts.trend_chart(
+                months, result.compute_costs, result.storage_costs, result.transfer_costs, result.total_costs, WATERMARK,
+            ),
+            "comparison": lambda: charts.comparison_chart(result.total_annual_cost, result.total_optimized_annual, WATERMARK),
+            "savings_trend": lambda: charts.savings_trend_chart(months, result.total_costs, result.total_optimized_costs, WATERMARK),
+        }
+
+    projection = project_horizon(inputs, years * 12, granularity)
+    keep = lttb_indices(projection.total_costs)
+    return len(keep), {
+        "trend": lambda: charts.projection_trend_chart(
+            projection.period_start[keep], projection.compute_costs[keep], projection.storage_costs[keep],
+            projection.transfer_costs[keep], projection.total_costs[keep], granularity, WATERMARK,
+        ),
+        "savings_trend": lambda: charts.projection_savings_chart(
+            projection.period_start[keep], projection.total_costs[keep], projection.total_optimized_costs[keep],
+            granularity, WATERMARK,
+        ),
+    }
+
+
+def measure(horizons, repeats=20):
+    rows = []
+    for horizon in horizons:
+        years, granularity = horizon.split(":")
+        years = int(years)
+        # A first, untimed build of every chart, as the first rerun of a server process pays it
+        for build in figure_builders(years, granularity, 0)[1].values():
+            build()
+        points, builders = figure_builders(years, granularity, 10)
+        for chart, build in builders.items():
+            build_s, fig = timed(build, repeats)
+            serialize_s, spec = timed(lambda: pio.to_json(fig.to_dict(), validate=False), repeats)
+            rows.append({
+                "horizon": f"{years}y {granularity.lower()}",
+                "chart": chart,
+                "points": points,
+                "spec_bytes": len(spec.encode()),
+                "build_ms": build_s * 1e3,
+                "serialize_ms": serialize_s * 1e3,
+            })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--horizons", nargs="+", default=list(DEFAULT_HORIZONS), help="years:granularity pairs")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable JSON")
+    args = parser.parse_args()
+
+    rows = measure(args.horizons, args.repeats)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    print(f"{'horizon':<12} {'chart':<14} {'points':>6} {'spec bytes':>11} {'build':>10} {'serialize':>10}")
+    for row in rows:
+        print(f"{row['horizon']:<12} {row['chart']:<14} {row['points']:>6} {row['spec_bytes']:>11,} "
+              f"{row['build_ms']:>7.2f} ms {row['serialize_ms']:>7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
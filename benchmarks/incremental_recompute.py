@@ -0,0 +1,115 @@
+"""
+Incremental estimate: what each sidebar edit recomputes, and what it costs.
+
+Edits one input at a time (as a rerun would), prints the nodes of
+`incremental.ESTIMATE_GRAPH` each edit recomputed, checks every result
+against `cost_engine.estimate` bit for bit, and times the incremental
+update against a full `estimate`, and a rerun with no estimate input changed:
+
+    python benchmarks/incremental_recompute.py
+    python benchmarks/incremental_recompute.py --edits 20000 --json
+"""
+import argparse
+import dataclasses
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from cost_engine import WAREHOUSE_SIZES, CostInputs, estimate  # noqa: E402
+from incremental import ESTIMATE_GRAPH, IncrementalEstimate  # noqa: E402
+
+# One value generator per sidebar input
+EDITS = {
+    "num_vws": lambda rng: rng.randint(1, 20),
+    "vw_size": lambda rng: rng.choice(WAREHOUSE_SIZES),
+    "hours_per_day": lambda rng: rng.randint(1, 24),
+    "active_days_per_month": lambda rng: rng.randint(1, 31),
+    "credit_cost": lambda rng: round(rng.uniform(1.0, 5.0), 1),
+    "use_gen2": lambda rng: rng.random() < 0.5,
+    "compute_growth": lambda rng: rng.randint(0, 50),
+    "storage_tb": lambda rng: round(rng.uniform(0.0, 100.0), 1),
+    "storage_growth": lambda rng: rng.randint(0, 30),
+    "data_transfer_tb": lambda rng: round(rng.uniform(0.0, 50.0), 1),
+    "transfer_growth": lambda rng: rng.randint(0, 25),
+    "discount_pct": lambda rng: rng.randint(0, 40),
+    "pause_hours_per_day": lambda rng: rng.randint(0, 12),
+    "reduce_vw_size": lambda rng: rng.choice(["No Change", *WAREHOUSE_SIZES]),
+    "additional_discount": lambda rng: rng.randint(0, 25),
+}
+
+
+def identical(a, b):
+    return all(np.array_equal(getattr(a, field), getattr(b, field)) for field in a.__dataclass_fields__)
+
+
+def run(edits=5000, seed=0):
+    rng = random.Random(seed)
+    graph = IncrementalEstimate({})
+    inputs = CostInputs()
+    graph.estimate(inputs)
+
+    recomputed_by_input = {name: set() for name in EDITS}
+    mismatches = 0
+    incremental_s = full_s = 0.0
+    for _ in range(edits):
+        name = rng.choice(list(EDITS))
+        inputs = dataclasses.replace(inputs, **{name: EDITS[name](rng)})
+
+        start = time.perf_counter()
+        result = graph.estimate(inputs)
+        incremental_s += time.perf_counter() - start
+        start = time.perf_counter()
+        expected = estimate(inputs)
+        full_s += time.perf_counter() - start
+
+        recomputed_by_input[name].update(graph.recomputed)
+        mismatches += not identical(result, expected)
+
+    # Most reruns change something else on the page (horizon, charts, Monte Carlo)
+    start = time.perf_counter()
+    for _ in range(edits):
+        graph.estimate(inputs)
+    unchanged_s = time.perf_counter() - start
+
+    order = [node.name for node in ESTIMATE_GRAPH]
+    return {
+        "edits": edits,
+        "mismatches": mismatches,
+        "incremental_us": incremental_s / edits * 1e6,
+        "full_estimate_us": full_s / edits * 1e6,
+        "unchanged_us": unchanged_s / edits * 1e6,
+        "nodes": len(ESTIMATE_GRAPH),
+        "recomputed_by_input": {name: sorted(nodes, key=order.index) for name, nodes in recomputed_by_input.items()},
+        "recompute_counts": graph.recompute_counts,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--edits", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable JSON")
+    args = parser.parse_args()
+
+    result = run(args.edits, args.seed)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"{result['edits']} single-input edits, {result['mismatches']} results differing from estimate()")
+        print(f"  incremental update : {result['incremental_us']:7.1f} us")
+        print(f"  full estimate()    : {result['full_estimate_us']:7.1f} us")
+        print(f"  unchanged inputs   : {result['unchanged_us']:7.1f} us")
+        print(f"  nodes recomputed per edited input (of {result['nodes']}):")
+        for name, nodes in result["recomputed_by_input"].items():
+            print(f"    {name:<22} {len(nodes):2d}  {', '.join(nodes)}")
+    sys.exit(1 if result["mismatches"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Scaling of the execution backends.
+
+Times a month-by-month scenario sweep, closed-form horizon totals and a
+Monte Carlo simulation on the inline backend and on thread and process
+pools of growing size, checks every run returns exactly the inline
+results, and reports speedup and parallel efficiency against inline:
+
+    python benchmarks/parallel_scaling.py
+    python benchmarks/parallel_scaling.py --workers 1 2 4 8 --scenarios 8000000 --json
+
+Worker counts above the machine's cores are still run (they measure
+oversubscription), but only counts up to the core count say anything
+about scaling.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from cost_engine import CostInputs  # noqa: E402
+from execution import INLINE, make_backend  # noqa: E402
+from monte_carlo import UncertaintySpec, sample_noise, simulate  # noqa: E402
+from scenario_sweep import evaluate_scenarios, evaluate_totals  # noqa: E402
+
+
+def timed(function, repeats):
+    """(best seconds, last result) over `repeats` calls"""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def sweep_columns(scenarios, seed=0):
+    """Random scenario columns spanning the sidebar ranges"""
+    rng = np.random.default_rng(seed)
+    return dict(
+        num_vws=rng.integers(1, 21, scenarios),
+        vw_size=rng.integers(0, 5, scenarios),
+        hours_per_day=rng.integers(1, 25, scenarios),
+        active_days_per_month=rng.integers(1, 32, scenarios),
+        use_gen2=rng.random(scenarios) < 0.5,
+        compute_growth=rng.uniform(0, 50, scenarios),
+        storage_tb=rng.uniform(0, 1000, scenarios),
+        storage_growth=rng.uniform(0, 30, scenarios),
+        pause_hours_per_day=rng.integers(0, 7, scenarios),
+        reduce_vw_size=rng.integers(-1, 5, scenarios),
+    )
+
+
+def workloads(scenarios, trajectories):
+    """{name: (rows, run(backend) -> tuple of result arrays)}"""
+    columns = sweep_columns(scenarios)
+    inputs = CostInputs.from_template("Large Enterprise")
+    spec = UncertaintySpec(trajectories=trajectories)
+    noise = sample_noise(spec.distribution, spec.trajectories, spec.seed)
+
+    def sweep(backend):
+        results = evaluate_scenarios(backend=backend, **columns)
+        return results.annual_cost, results.optimized_annual_cost
+
+    def totals(backend):
+        results = evaluate_totals(months=60, backend=backend, **columns)
+        return results.annual_cost, results.optimized_annual_cost
+
+    def monte_carlo(backend):
+        result = simulate(inputs, spec, noise=noise, backend=backend)
+        return result.monthly_current, result.monthly_optimized, result.annual_current, result.annual_optimized
+
+    return {
+        "sweep": (scenarios, sweep),
+        "totals_60_months": (scenarios, totals),
+        "monte_carlo": (trajectories, monte_carlo),
+    }
+
+
+def measure(worker_counts, scenarios, trajectories, repeats):
+    rows = []
+    for name, (size, run) in workloads(scenarios, trajectories).items():
+        inline_s, expected = timed(lambda: run(INLINE), repeats)
+        rows.append({"workload": name, "rows": size, "backend": "inline", "workers": 1,
+                     "s": inline_s, "speedup": 1.0, "efficiency": 1.0})
+        for kind in ("threads", "processes"):
+            for workers in worker_counts:
+                with make_backend(kind, workers) as backend:
+                    run(backend)  # starts the pool outside the timing
+                    seconds, result = timed(lambda: run(backend), repeats)
+                for got, want in zip(result, expected):
+                    assert np.array_equal(got, want), f"{name} on {workers} {kind} differs from inline"
+                rows.append({"workload": name, "rows": size, "backend": kind, "workers": workers, "s": seconds,
+                             "speedup": inline_s / seconds, "efficiency": inline_s / seconds / workers})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--scenarios", type=int, default=2_000_000, help="Rows of the sweep and totals workloads")
+    parser.add_argument("--trajectories", type=int, default=1_000_000, help="Monte Carlo trajectories")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable JSON")
+    args = parser.parse_args()
+
+    rows = measure(args.workers, args.scenarios, args.trajectories, args.repeats)
+    if args.json:
+        print(json.dumps({"cpu_count": os.cpu_count(), "runs": rows}, indent=2))
+        return
+    print(f"{os.cpu_count()} cores; every run matches the inline results exactly")
+    print(f"{'workload':<18} {'rows':>10} {'backend':<10} {'workers':>7} {'time':>10} {'speedup':>8} {'efficiency':>10}")
+    for row in rows:
+        print(f"{row['workload']:<18} {row['rows']:>10,} {row['backend']:<10} {row['workers']:>7} "
+              f"{row['s'] * 1e3:>7.0f} ms {row['speedup']:>7.2f}x {row['efficiency']:>9.0%}")
+
+
+if __name__ == "__main__":
+    main()
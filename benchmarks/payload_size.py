@@ -0,0 +1,128 @@
+"""
+Per-rerun websocket payload size for the Streamlit page.
+
+Runs the app through AppTest and totals the serialized size of every
+ForwardMsg the script produced (what the server would push over the
+websocket), with a breakdown per Plotly chart. Reruns change the
+additional discount, and the wire total models Streamlit's client message
+cache: cacheable messages the browser already holds are sent as hash
+references.
+
+    python benchmarks/payload_size.py
+    python benchmarks/payload_size.py --app /path/to/old/Cost_Estimator_Code.py --json
+"""
+import argparse
+import json
+import os
+from pathlib import Path
+
+from streamlit.runtime.forward_msg_cache import create_reference_msg
+from streamlit.runtime.forward_msg_queue import ForwardMsgQueue
+from streamlit.testing.v1 import AppTest
+
+DEFAULT_APP = Path(__file__).resolve().parent.parent / "Cost_Estimator_Code.py"
+CHANGED_INPUT = "Additional Optimization Discount (%)"
+DISCOUNT_VALUES = [10, 15, 20]
+
+
+class PayloadRecorder:
+    """Records every ForwardMsg enqueued while installed."""
+
+    def __init__(self):
+        self.messages = []
+        self._enqueue = None
+
+    def __enter__(self):
+        self._enqueue = ForwardMsgQueue.enqueue
+        recorder = self
+
+        def enqueue(queue, msg):
+            recorder.messages.append(msg)
+            return recorder._enqueue(queue, msg)
+
+        ForwardMsgQueue.enqueue = enqueue
+        return self
+
+    def __exit__(self, *exc):
+        ForwardMsgQueue.enqueue = self._enqueue
+
+    def reset(self):
+        self.messages = []
+
+    def raw_bytes(self):
+        return sum(msg.ByteSize() for msg in self.messages)
+
+    def wire_bytes(self, client_cache):
+        """Bytes sent when the browser already holds `client_cache`; adds this run's cacheable hashes to it."""
+        total = 0
+        for msg in self.messages:
+            if msg.metadata.cacheable and msg.hash in client_cache:
+                total += create_reference_msg(msg).ByteSize()
+            else:
+                total += msg.ByteSize()
+        client_cache.update(msg.hash for msg in self.messages if msg.metadata.cacheable)
+        return total
+
+
+def chart_payloads(at):
+    """(title, spec bytes) for every Plotly chart currently on the page."""
+    charts = []
+    for node in at.get("plotly_chart"):
+        spec = node.proto.spec
+        title = json.loads(spec).get("layout", {}).get("title", {})
+        charts.append((title.get("text", "untitled") if isinstance(title, dict) else str(title), len(spec.encode())))
+    return charts
+
+
+def measure_payload(app_path=DEFAULT_APP, reruns=3, timeout=120):
+    """Average websocket bytes per rerun after a first run, changing one input per rerun."""
+    app_path = Path(app_path).resolve()
+    os.chdir(app_path.parent)  # the page loads its images by relative path
+
+    at = AppTest.from_file(str(app_path), default_timeout=timeout)
+    client_cache = set()
+    with PayloadRecorder() as recorder:
+        at.run()
+        first_run_bytes = recorder.raw_bytes()
+        recorder.wire_bytes(client_cache)
+        raw, wire = [], []
+        for i in range(reruns):
+            recorder.reset()
+            discount = next(w for w in at.sidebar.slider if w.label == CHANGED_INPUT)
+            discount.set_value(DISCOUNT_VALUES[i % len(DISCOUNT_VALUES)]).run()
+            raw.append(recorder.raw_bytes())
+            wire.append(recorder.wire_bytes(client_cache))
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+
+    return {
+        "app": str(app_path),
+        "changed_input": CHANGED_INPUT,
+        "first_run_bytes": first_run_bytes,
+        "rerun_bytes": sum(raw) / len(raw),
+        "rerun_wire_bytes": sum(wire) / len(wire),
+        "charts": dict(chart_payloads(at)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", default=DEFAULT_APP, help="Streamlit script to measure")
+    parser.add_argument("--reruns", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable JSON")
+    args = parser.parse_args()
+
+    result = measure_payload(args.app, args.reruns)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"{result['app']}")
+        print(f"  first run : {result['first_run_bytes']:>10,} bytes")
+        print(f"  per rerun : {result['rerun_bytes']:>10,.0f} bytes serialized")
+        print(f"            : {result['rerun_wire_bytes']:>10,.0f} bytes on the wire (client message cache)")
+        for title, size in result["charts"].items():
+            print(f"    {title:<40} {size:>10,} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Rate-card pricing: compile time, vectorized lookups and invalidation.
+
+Prices N random configurations spread over the rate card's regions,
+editions and transfer destinations with `RateCard.price_columns`, from
+names and from integer codes, and checks the columns against per-row
+dictionary lookups in the parsed JSON. Then edits a copy of the rate card and reports which nodes of
+the incremental estimate each edit recomputes:
+
+    python benchmarks/rate_card_pricing.py
+    python benchmarks/rate_card_pricing.py --rows 1000000 --json
+"""
+import argparse
+import dataclasses
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from cost_engine import WAREHOUSE_SIZES, CostInputs  # noqa: E402
+from incremental import IncrementalEstimate  # noqa: E402
+from rate_card import DEFAULT_RATE_CARD_PATH, RateCard, load_rate_card  # noqa: E402
+from scenario_sweep import evaluate_totals  # noqa: E402
+
+
+def dictionary_columns(card, regions, editions, destinations):
+    """The same columns via one dictionary lookup per row"""
+    storage = [card["regions"][region]["storage_per_tb"] for region in regions]
+    transfer = [card["regions"][region]["transfer_per_tb"][destination] for region, destination in zip(regions, destinations)]
+    credit = [card["regions"][region]["credit_price"][edition] for region, edition in zip(regions, editions)]
+    return {"storage_cost_per_tb": storage, "transfer_cost_per_tb": transfer, "credit_cost": credit}
+
+
+def time_pricing(card, rows, seed=0):
+    rates = RateCard.compile(card)
+    rng = np.random.default_rng(seed)
+    regions = np.array(rates.regions)[rng.integers(0, len(rates.regions), rows)]
+    editions = np.array(rates.editions)[rng.integers(0, len(rates.editions), rows)]
+    destinations = np.array(rates.destinations)[rng.integers(0, len(rates.destinations), rows)]
+    scenario = dict(
+        vw_size=rng.integers(0, len(WAREHOUSE_SIZES), rows),
+        num_vws=rng.integers(1, 10, rows),
+        hours_per_day=rng.integers(1, 25, rows),
+    )
+
+    start = time.perf_counter()
+    columns = rates.price_columns(region=regions, edition=editions, transfer_destination=destinations)
+    names_s = time.perf_counter() - start
+    # Fleets and sweeps keep integer codes, as they do for warehouse sizes
+    codes = rates.region_codes(regions), rates.edition_codes(editions), rates.destination_codes(destinations)
+    start = time.perf_counter()
+    coded = rates.price_columns(*codes)
+    codes_s = time.perf_counter() - start
+    start = time.perf_counter()
+    expected = dictionary_columns(card, regions.tolist(), editions.tolist(), destinations.tolist())
+    dictionary_s = time.perf_counter() - start
+    start = time.perf_counter()
+    evaluate_totals(**scenario, **columns)
+    evaluate_s = time.perf_counter() - start
+
+    return {
+        "rows": rows,
+        "identical": all(
+            np.array_equal(columns[name], expected[name]) and np.array_equal(coded[name], expected[name])
+            for name in expected
+        ),
+        "names_ms": names_s * 1e3,
+        "codes_ms": codes_s * 1e3,
+        "dictionary_ms": dictionary_s * 1e3,
+        "evaluate_totals_ms": evaluate_s * 1e3,
+    }
+
+
+def edit_card(path, card, edit):
+    card = json.loads(json.dumps(card))
+    edit(card)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(card, f)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))  # coarse file-system clocks
+    return card
+
+
+def invalidation(card):
+    """Nodes recomputed by rate-card edits, for a page set to the default region and destination"""
+    default = card["default"]
+    region, destination = default["region"], default["transfer_destination"]
+    other_region = next(name for name in card["regions"] if name != region)
+    edits = {
+        "unchanged file re-saved": lambda c: None,
+        f"storage price in {other_region}": lambda c: c["regions"][other_region].update(storage_per_tb=99),
+        f"transfer price to {destination} in {region}": lambda c: c["regions"][region]["transfer_per_tb"].update({destination: 95}),
+        f"storage price in {region}": lambda c: c["regions"][region].update(storage_per_tb=41),
+    }
+
+    graph = IncrementalEstimate({})
+    inputs = CostInputs.from_template("Mid-Market Enterprise")
+
+    def estimate(rates):
+        storage, transfer = rates.rates(region, destination)
+        graph.estimate(dataclasses.replace(inputs, storage_cost_per_tb=storage, transfer_cost_per_tb=transfer))
+
+    estimate(RateCard.compile(card))
+    recomputed = {}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "rate_card.json")
+        for name, edit in edits.items():
+            card = edit_card(path, card, edit)
+            start = time.perf_counter()
+            rates = load_rate_card(path)
+            reload_us = (time.perf_counter() - start) * 1e6
+            estimate(rates)
+            recomputed[name] = {"reload_us": reload_us, "nodes": list(graph.recomputed)}
+
+        start = time.perf_counter()
+        load_rate_card(path)
+        cached_us = (time.perf_counter() - start) * 1e6
+    return recomputed, cached_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable JSON")
+    args = parser.parse_args()
+
+    with open(DEFAULT_RATE_CARD_PATH, encoding="utf-8") as f:
+        card = json.load(f)
+    start = time.perf_counter()
+    RateCard.compile(card)
+    compile_us = (time.perf_counter() - start) * 1e6
+
+    result = time_pricing(card, args.rows)
+    result["compile_us"] = compile_us
+    result["invalidation"], result["cached_load_us"] = invalidation(card)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"compile {compile_us:.0f} us, load when unchanged {result['cached_load_us']:.1f} us")
+        print(f"{result['rows']:,} rows across regions/editions/destinations "
+              f"({'identical to' if result['identical'] else 'DIFFERENT FROM'} per-row dictionary lookups)")
+        print(f"  rate columns from names  : {result['names_ms']:8.1f} ms")
+        print(f"  rate columns from codes  : {result['codes_ms']:8.1f} ms")
+        print(f"  per-row dictionary lookup: {result['dictionary_ms']:8.1f} ms")
+        print(f"  evaluate_totals          : {result['evaluate_totals_ms']:8.1f} ms")
+        print("  nodes recomputed after each rate-card edit:")
+        for name, edit in result["invalidation"].items():
+            print(f"    {name:<42} reload {edit['reload_us']:7.0f} us  {', '.join(edit['nodes']) or '-'}")
+    sys.exit(0 if result["identical"] else 1)
+
+
+if __name__ == "__main__":
+    main()
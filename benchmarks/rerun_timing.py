@@ -0,0 +1,99 @@
+"""
+Rerun latency harness for the Streamlit page.
+
+Drives the app through Streamlit's AppTest with a fixed sequence of
+sidebar interactions and reports p50/p95 rerun latency. Run it against
+two checkouts to compare before/after:
+
+    python benchmarks/rerun_timing.py --reruns 60
+    python benchmarks/rerun_timing.py --app /path/to/old/Cost_Estimator_Code.py
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from pathlib import Path
+
+from streamlit.testing.v1 import AppTest
+
+DEFAULT_APP = Path(__file__).resolve().parent.parent / "Cost_Estimator_Code.py"
+
+# (widget kind, label, values to cycle through)
+INTERACTIONS = [
+    ("number_input", "Cost per Credit ($)", [2.0, 2.5, 3.0]),
+    ("slider", "Additional Optimization Discount (%)", [5, 10, 15]),
+    ("slider", "Monthly Compute Growth (%)", [10, 12]),
+    ("selectbox", "Choose a template:", ["Custom Configuration", "Large Enterprise"]),
+    ("slider", "Base Discount (%)", [0, 10]),
+]
+
+
+def _widget(at, kind, label):
+    for widget in getattr(at.sidebar, kind):
+        if widget.label == label:
+            return widget
+    raise LookupError(f"No {kind} labelled {label!r}")
+
+
+def _set(widget, kind, value):
+    return widget.select(value) if kind == "selectbox" else widget.set_value(value)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def time_reruns(app_path=DEFAULT_APP, reruns=30, timeout=120):
+    """Cold first run plus `reruns` timed reruns, cycling through INTERACTIONS."""
+    app_path = Path(app_path).resolve()
+    os.chdir(app_path.parent)  # the page loads its images by relative path
+
+    at = AppTest.from_file(str(app_path), default_timeout=timeout)
+    start = time.perf_counter()
+    at.run()
+    cold = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+
+    timings = []
+    for i in range(reruns):
+        kind, label, values = INTERACTIONS[i % len(INTERACTIONS)]
+        value = values[(i // len(INTERACTIONS)) % len(values)]
+        _set(_widget(at, kind, label), kind, value)
+        start = time.perf_counter()
+        at.run()
+        timings.append(time.perf_counter() - start)
+
+    return {
+        "app": str(app_path),
+        "cold_run_s": cold,
+        "reruns": reruns,
+        "mean_s": statistics.fmean(timings),
+        "p50_s": percentile(timings, 50),
+        "p95_s": percentile(timings, 95),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", default=DEFAULT_APP, help="Streamlit script to time")
+    parser.add_argument("--reruns", type=int, default=30)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable JSON")
+    args = parser.parse_args()
+
+    result = time_reruns(args.app, args.reruns)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"{result['app']}")
+        print(f"  cold run : {result['cold_run_s'] * 1000:8.1f} ms")
+        print(f"  mean     : {result['mean_s'] * 1000:8.1f} ms over {result['reruns']} reruns")
+        print(f"  p50      : {result['p50_s'] * 1000:8.1f} ms")
+        print(f"  p95      : {result['p95_s'] * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Sensitivity analysis timing and cross-check.
+
+Times `sensitivity.sensitivity` for a single configuration and for random
+fleets of growing size, and checks every swing of the single configuration
+against a separate `cost_engine.estimate` of the swung inputs (the batch
+uses closed-form totals, so agreement is to float rounding):
+
+    python benchmarks/sensitivity_timing.py
+    python benchmarks/sensitivity_timing.py --fleet-sizes 1000 100000 1000000 --json
+"""
+import argparse
+import dataclasses
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from cost_engine import WAREHOUSE_SIZES, CostInputs, estimate  # noqa: E402
+from fleet import Fleet  # noqa: E402
+from sensitivity import sensitivity  # noqa: E402
+
+
+def best_of(function, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def cross_check(inputs, swing_pct):
+    """Largest relative difference between a batched swing and estimate() of the swung inputs"""
+    result = sensitivity(inputs, swing_pct)
+    _, low, high = result.swings()
+    worst = 0.0
+    for i, name in enumerate(result.inputs):
+        for value, batched in ((result.low_values[i], low[i]), (result.high_values[i], high[i])):
+            expected = estimate(dataclasses.replace(inputs, **{name: value})).total_annual_cost
+            worst = max(worst, abs(batched - expected) / expected)
+    return worst
+
+
+def random_fleet(size, seed=0):
+    rng = np.random.default_rng(seed)
+    return Fleet.build(
+        rng.choice(WAREHOUSE_SIZES, size),
+        rng.integers(1, 25, size),
+        rng.integers(10, 31, size),
+        use_gen2=rng.random(size) < 0.5,
+        pause_hours_per_day=rng.integers(0, 4, size),
+    )
+
+
+def run(fleet_sizes, swing_pct=10, repeats=5):
+    inputs = CostInputs.from_template("Large Enterprise", use_gen2=True, discount_pct=10)
+    result = {
+        "swing_pct": swing_pct,
+        "max_relative_error": cross_check(inputs, swing_pct),
+        "single_ms": best_of(lambda: sensitivity(inputs, swing_pct), repeats * 10) * 1e3,
+        "fleet_ms": {},
+    }
+    for size in fleet_sizes:
+        fleet = random_fleet(size)
+        result["fleet_ms"][size] = best_of(lambda: sensitivity(inputs, swing_pct, fleet), repeats) * 1e3
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fleet-sizes", type=int, nargs="+", default=[100, 10_000, 100_000])
+    parser.add_argument("--swing", type=float, default=10)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable JSON")
+    args = parser.parse_args()
+
+    result = run(args.fleet_sizes, args.swing)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"±{result['swing_pct']:g}% swings, max relative difference vs estimate(): {result['max_relative_error']:.1e}")
+        print(f"  single configuration : {result['single_ms']:8.2f} ms")
+        for size, ms in result["fleet_ms"].items():
+            print(f"  fleet of {size:>9,} : {ms:8.2f} ms")
+    sys.exit(0 if result["max_relative_error"] < 1e-12 else 1)
+
+
+if __name__ == "__main__":
+    main()
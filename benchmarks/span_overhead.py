@@ -0,0 +1,102 @@
+"""
+Cost of the profiling spans.
+
+Times `profiling.span` with no active trace (how every rerun runs unless
+profiling is opted into) and while recording, counts the spans one rerun
+of the page opens, and times the page's reruns with profiling off and with
+the ?profile=1 panel on:
+
+    python benchmarks/span_overhead.py
+    python benchmarks/span_overhead.py --reruns 40 --json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from profiling import span, start_trace  # noqa: E402
+from rerun_timing import INTERACTIONS, _set, _widget, percentile  # noqa: E402
+
+DEFAULT_APP = Path(__file__).resolve().parent.parent / "Cost_Estimator_Code.py"
+
+
+def span_cost_ns(calls=200_000):
+    """ns per `with span(...)` block, without and with an active trace"""
+    def loop():
+        start = time.perf_counter()
+        for _ in range(calls):
+            with span("x"):
+                pass
+        return (time.perf_counter() - start) / calls * 1e9
+
+    disabled = min(loop() for _ in range(3))
+    trace = start_trace()
+    enabled = min(loop() for _ in range(3))
+    trace.finish()
+    return disabled, enabled
+
+
+def rerun_p50s(app_path, reruns):
+    """
+    p50 rerun time of a plain and a ?profile=1 session. An untimed first pass
+    fills the process-wide caches, so neither session pays the other's misses.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    os.chdir(Path(app_path).parent)  # the page loads its images by relative path
+    plain = AppTest.from_file(str(app_path), default_timeout=120)
+    profiled = AppTest.from_file(str(app_path), default_timeout=120)
+    profiled.query_params["profile"] = "1"
+    sessions = {"off": plain, "profiled": profiled}
+    timings = {name: [] for name in sessions}
+    for at in sessions.values():
+        at.run()
+    for timed in (False, True):
+        for i in range(reruns):
+            kind, label, values = INTERACTIONS[i % len(INTERACTIONS)]
+            for name, at in sessions.items():
+                _set(_widget(at, kind, label), kind, values[(i // len(INTERACTIONS)) % len(values)])
+                start = time.perf_counter()
+                at.run()
+                if timed:
+                    timings[name].append(time.perf_counter() - start)
+    for at in sessions.values():
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+    spans = len(profiled.dataframe[-1].value)
+    return percentile(timings["off"], 50), percentile(timings["profiled"], 50), spans
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", default=DEFAULT_APP, help="Streamlit script to time")
+    parser.add_argument("--reruns", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable JSON")
+    args = parser.parse_args()
+
+    disabled_ns, enabled_ns = span_cost_ns()
+    off_p50, on_p50, spans = rerun_p50s(Path(args.app).resolve(), args.reruns)
+    result = {
+        "span_disabled_ns": disabled_ns,
+        "span_enabled_ns": enabled_ns,
+        "spans_per_rerun": spans,
+        "disabled_overhead_us_per_rerun": disabled_ns * spans / 1e3,
+        "rerun_p50_off_s": off_p50,
+        "rerun_p50_profiled_s": on_p50,
+    }
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"span, profiling off : {disabled_ns:7.0f} ns")
+        print(f"span, recording     : {enabled_ns:7.0f} ns")
+        print(f"spans per rerun     : {spans}  -> {result['disabled_overhead_us_per_rerun']:.1f} us per rerun when off")
+        print(f"rerun p50 off       : {off_p50 * 1e3:7.1f} ms")
+        print(f"rerun p50 ?profile=1: {on_p50 * 1e3:7.1f} ms (includes drawing the panel)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""
+Benchmark suite with regression thresholds.
+
+Runs four groups of measurements and compares them with a stored baseline:
+
+- engine: one `estimate`, a 10^6-scenario sweep (monthly and closed-form)
+  and a 100k-warehouse fleet;
+- rerun: cold run and p50/p95 rerun time of the page through AppTest
+  (`rerun_timing.py`);
+- payload: serialized bytes of the first run, of a rerun on the wire and of
+  each chart's figure (`payload_size.py`);
+- memory: peak and retained traced memory of one more page session once
+  the process-wide caches are warm, and the process's peak RSS (measured
+  in a fresh interpreter).
+
+Every metric is "lower is better". A metric fails when it exceeds its
+baseline by more than its relative tolerance plus a small absolute slack
+(by unit below; a baseline entry may set its own "tolerance"); the exit
+status is 1 if any metric failed. Engine timings are the best of
+`--repeats` runs, and those under a millisecond get a wider tolerance,
+since one scheduler hiccup is a large share of them.
+Timings are only comparable on the machine that recorded the baseline, so
+record it where the suite runs (CI or the deploy image):
+
+    python benchmarks/suite.py                                # all groups vs benchmarks/baseline.json
+    python benchmarks/suite.py --groups engine payload --output results.json
+    python benchmarks/suite.py --update-baseline              # accept this run as the new baseline
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+DEFAULT_APP = Path(__file__).resolve().parent.parent / "Cost_Estimator_Code.py"
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+GROUPS = ("engine", "rerun", "payload", "memory")
+
+# Allowed growth over the baseline before a metric fails, by unit: relative, plus an
+# absolute slack so near-zero metrics (retained MB, sub-millisecond timings) don't flap
+TOLERANCES = {"s": 0.25, "bytes": 0.05, "MB": 0.15}
+SLACK = {"s": 1e-5, "bytes": 256, "MB": 1.0}
+RERUN_TOLERANCE = 0.40  # full reruns on a shared machine are noisier than engine timings
+SUB_MS_TOLERANCE = 0.75  # timings under a millisecond
+ENGINE_REPEATS = 9
+
+SWEEP_SCENARIOS = 1_000_000
+FLEET_WAREHOUSES = 100_000
+MB = 1024 * 1024
+
+
+def metric(value, unit, tolerance=None):
+    entry = {"value": value, "unit": unit}
+    if tolerance is not None:
+        entry["tolerance"] = tolerance
+    return entry
+
+
+def best_of(function, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+# === GROUPS ===
+
+def timing(value, tolerance=None):
+    """A timing metric; sub-millisecond ones default to SUB_MS_TOLERANCE"""
+    if tolerance is None and value < 1e-3:
+        tolerance = SUB_MS_TOLERANCE
+    return metric(value, "s", tolerance)
+
+
+def engine_metrics(repeats=ENGINE_REPEATS):
+    import numpy as np
+
+    from cost_engine import WAREHOUSE_SIZES, CostInputs, estimate
+    from fleet import estimate_fleet
+    from scenario_sweep import evaluate_scenarios, evaluate_totals
+    from sensitivity_timing import random_fleet
+
+    inputs = CostInputs.from_template("Large Enterprise", use_gen2=True, discount_pct=10)
+    calls = 1000
+    single = best_of(lambda: [estimate(inputs) for _ in range(calls)], repeats) / calls
+
+    rng = np.random.default_rng(0)
+    scenario = dict(
+        num_vws=rng.integers(1, 20, SWEEP_SCENARIOS),
+        vw_size=rng.integers(0, len(WAREHOUSE_SIZES), SWEEP_SCENARIOS),
+        hours_per_day=rng.integers(1, 25, SWEEP_SCENARIOS),
+        use_gen2=rng.random(SWEEP_SCENARIOS) < 0.5,
+        compute_growth=rng.uniform(0, 50, SWEEP_SCENARIOS),
+        storage_growth=rng.uniform(0, 30, SWEEP_SCENARIOS),
+        pause_hours_per_day=rng.integers(0, 12, SWEEP_SCENARIOS),
+    )
+    sweep = best_of(lambda: evaluate_scenarios(**scenario), max(repeats // 2, 3))
+    totals = best_of(lambda: evaluate_totals(months=36, **scenario), repeats)
+
+    fleet = random_fleet(FLEET_WAREHOUSES)
+    fleet_s = best_of(lambda: estimate_fleet(fleet, inputs), repeats)
+    return {
+        "engine.single_estimate_s": timing(single),
+        "engine.sweep_1m_monthly_s": timing(sweep),
+        "engine.sweep_1m_totals_s": timing(totals),
+        "engine.fleet_100k_s": timing(fleet_s),
+    }
+
+
+def rerun_metrics(app_path, reruns=30):
+    from rerun_timing import time_reruns
+
+    result = time_reruns(app_path, reruns)
+    return {
+        "rerun.cold_run_s": metric(result["cold_run_s"], "s", RERUN_TOLERANCE),
+        "rerun.p50_s": metric(result["p50_s"], "s", RERUN_TOLERANCE),
+        "rerun.p95_s": metric(result["p95_s"], "s", RERUN_TOLERANCE * 1.5),
+    }
+
+
+def payload_metrics(app_path):
+    from payload_size import measure_payload
+
+    result = measure_payload(app_path)
+    metrics = {
+        "payload.first_run_bytes": metric(result["first_run_bytes"], "bytes"),
+        "payload.rerun_bytes": metric(result["rerun_bytes"], "bytes"),
+        "payload.rerun_wire_bytes": metric(result["rerun_wire_bytes"], "bytes"),
+    }
+    for title, size in result["charts"].items():
+        metrics[f"payload.chart.{title}"] = metric(size, "bytes")
+    return metrics
+
+
+def _memory_child(app_path, reruns):
+    """Runs in the fresh interpreter: a warm-up session, then the measured one under tracemalloc."""
+    import resource
+    import tracemalloc
+
+    from streamlit.testing.v1 import AppTest
+
+    from payload_size import CHANGED_INPUT, DISCOUNT_VALUES
+
+    os.chdir(Path(app_path).parent)  # the page loads its images by relative path
+
+    def session():
+        at = AppTest.from_file(str(app_path), default_timeout=120)
+        at.run()
+        for i in range(reruns):
+            discount = next(w for w in at.sidebar.slider if w.label == CHANGED_INPUT)
+            discount.set_value(DISCOUNT_VALUES[i % len(DISCOUNT_VALUES)]).run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+        return at
+
+    # Sessions stay referenced, as a connected browser keeps its session alive
+    tracemalloc.start()
+    sessions = [session()]  # fills the process-wide caches a long-running server would already hold
+    first_peak = tracemalloc.get_traced_memory()[1]
+    before = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    sessions.append(session())
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(json.dumps({
+        "first_session_peak_mb": first_peak / MB,
+        "session_peak_mb": (peak - before) / MB,
+        "session_retained_mb": (current - before) / MB,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }))
+
+
+def memory_metrics(app_path, reruns=3):
+    out = subprocess.run(
+        [sys.executable, __file__, "--memory-child", str(app_path), "--reruns", str(reruns)],
+        capture_output=True, text=True, check=True,
+    )
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    return {
+        f"memory.{name}": metric(result[name], "MB")
+        for name in ("first_session_peak_mb", "session_peak_mb", "session_retained_mb", "max_rss_mb")
+    }
+
+
+def run_suite(groups=GROUPS, app_path=DEFAULT_APP, repeats=ENGINE_REPEATS):
+    app_path = Path(app_path).resolve()
+    cwd = os.getcwd()
+    measure = {
+        "engine": lambda: engine_metrics(repeats),
+        "rerun": lambda: rerun_metrics(app_path),
+        "payload": lambda: payload_metrics(app_path),
+        "memory": lambda: memory_metrics(app_path),
+    }
+    metrics = {}
+    for group in groups:
+        metrics.update(measure[group]())
+        os.chdir(cwd)  # the AppTest groups change into the app's directory
+    return {"environment": environment(), "groups": list(groups), "metrics": metrics}
+
+
+def environment():
+    import numpy as np
+    import streamlit
+
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "streamlit": streamlit.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+# === COMPARISON ===
+
+def compare(result, baseline):
+    """One row per measured metric: (name, baseline value, value, relative change, status)"""
+    rows = []
+    for name, entry in result["metrics"].items():
+        reference = baseline.get("metrics", {}).get(name)
+        if reference is None:
+            rows.append((name, None, entry["value"], None, "new"))
+            continue
+        tolerance = reference.get("tolerance", TOLERANCES[entry["unit"]])
+        allowed = reference["value"] * tolerance + SLACK[entry["unit"]]
+        change = entry["value"] / reference["value"] - 1 if reference["value"] else None
+        if entry["value"] > reference["value"] + allowed:
+            status = "FAIL"
+        elif entry["value"] < reference["value"] - allowed:
+            status = "improved"
+        else:
+            status = "ok"
+        rows.append((name, reference["value"], entry["value"], change, status))
+    # Baseline metrics of the groups that ran but were not measured (a chart went missing, ...)
+    for name in baseline.get("metrics", {}):
+        if name.split(".")[0] in result["groups"] and name not in result["metrics"]:
+            rows.append((name, baseline["metrics"][name]["value"], None, None, "missing"))
+    return rows
+
+
+def format_value(value, unit):
+    if value is None:
+        return "-"
+    if unit == "s":
+        return f"{value * 1e3:.3f} ms" if value < 1 else f"{value:.2f} s"
+    if unit == "bytes":
+        return f"{value:,.0f} B"
+    return f"{value:.1f} MB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--groups", nargs="+", choices=GROUPS, default=list(GROUPS))
+    parser.add_argument("--app", default=DEFAULT_APP, help="Streamlit script to measure")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON to compare with")
+    parser.add_argument("--repeats", type=int, default=ENGINE_REPEATS, help="Engine timings are the best of this many runs")
+    parser.add_argument("--output", help="Write this run's results as JSON")
+    parser.add_argument("--update-baseline", action="store_true", help="Store this run's metrics in the baseline")
+    parser.add_argument("--json", action="store_true", help="Print the results and comparison as JSON")
+    parser.add_argument("--memory-child", help=argparse.SUPPRESS)
+    parser.add_argument("--reruns", type=int, default=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.memory_child:
+        _memory_child(args.memory_child, args.reruns)
+        return
+
+    result = run_suite(args.groups, args.app, args.repeats)
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2) + "\n")
+
+    baseline_path = Path(args.baseline)
+    baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {"metrics": {}}
+    if args.update_baseline:
+        # Keep metrics of groups that did not run and any hand-set tolerances
+        merged = dict(baseline.get("metrics", {}))
+        for name, entry in result["metrics"].items():
+            merged[name] = dict(entry, **{k: v for k, v in merged.get(name, {}).items() if k == "tolerance"})
+        baseline_path.write_text(json.dumps({"environment": result["environment"], "metrics": merged}, indent=2) + "\n")
+        print(f"Baseline updated: {baseline_path}", file=sys.stderr)
+        return
+
+    rows = compare(result, baseline)
+    failed = [row for row in rows if row[4] == "FAIL"]
+    if args.json:
+        comparison = [dict(zip(("metric", "baseline", "value", "change", "status"), row)) for row in rows]
+        print(json.dumps(dict(result, comparison=comparison, passed=not failed), indent=2))
+    else:
+        if baseline.get("environment") and baseline["environment"] != result["environment"]:
+            print(f"note: baseline recorded on {baseline['environment']}", file=sys.stderr)
+        units = {name: entry["unit"] for name, entry in {**baseline.get("metrics", {}), **result["metrics"]}.items()}
+        width = max((len(row[0]) for row in rows), default=0)
+        for name, reference, value, change, status in rows:
+            delta = f"{change:+7.1%}" if change is not None else ""
+            print(f"{status:>8}  {name:<{width}}  {format_value(reference, units[name]):>12} -> "
+                  f"{format_value(value, units[name]):>12}  {delta}")
+        print(f"{len(failed)} of {len(rows)} metrics over threshold" if failed else f"all {len(rows)} metrics within threshold")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Out-of-core sweep store: write throughput, memory and zone-map queries.
+
+Writes a sweep of every template profile x rate-card region and edition x
+growth, auto-pause and discount grids to a store on disk, then times
+queries against the zone map and against a full scan of the memory-mapped
+columns, checking that both return the same rows:
+
+    python benchmarks/sweep_store_queries.py                      # ~15M scenarios, 12 monthly months
+    python benchmarks/sweep_store_queries.py --grid large --months 36 --dir /data/sweep   # ~310M scenarios
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rate_card import load_rate_card  # noqa: E402
+from sweep_store import USAGE_FIELDS, SweepStore, rate_card_axis, sweep_to_store, template_axis  # noqa: E402
+
+MB = 1024 * 1024
+
+
+def grid_axes(grid):
+    """Axes in order of how much they move costs, so blocks span narrow cost ranges"""
+    axes = {
+        "profile": template_axis(fields=USAGE_FIELDS),
+        "rates": rate_card_axis(load_rate_card(), editions=["Standard", "Enterprise", "Business Critical"]),
+        "pause_hours_per_day": np.arange(0, 13),
+        "compute_growth": np.arange(0, 51),
+        "storage_growth": np.arange(0, 31),
+        "additional_discount": np.arange(0, 21, 5),
+    }
+    if grid == "large":
+        axes["transfer_growth"] = np.arange(0, 21)
+    return axes
+
+
+def timed(function, repeats=1):
+    """(best seconds, result) over `repeats` calls"""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def full_scan_queries(store, credit_hours):
+    """The same queries by scanning whole columns (each column read once, as NumPy would)"""
+    annual_cost = np.asarray(store.columns["annual_cost"])
+    capacity = np.asarray(store.columns["credit_hours"])
+    savings_pct = np.asarray(store.columns["savings_pct"])
+    rows = np.flatnonzero(capacity >= credit_hours)
+    cheapest = rows[np.lexsort((rows, annual_cost[rows]))[:100]]
+    return cheapest, np.flatnonzero(savings_pct > 30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--grid", choices=("default", "large"), default="default")
+    parser.add_argument("--months", type=int, help="Horizon for closed-form totals (default: the page's 12 months)")
+    parser.add_argument("--dir", help="Store directory (default: a temporary one, removed afterwards)")
+    parser.add_argument("--credit-hours", type=float, default=50_000, help="Capacity floor of the top-k query")
+    parser.add_argument("--skip-full-scan", action="store_true", help="Skip the full-scan comparison")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable JSON")
+    args = parser.parse_args()
+
+    directory = Path(args.dir) if args.dir else Path(tempfile.mkdtemp(prefix="sweep-store-"))
+    try:
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        write_s, store = timed(lambda: sweep_to_store(directory, grid_axes(args.grid), months=args.months, overwrite=True))
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        size = sum(entry.stat().st_size for entry in os.scandir(directory))
+
+        store = SweepStore(directory)  # as a separate reader would open it
+        floor = [("credit_hours", ">=", args.credit_hours)]
+        queries = {
+            "top100_cheapest_with_capacity": lambda: store.top_k(100, "annual_cost", where=floor),
+            "top100_savings": lambda: store.top_k(100, "savings", largest=True),
+            "count_savings_pct_gt_30": lambda: store.count([("savings_pct", ">", 30)]),
+            "select_savings_pct_gt_30": lambda: store.select([("savings_pct", ">", 30)]),
+        }
+        result = {
+            "rows": len(store),
+            "blocks": store.blocks,
+            "months": args.months or 12,
+            "write_s": write_s,
+            "rows_per_s": len(store) / write_s,
+            "store_mb": size / MB,
+            "zone_map_kb": store.zones.nbytes / 1024,
+            "peak_rss_growth_mb": rss_after - rss_before,
+            "queries": {},
+        }
+        answers = {}
+        for name, query in queries.items():
+            seconds, answers[name] = timed(query, repeats=3)  # the first run competes with the write-back of the sweep
+            result["queries"][name] = {"s": seconds, "blocks_read": store.blocks_read}
+
+        if not args.skip_full_scan:
+            scan_s, (cheapest, selected) = timed(lambda: full_scan_queries(store, args.credit_hours))
+            assert np.array_equal(cheapest, answers["top100_cheapest_with_capacity"]), "top-k differs from the full scan"
+            assert np.array_equal(selected, answers["select_savings_pct_gt_30"]), "select differs from the full scan"
+            assert answers["count_savings_pct_gt_30"] == len(selected), "count differs from the full scan"
+            result["full_scan_s"] = scan_s
+    finally:
+        if not args.dir:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(f"{result['rows']:,} scenarios ({result['months']} months) in {result['blocks']:,} blocks: "
+          f"{result['write_s']:.1f} s ({result['rows_per_s'] / 1e6:.1f}M/s), {result['store_mb']:,.0f} MB on disk, "
+          f"zone map {result['zone_map_kb']:,.0f} KB, peak RSS +{result['peak_rss_growth_mb']:.0f} MB")
+    for name, query in result["queries"].items():
+        print(f"  {name:<32} {query['s'] * 1e3:9.1f} ms  {query['blocks_read']:>6,} of {result['blocks']:,} blocks read")
+    if "full_scan_s" in result:
+        print(f"  {'full scan of the same queries':<32} {result['full_scan_s'] * 1e3:9.1f} ms  (same rows)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Burst test for the buffered usage-log writer.
+
+Several threads (standing in for concurrent sessions) log records as fast
+as they can into a `UsageLogWriter` backed by SQLite, with an optional
+per-batch delay simulating a Snowflake round trip. Reports the latency of
+`log()` as the page sees it, the writer's counters, and checks that every
+record counted as flushed is in the table:
+
+    python benchmarks/usage_log_burst.py
+    python benchmarks/usage_log_burst.py --threads 16 --records 20000 --write-latency-ms 300   # overload: expect drops
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from usage_log import SQLiteBackend, UsageLogWriter  # noqa: E402
+
+
+class SlowBackend:
+    """Delays each batch write, like a remote INSERT."""
+
+    def __init__(self, backend, latency_s):
+        self.backend = backend
+        self.latency_s = latency_s
+
+    def write(self, records):
+        time.sleep(self.latency_s)
+        self.backend.write(records)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_burst(threads=8, records=1000, write_latency_ms=0.0, batch_size=200, max_pending=10_000):
+    backend = SQLiteBackend(":memory:")
+    writer = UsageLogWriter(SlowBackend(backend, write_latency_ms / 1000), batch_size=batch_size,
+                            max_pending=max_pending)
+    latencies = [[] for _ in range(threads)]
+
+    def session(index):
+        for i in range(records):
+            start = time.perf_counter()
+            writer.log("estimate_viewed", f"session {index} record {i}", user_name=f"USER_{index}")
+            latencies[index].append(time.perf_counter() - start)
+
+    workers = [threading.Thread(target=session, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    logged = time.perf_counter() - start
+    writer.close()
+    drained = time.perf_counter() - start
+
+    stats = writer.stats()
+    flat = [latency for per_thread in latencies for latency in per_thread]
+    return {
+        "threads": threads,
+        "records": threads * records,
+        "write_latency_ms": write_latency_ms,
+        "log_p50_us": percentile(flat, 50) * 1e6,
+        "log_p99_us": percentile(flat, 99) * 1e6,
+        "log_max_ms": max(flat) * 1e3,
+        "burst_s": logged,
+        "drained_s": drained,
+        "stats": stats,
+        "rows_written": len(backend.rows()),
+        "consistent": len(backend.rows()) == stats["flushed"]
+        and stats["queued"] + stats["dropped"] == threads * records,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--records", type=int, default=1000, help="Records per thread")
+    parser.add_argument("--write-latency-ms", type=float, default=0.0, help="Simulated delay per batch write")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--max-pending", type=int, default=10_000)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable JSON")
+    args = parser.parse_args()
+
+    result = run_burst(args.threads, args.records, args.write_latency_ms, args.batch_size, args.max_pending)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"{result['records']:,} records from {result['threads']} threads, {result['write_latency_ms']:g} ms per batch write")
+        print(f"  log() p50 : {result['log_p50_us']:8.1f} us")
+        print(f"  log() p99 : {result['log_p99_us']:8.1f} us")
+        print(f"  log() max : {result['log_max_ms']:8.2f} ms")
+        print(f"  burst     : {result['burst_s']:8.3f} s   drained after {result['drained_s']:.3f} s")
+        print(f"  counters  : {result['stats']}")
+        print(f"  rows      : {result['rows_written']:,} ({'consistent' if result['consistent'] else 'MISMATCH'})")
+    sys.exit(0 if result["consistent"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,507 @@
+"""
+Plotly figure builders for the estimator page.
+
+Each builder takes exactly the values it plots and returns a figure, so the
+page can memoize figures on those values.
+
+The layout, trace styling and watermark of each chart are built once per
+process into a `FigureTemplate`, keyed on whatever changes their structure
+(granularity, band traces, ...). A builder only fills in the data arrays,
+so a rerun with new values neither constructs nor validates a whole
+figure. Arrays go out as compact typed arrays at the precision they are
+displayed with (`currency_array`); per-point labels are formatted in the
+browser from those values with `texttemplate`.
+"""
+import functools
+from itertools import zip_longest
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+FONT = dict(family="Inter, sans-serif")
+PERIOD_NAMES = {"Monthly": "month", "Daily": "day", "Hourly": "hour"}
+TEMPLATE_CACHE_ENTRIES = 16  # per chart; keys are structural, so a handful per process
+FLOAT32_EXACT = 2 ** 24  # integers up to here, e.g. cents up to $167,772.16, survive float32
+
+
+class FigureTemplate:
+    """
+    A figure's spec with the data arrays left out.
+
+    `fill` returns a new figure with the given per-trace properties and
+    layout paths set, sharing everything else with the template. The spec
+    came from a validated figure, so the copy skips Plotly's per-property
+    validation.
+    """
+
+    def __init__(self, fig):
+        spec = fig.to_dict()
+        # The default (Streamlit) theme template ships in every figure; only
+        # its entries for the trace types drawn here have any effect
+        template = spec["layout"].get("template")
+        if template and "data" in template:
+            types = {trace.get("type", "scatter") for trace in spec["data"]}
+            template["data"] = {name: entries for name, entries in template["data"].items() if name in types}
+        self.spec = spec
+
+    def fill(self, traces=(), layout=None):
+        """
+        Figure with `traces[i]` (a dict of properties) set on trace i and each
+        dotted `layout` path (e.g. "yaxis.range", "annotations.0.text") set
+        to its value.
+        """
+        data = [dict(trace, **updates) for trace, updates in zip_longest(self.spec["data"], traces, fillvalue={})]
+        fig_layout = dict(self.spec["layout"])
+        for path, value in (layout or {}).items():
+            _set_path(fig_layout, path.split("."), value)
+        return go.Figure({"data": data, "layout": fig_layout}, _validate=False)
+
+
+def _set_path(spec, keys, value):
+    """spec[k0][k1]... = value, copying the dicts and lists on the way rather than changing the template's"""
+    key = int(keys[0]) if isinstance(spec, list) else keys[0]
+    if len(keys) == 1:
+        spec[key] = value
+        return
+    child = spec[key] if isinstance(spec, list) else spec.get(key, {})
+    child = list(child) if isinstance(child, list) else dict(child)
+    spec[key] = child
+    _set_path(child, keys[1:], value)
+
+
+def currency_array(values, decimals=0):
+    """
+    `values` rounded to `decimals`, in the smallest type that holds them
+    exactly at that precision: whole dollars as integers (Plotly narrows
+    them to 1, 2 or 4 bytes), cents as float32 while they stay below 2^24
+    cents, float64 beyond either.
+    """
+    values = np.round(np.asarray(values, dtype=float), decimals)
+    largest = np.abs(values).max(initial=0)
+    if decimals == 0 and largest < 2 ** 31:
+        return values.astype(np.int64)
+    if decimals > 0 and largest * 10 ** decimals < FLOAT32_EXACT:
+        return values.astype(np.float32)
+    return values
+
+
+def epoch_ms(periods):
+    """datetime64 periods as float milliseconds, which Plotly ships as a binary array on a date axis"""
+    return periods.astype("datetime64[ms]").astype(np.int64).astype(float)
+
+
+def add_watermark(fig, watermark):
+    """Faint logo behind the plot area"""
+    fig.add_layout_image(
+        dict(
+            source=watermark,
+            xref="paper", yref="paper",
+            x=0.5, y=0.5,
+            sizex=1, sizey=1,  # exactly fill the plot area
+            opacity=0.11,
+            layer="below",
+            xanchor="center",
+            yanchor="middle"
+        )
+    )
+
+
+@functools.lru_cache(maxsize=TEMPLATE_CACHE_ENTRIES)
+def _donut_template(watermark):
+    fig_donut = go.Figure(data=[go.Pie(
+        labels=['Compute', 'Storage', 'Data Transfer'],
+        hole=0.6,
+        marker_colors=['#667eea', '#764ba2', '#f093fb'],
+        textinfo='label+percent',
+        textfont_size=12,
+        hovertemplate='<b>%{label}</b><br>Cost: $%{value:,.0f}<br>Percentage: %{percent}<extra></extra>'
+    )])
+
+    add_watermark(fig_donut, watermark)
+
+    fig_donut.update_layout(
+        title={'text': "Annual Cost Distribution", 'x': 0.5, 'xanchor': 'center'},
+        annotations=[dict(text='', x=0.5, y=0.5, font_size=16, showarrow=False)],
+        showlegend=True,
+        height=400,
+        font=FONT
+    )
+    return FigureTemplate(fig_donut)
+
+
+def donut_chart(compute_total, storage_total, transfer_total, total_annual_cost, watermark):
+    """Annual cost split across compute, storage and transfer"""
+    return _donut_template(watermark).fill(
+        [{"values": currency_array([compute_total, storage_total, transfer_total])}],
+        {"annotations.0.text": f'Total<br>${total_annual_cost:,.0f}'},
+    )
+
+
+@functools.lru_cache(maxsize=TEMPLATE_CACHE_ENTRIES)
+def _trend_template(months, watermark, with_bands):
+    fig_trend = make_subplots()
+
+    for name, color, fillcolor, fill in (
+        ('Compute', '#667eea', 'rgba(102,126,234,0.35)', 'tozeroy'),
+        ('Storage', '#764ba2', 'rgba(118,75,162,0.35)', 'tonexty'),
+        ('Data Transfer', '#f093fb', 'rgba(240,147,251,0.35)', 'tonexty'),
+    ):
+        fig_trend.add_trace(
+            go.Scatter(
+                x=months,
+                fill=fill,
+                name=name,
+                line=dict(color=color),
+                fillcolor=fillcolor,
+                hovertemplate=f'<b>{name}</b><br>$%{{y:,.0f}}<extra></extra>'
+            )
+        )
+
+    fig_trend.add_trace(
+        go.Scatter(
+            x=months,
+            mode='lines+markers+text',
+            name='Total Cost',
+            line=dict(color='#1f2937', width=3),
+            marker=dict(size=7),
+            texttemplate='$%{y:,.0f}',  # labels formatted in the browser from y
+            textposition="top center",
+            hovertemplate='<b>Total Cost</b><br>$%{y:,.0f}<extra></extra>'
+        )
+    )
+
+    add_watermark(fig_trend, watermark)
+
+    fig_trend.update_layout(
+        title="Monthly Cost Trend & Breakdown",
+        xaxis_title="Month",
+        yaxis_title="Cost ($)",
+        hovermode='x unified',
+        height=500,
+        font=FONT,
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+
+    # Monte Carlo fan band: P10-P90 range and P50 line of the monthly total
+    if with_bands:
+        fig_trend.add_trace(
+            go.Scatter(
+                x=months,
+                mode='lines',
+                line=dict(width=0),
+                showlegend=False,
+                hovertemplate='<b>P10</b><br>$%{y:,.0f}<extra></extra>'
+            )
+        )
+        fig_trend.add_trace(
+            go.Scatter(
+                x=months,
+                mode='lines',
+                fill='tonexty',
+                name='P10–P90 Range',
+                line=dict(width=0),
+                fillcolor='rgba(31,41,55,0.15)',
+                hovertemplate='<b>P90</b><br>$%{y:,.0f}<extra></extra>'
+            )
+        )
+        fig_trend.add_trace(
+            go.Scatter(
+                x=months,
+                mode='lines',
+                name='P50 Total',
+                line=dict(color='#1f2937', width=2, dash='dash'),
+                hovertemplate='<b>P50</b><br>$%{y:,.0f}<extra></extra>'
+            )
+        )
+    return FigureTemplate(fig_trend)
+
+
+def trend_chart(months, compute_costs, storage_costs, transfer_costs, total_costs, watermark, bands=None):
+    """
+    Stacked monthly components with the total on top.
+
+    `bands` is an optional (P10, P50, P90) tuple of monthly totals from the
+    Monte Carlo mode, drawn as a fan band.
+    """
+    series = [compute_costs, storage_costs, transfer_costs, total_costs]
+    trend_ceiling = max(total_costs)
+    if bands is not None:
+        p10, p50, p90 = bands
+        series += [p10, p90, p50]
+        trend_ceiling = max(trend_ceiling, max(p90))
+    return _trend_template(tuple(months), watermark, bands is not None).fill(
+        [{"y": currency_array(values)} for values in series],
+        {"yaxis.range": [0, trend_ceiling * 1.15]},
+    )
+
+
+@functools.lru_cache(maxsize=TEMPLATE_CACHE_ENTRIES)
+def _projection_trend_template(granularity, watermark):
+    period = PERIOD_NAMES[granularity]
+    fig_trend = go.Figure()
+    for name, color, fillcolor, fill in (
+        ('Compute', '#667eea', 'rgba(102,126,234,0.35)', 'tozeroy'),
+        ('Storage', '#764ba2', 'rgba(118,75,162,0.35)', 'tonexty'),
+        ('Data Transfer', '#f093fb', 'rgba(240,147,251,0.35)', 'tonexty'),
+    ):
+        fig_trend.add_trace(
+            go.Scattergl(
+                fill=fill,
+                name=name,
+                line=dict(color=color),
+                fillcolor=fillcolor,
+                hovertemplate=f'<b>{name}</b><br>$%{{y:,.2f}}<extra></extra>'
+            )
+        )
+    fig_trend.add_trace(
+        go.Scattergl(
+            mode='lines',
+            name='Total Cost',
+            line=dict(color='#1f2937', width=3),
+            hovertemplate='<b>Total Cost</b><br>$%{y:,.2f}<extra></extra>'
+        )
+    )
+
+    add_watermark(fig_trend, watermark)
+
+    fig_trend.update_layout(
+        title=f"{granularity} Cost Trend & Breakdown",
+        xaxis=dict(type='date', title=period.capitalize()),
+        yaxis_title=f"Cost per {period} ($)",
+        hovermode='x unified',
+        height=500,
+        font=FONT,
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+    return FigureTemplate(fig_trend)
+
+
+def projection_trend_chart(periods, compute_costs, storage_costs, transfer_costs, total_costs, granularity, watermark):
+    """
+    Long-horizon / fine-grained version of `trend_chart`: WebGL traces over
+    dates, without per-point labels, for already downsampled series.
+    """
+    periods = epoch_ms(periods)
+    return _projection_trend_template(granularity, watermark).fill(
+        [{"x": periods, "y": currency_array(values, 2)} for values in (compute_costs, storage_costs, transfer_costs, total_costs)],
+        {"yaxis.range": [0, max(total_costs) * 1.15]},
+    )
+
+
+@functools.lru_cache(maxsize=TEMPLATE_CACHE_ENTRIES)
+def _projection_savings_template(granularity, watermark):
+    period = PERIOD_NAMES[granularity]
+    fig_savings_trend = go.Figure()
+    for name, color in (
+        ('Current', '#ef4444'),
+        ('Optimized', '#10b981'),
+    ):
+        fig_savings_trend.add_trace(
+            go.Scattergl(
+                mode='lines',
+                name=name,
+                line=dict(color=color, width=3),
+                hovertemplate='%{y:,.2f}'
+            )
+        )
+
+    add_watermark(fig_savings_trend, watermark)
+
+    fig_savings_trend.update_layout(
+        title=f"{granularity} Cost Trajectory",
+        xaxis=dict(type='date'),
+        yaxis_title=f"Cost per {period} ($)",
+        height=400,
+        font=FONT
+    )
+    return FigureTemplate(fig_savings_trend)
+
+
+def projection_savings_chart(periods, total_costs, total_optimized_costs, granularity, watermark):
+    """Long-horizon / fine-grained version of `savings_trend_chart` with WebGL traces"""
+    periods = epoch_ms(periods)
+    return _projection_savings_template(granularity, watermark).fill(
+        [{"x": periods, "y": currency_array(values, 2)} for values in (total_costs, total_optimized_costs)]
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def _frontier_template():
+    fig_frontier = go.Figure()
+    fig_frontier.add_trace(
+        go.Scatter(
+            mode='lines+markers',
+            name='Pareto Frontier',
+            line=dict(color='#667eea', width=3),
+            hovertemplate='<b>%{customdata}</b><br>Capacity: %{x:.0f}%<br>Cost: $%{y:,.0f}<extra></extra>'
+        )
+    )
+    fig_frontier.add_trace(
+        go.Scatter(
+            mode='markers',
+            name='Selected',
+            marker=dict(color='#10b981', size=14, symbol='star'),
+            hovertemplate='<b>Selected</b><br>$%{y:,.0f}<extra></extra>'
+        )
+    )
+    fig_frontier.add_vline(x=0, line_dash='dash', line_color='#ef4444')
+    fig_frontier.update_layout(
+        title="Optimized Cost vs Capacity Kept",
+        xaxis_title="Capacity Kept (% of current credit-hours)",
+        yaxis_title="Optimized Cost ($)",
+        height=400,
+        font=FONT
+    )
+    return FigureTemplate(fig_frontier)
+
+
+def frontier_chart(capacity_pct, cost, labels, best_capacity_pct, best_cost, capacity_floor_pct, period="Annual"):
+    """Optimized cost over the horizon against the share of capacity kept; `labels` describe each point's settings"""
+    return _frontier_template().fill(
+        [
+            {
+                "x": np.asarray(capacity_pct, dtype=np.float32),
+                "y": currency_array(cost),
+                "customdata": list(labels),
+            },
+            {"x": [float(best_capacity_pct)], "y": [round(float(best_cost))]},
+        ],
+        {
+            "shapes.0.x0": capacity_floor_pct,
+            "shapes.0.x1": capacity_floor_pct,
+            "yaxis.title.text": f"Optimized {period} Cost ($)",
+        },
+    )
+
+
+@functools.lru_cache(maxsize=TEMPLATE_CACHE_ENTRIES)
+def _comparison_template(watermark):
+    comparison_df = pd.DataFrame({
+        'Scenario': ['Current Configuration', 'Optimized Configuration'],
+        'Annual Cost': [0, 0],
+    })
+
+    fig_comparison = px.bar(
+        comparison_df, x='Scenario', y='Annual Cost',
+        title='Cost Comparison: Current vs Optimized',
+        color='Scenario',
+        color_discrete_map={
+            'Current Configuration': '#ef4444',
+            'Optimized Configuration': '#10b981'
+        },
+    )
+
+    fig_comparison.update_traces(
+        texttemplate='$%{y:,.0f}',
+        textposition='outside'
+    )
+
+    fig_comparison.update_layout(
+        yaxis_title="Annual Cost ($)",
+        showlegend=False,
+        height=400,
+        font=FONT
+    )
+
+    add_watermark(fig_comparison, watermark)
+    return FigureTemplate(fig_comparison)
+
+
+def comparison_chart(total_annual_cost, total_optimized_annual, watermark):
+    """Before/after annual cost bars"""
+    max_value = max(total_annual_cost, total_optimized_annual) * 1.15
+    return _comparison_template(watermark).fill(
+        [{"y": currency_array([total_annual_cost])}, {"y": currency_array([total_optimized_annual])}],
+        {"yaxis.range": [0, max_value]},
+    )
+
+
+@functools.lru_cache(maxsize=TEMPLATE_CACHE_ENTRIES)
+def _savings_trend_template(months, watermark):
+    savings_trend_df = pd.DataFrame({
+        "Month": months,
+        "Current": 0,
+        "Optimized": 0,
+    })
+
+    fig_savings_trend = px.line(
+        savings_trend_df,
+        x="Month",
+        y=["Current", "Optimized"],
+        title="Monthly Cost Trajectory",
+        color_discrete_map={"Current": "#ef4444", "Optimized": "#10b981"}
+    )
+
+    fig_savings_trend.update_traces(
+        mode='lines+markers',
+        line=dict(width=3),
+        hovertemplate='%{y:,.0f}'  # Rounded with commas
+    )
+
+    add_watermark(fig_savings_trend, watermark)
+
+    fig_savings_trend.update_layout(
+        yaxis_title="Monthly Cost ($)",
+        height=400,
+        font=FONT
+    )
+    return FigureTemplate(fig_savings_trend)
+
+
+def savings_trend_chart(months, total_costs, total_optimized_costs, watermark):
+    """Current vs optimized monthly totals"""
+    return _savings_trend_template(tuple(months), watermark).fill(
+        [{"y": currency_array(total_costs)}, {"y": currency_array(total_optimized_costs)}]
+    )
+
+
+@functools.lru_cache(maxsize=TEMPLATE_CACHE_ENTRIES)
+def _tornado_template(swing_pct, metric_label):
+    fig_tornado = go.Figure()
+    for name, color in (
+        (f"−{swing_pct:g}%", '#667eea'),
+        (f"+{swing_pct:g}%", '#764ba2'),
+    ):
+        fig_tornado.add_trace(
+            go.Bar(
+                orientation='h',
+                name=name,
+                marker_color=color,
+                hovertemplate=(
+                    '<b>%{y}</b> at %{customdata[0]:,.3~f}<br>'
+                    f'{metric_label}: ' + '$%{customdata[1]:,.0f} (%{x:+,.0f})<extra></extra>'
+                ),
+            )
+        )
+    fig_tornado.add_vline(x=0, line_color='#6b7280', line_dash='dot')
+    fig_tornado.update_layout(
+        title=f"What Drives {metric_label}: ±{swing_pct:g}% per Input",
+        barmode='overlay',
+        xaxis_title=f"{metric_label} ($)",
+        yaxis=dict(autorange='reversed'),
+        font=FONT
+    )
+    return FigureTemplate(fig_tornado)
+
+
+def tornado_chart(labels, base, low, high, low_values, high_values, swing_pct, metric_label):
+    """
+    Change in a metric when each input moves down/up by `swing_pct`%, one
+    row per input, largest first
+    """
+    base = float(base)
+    return _tornado_template(swing_pct, metric_label).fill(
+        [
+            {
+                "y": list(labels),
+                "x": currency_array(costs - base),
+                "base": base,
+                "customdata": np.column_stack([values, np.round(costs)]),
+            }
+            for costs, values in ((low, low_values), (high, high_values))
+        ],
+        {"shapes.0.x0": base, "shapes.0.x1": base, "height": 120 + 32 * len(labels)},
+    )
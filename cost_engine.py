@@ -0,0 +1,296 @@
+"""
+Snowflake cost engine.
+
+Pure NumPy implementation of the estimator's monthly model so configurations
+can be priced without Streamlit, Plotly or PIL. `Cost_Estimator_Code.py`
+collects the sidebar inputs into a `CostInputs` and renders the
+`CostEstimate` returned by `estimate`.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+
+# === PRICING CONSTANTS ===
+
+# Rates of the default rate-card region and transfer destination (`rate_card.py`)
+STORAGE_COST_PER_TB = 40
+DATA_TRANSFER_COST_PER_TB = 90
+size_credit_mapping = {"X-Small": 1, "Small": 2, "Medium": 4, "Large": 8, "X-Large": 16}
+WAREHOUSE_SIZES = list(size_credit_mapping)
+
+GEN2_EFFICIENCY = 0.70        # 30% better price-performance
+GEN2_PAUSE_EFFICIENCY = 0.90  # Additional pause efficiency on Gen 2
+MONTHS_PER_YEAR = 12
+
+# Default settings by template
+template_defaults = {
+    "Small Business": {"vws": 1, "size": "Small", "hours": 8, "days": 20, "storage": 2.0, "transfer": 0.5, "credit": 1.5},
+    "Mid-Market Enterprise": {"vws": 3, "size": "Medium", "hours": 12, "days": 25, "storage": 10.0, "transfer": 2.0, "credit": 2.0},
+    "Large Enterprise": {"vws": 8, "size": "Large", "hours": 16, "days": 30, "storage": 50.0, "transfer": 10.0, "credit": 2.5},
+    "Data Lake Workload": {"vws": 2, "size": "X-Large", "hours": 20, "days": 28, "storage": 100.0, "transfer": 5.0, "credit": 3.0},
+    "Analytics Heavy": {"vws": 5, "size": "Large", "hours": 14, "days": 26, "storage": 25.0, "transfer": 8.0, "credit": 3.5},
+    "Custom Configuration": {"vws": 1, "size": "X-Small", "hours": 12, "days": 22, "storage": 5.0, "transfer": 2.0, "credit": 2.0}
+}
+
+# template_defaults keys -> CostInputs fields, accepted as column names in input files
+TEMPLATE_ALIASES = {
+    "vws": "num_vws",
+    "size": "vw_size",
+    "hours": "hours_per_day",
+    "days": "active_days_per_month",
+    "storage": "storage_tb",
+    "transfer": "data_transfer_tb",
+    "credit": "credit_cost",
+}
+
+
+def gen2_scaling_discount(num_warehouses):
+    """Enhanced Gen 2 scaling with progressive discounts"""
+    if num_warehouses <= 1:
+        return 1.0
+    elif num_warehouses <= 3:
+        return 0.95  # 5% discount
+    elif num_warehouses <= 6:
+        return 0.90  # 10% discount
+    else:
+        return 0.85  # 15% discount for large deployments
+
+
+# === INPUTS & RESULTS ===
+
+@dataclass(frozen=True)
+class CostInputs:
+    """Everything the sidebar collects, in the units the sidebar uses."""
+    num_vws: int = 1
+    vw_size: str = "X-Small"
+    hours_per_day: int = 12
+    active_days_per_month: int = 22
+    credit_cost: float = 2.0
+    use_gen2: bool = False
+    compute_growth: float = 10
+    storage_tb: float = 5.0
+    storage_growth: float = 10
+    data_transfer_tb: float = 2.0
+    transfer_growth: float = 7
+    discount_pct: float = 0
+    pause_hours_per_day: int = 1
+    reduce_vw_size: str = "No Change"
+    additional_discount: float = 5
+    storage_cost_per_tb: float = STORAGE_COST_PER_TB        # per TB-month, by region
+    transfer_cost_per_tb: float = DATA_TRANSFER_COST_PER_TB  # per TB, by region and destination
+
+    @classmethod
+    def from_template(cls, template, **overrides):
+        """Build inputs from a `template_defaults` entry plus explicit overrides."""
+        defaults = template_defaults[template]
+        fields = dict(
+            num_vws=defaults["vws"],
+            vw_size=defaults["size"],
+            hours_per_day=defaults["hours"],
+            active_days_per_month=defaults["days"],
+            storage_tb=defaults["storage"],
+            data_transfer_tb=defaults["transfer"],
+            credit_cost=defaults["credit"],
+        )
+        fields.update(overrides)
+        return cls(**fields)
+
+    @property
+    def optimized_vw_size(self):
+        return self.vw_size if self.reduce_vw_size == "No Change" else self.reduce_vw_size
+
+
+@dataclass(frozen=True)
+class CostEstimate:
+    """Monthly current/optimized cost series plus the annual figures derived from them."""
+    compute_costs: np.ndarray
+    storage_costs: np.ndarray
+    transfer_costs: np.ndarray
+    optimized_compute_costs: np.ndarray
+    optimized_storage_costs: np.ndarray
+    optimized_transfer_costs: np.ndarray
+    annual_credits: float
+    avg_storage_tb: float
+
+    @property
+    def total_costs(self):
+        return self.compute_costs + self.storage_costs + self.transfer_costs
+
+    @property
+    def total_optimized_costs(self):
+        return self.optimized_compute_costs + self.optimized_storage_costs + self.optimized_transfer_costs
+
+    @property
+    def total_annual_cost(self):
+        return self.total_costs.sum()
+
+    @property
+    def total_optimized_annual(self):
+        return self.total_optimized_costs.sum()
+
+    @property
+    def total_savings(self):
+        return self.total_annual_cost - self.total_optimized_annual
+
+    @property
+    def savings_pct(self):
+        total_annual_cost = self.total_annual_cost
+        return (self.total_savings / total_annual_cost) * 100 if total_annual_cost > 0 else 0
+
+
+@dataclass(frozen=True)
+class HorizonTotals:
+    """Current/optimized cost totals over a horizon, without the per-month series."""
+    compute_cost: float
+    storage_cost: float
+    transfer_cost: float
+    optimized_compute_cost: float
+    optimized_storage_cost: float
+    optimized_transfer_cost: float
+    avg_storage_tb: float
+
+    @property
+    def total_cost(self):
+        return self.compute_cost + self.storage_cost + self.transfer_cost
+
+    @property
+    def total_optimized_cost(self):
+        return self.optimized_compute_cost + self.optimized_storage_cost + self.optimized_transfer_cost
+
+    @property
+    def savings(self):
+        return self.total_cost - self.total_optimized_cost
+
+    @property
+    def savings_pct(self):
+        total_cost = self.total_cost
+        return (self.savings / total_cost) * 100 if total_cost > 0 else 0
+
+
+# === CLOSED-FORM SERIES ===
+
+def linear_growth_sum(growth_pct, months=MONTHS_PER_YEAR):
+    """Sum of the compute growth factors 1 + m * growth_pct / 100 for m < months"""
+    return months + np.multiply(growth_pct, months * (months - 1) / 2) / 100
+
+
+def compound_growth_sum(growth_pct, months=MONTHS_PER_YEAR):
+    """
+    Sum of the storage/transfer growth factors (1 + growth_pct / 100) ** m
+    for m < months: ((1 + r) ** months - 1) / r, via expm1/log1p so small
+    rates stay accurate, and `months` at r = 0.
+    """
+    rate = np.asarray(growth_pct, dtype=float) / 100
+    safe_rate = np.where(rate == 0, 1.0, rate)
+    total = np.where(rate == 0, float(months), np.expm1(months * np.log1p(safe_rate)) / safe_rate)
+    return total if total.ndim else float(total)
+
+
+# === CALCULATIONS ===
+
+def monthly_base_credits(inputs):
+    """Credits per month for the current configuration (before growth)."""
+    base_credits = inputs.num_vws * size_credit_mapping[inputs.vw_size] * inputs.hours_per_day * inputs.active_days_per_month
+    if inputs.use_gen2:
+        base_credits *= GEN2_EFFICIENCY
+        base_credits *= gen2_scaling_discount(inputs.num_vws)
+    return base_credits
+
+
+def optimized_monthly_base_credits(inputs):
+    """Credits per month once auto-pause and downsizing are applied."""
+    effective_hours = max(inputs.hours_per_day - inputs.pause_hours_per_day, 0)
+    base_credits = inputs.num_vws * size_credit_mapping[inputs.optimized_vw_size] * effective_hours * inputs.active_days_per_month
+    if inputs.use_gen2:
+        base_credits *= GEN2_EFFICIENCY
+        base_credits *= gen2_scaling_discount(inputs.num_vws)
+        if inputs.pause_hours_per_day > 0:
+            base_credits *= GEN2_PAUSE_EFFICIENCY
+    return base_credits
+
+
+def compute_growth_factors(compute_growth, months=MONTHS_PER_YEAR):
+    """Compute grows linearly: 1 + m * growth / 100 in month m"""
+    return 1 + (np.arange(months) * compute_growth / 100)
+
+
+def compound_by_month(start, growth_pct, months=MONTHS_PER_YEAR):
+    """`start` compounded by `growth_pct` percent month over month"""
+    return np.cumprod(np.r_[start, np.full(months - 1, 1 + growth_pct / 100)])
+
+
+def discount_factor(discount_pct):
+    return 1 - discount_pct / 100
+
+
+def estimate(inputs):
+    """Price one configuration over the 12-month projection."""
+    return project(inputs, monthly_base_credits(inputs), optimized_monthly_base_credits(inputs))
+
+
+def project(inputs, base_credits, optimized_base_credits, months=MONTHS_PER_YEAR):
+    """
+    Monthly projection of given monthly base credits (current and
+    optimized) with the growth, storage, transfer and discount settings of
+    `inputs`, 12 months unless `months` says otherwise. `estimate` derives
+    the credits from `inputs` itself; fleets pass their own totals.
+    """
+    # Compute grows linearly, storage and transfer compound month over month
+    compute_growth_factor = compute_growth_factors(inputs.compute_growth, months)
+    storage_tb_by_month = compound_by_month(inputs.storage_tb, inputs.storage_growth, months)
+    transfer_tb_by_month = compound_by_month(inputs.data_transfer_tb, inputs.transfer_growth, months)
+
+    compute_costs = base_credits * inputs.credit_cost * compute_growth_factor
+    storage_costs = storage_tb_by_month * inputs.storage_cost_per_tb
+    transfer_costs = transfer_tb_by_month * inputs.transfer_cost_per_tb
+    optimized_compute_costs = optimized_base_credits * inputs.credit_cost * compute_growth_factor
+
+    # Base discount on the current plan, base + optimization discount on the optimized one
+    base_factor = discount_factor(inputs.discount_pct)
+    optimized_factor = discount_factor(inputs.discount_pct + inputs.additional_discount)
+    compute_costs = compute_costs * base_factor
+    storage_costs = storage_costs * base_factor
+    transfer_costs = transfer_costs * base_factor
+
+    return CostEstimate(
+        compute_costs=compute_costs,
+        storage_costs=storage_costs,
+        transfer_costs=transfer_costs,
+        optimized_compute_costs=optimized_compute_costs * optimized_factor,
+        optimized_storage_costs=storage_costs * optimized_factor,
+        optimized_transfer_costs=transfer_costs * optimized_factor,
+        annual_credits=base_credits * MONTHS_PER_YEAR,
+        avg_storage_tb=storage_tb_by_month.mean(),
+    )
+
+
+def horizon_totals(inputs, months=MONTHS_PER_YEAR, base_credits=None, optimized_base_credits=None):
+    """
+    Totals of `project` over `months` months in O(1), from the arithmetic
+    (compute) and geometric (storage, transfer) series sums. Equal to
+    summing the projected months up to float rounding, not bit for bit;
+    the page keeps `estimate` for the figures it shows month by month.
+    """
+    if base_credits is None:
+        base_credits = monthly_base_credits(inputs)
+        optimized_base_credits = optimized_monthly_base_credits(inputs)
+
+    compute_growth = linear_growth_sum(inputs.compute_growth, months)
+    storage_tb_months = inputs.storage_tb * compound_growth_sum(inputs.storage_growth, months)
+    transfer_tb_months = inputs.data_transfer_tb * compound_growth_sum(inputs.transfer_growth, months)
+
+    base_factor = discount_factor(inputs.discount_pct)
+    optimized_factor = discount_factor(inputs.discount_pct + inputs.additional_discount)
+    storage_cost = storage_tb_months * inputs.storage_cost_per_tb * base_factor
+    transfer_cost = transfer_tb_months * inputs.transfer_cost_per_tb * base_factor
+
+    return HorizonTotals(
+        compute_cost=base_credits * inputs.credit_cost * compute_growth * base_factor,
+        storage_cost=storage_cost,
+        transfer_cost=transfer_cost,
+        optimized_compute_cost=optimized_base_credits * inputs.credit_cost * compute_growth * optimized_factor,
+        optimized_storage_cost=storage_cost * optimized_factor,
+        optimized_transfer_cost=transfer_cost * optimized_factor,
+        avg_storage_tb=storage_tb_months / months,
+    )
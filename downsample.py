@@ -0,0 +1,44 @@
+"""
+Chart downsampling.
+
+Largest-Triangle-Three-Buckets (Steinarsson, 2013): keeps the first and last
+points and, from each of `threshold - 2` equal buckets in between, the point
+forming the largest triangle with the point kept from the previous bucket
+and the mean of the next bucket. Peaks and troughs survive, unlike
+striding or averaging. Returns indices so stacked series can share the
+points picked from their total.
+"""
+import numpy as np
+
+DEFAULT_POINTS = 1500  # per trace; plenty for a full-width chart
+
+
+def lttb_indices(y, threshold=DEFAULT_POINTS):
+    """Indices of `threshold` points of `y` (evenly spaced x) that preserve its shape."""
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # Bucket i covers [edges[i], edges[i + 1]); the first and last points are their own buckets
+    edges = (np.arange(threshold - 1) * ((n - 2) / (threshold - 2))).astype(np.int64) + 1
+    edges[-1] = n - 1
+    counts = np.diff(edges)
+    mean_x = np.r_[(edges[:-1] + edges[1:] - 1) / 2, n - 1]
+    mean_y = np.r_[np.add.reduceat(y[:n - 1], edges[:-1]) / counts, y[-1]]
+
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    x = np.arange(n, dtype=float)
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        next_x, next_y = mean_x[bucket + 1], mean_y[bucket + 1]
+        # Twice the triangle area; the constant factor does not change the argmax
+        area = np.abs(
+            (x[previous] - next_x) * (y[start:stop] - y[previous])
+            - (x[previous] - x[start:stop]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        indices[bucket + 1] = previous
+    return indices
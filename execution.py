@@ -0,0 +1,344 @@
+"""
+Execution backends for the heavy modes.
+
+Monte Carlo, large scenario sweeps and sweep stores price rows in chunks
+with the kernels of `scenario_sweep`. A backend decides where those chunks
+run:
+
+- `InlineBackend`: on the calling thread, one chunk after another (the default)
+- `ThreadBackend`: on a thread pool; NumPy releases the GIL inside each array
+  operation, so threads overlap once chunks are large
+- `ProcessBackend`: on a process pool. The input columns and the outputs live
+  in one shared-memory segment the workers map, so a task is pickled as a
+  segment name, a layout and a row range, never as arrays. Columns that are
+  broadcast scalars travel as the scalar. Segments are reused by later runs
+  and workers keep them mapped, so a warm run copies its inputs at memory
+  speed instead of faulting in fresh pages.
+
+`run` checks a `CancelToken` between chunks and reports progress as
+`progress(rows_done, rows)`. A progress callback that raises (as Streamlit
+calls do when a widget change stops the rerun) stops the remaining chunks
+too. Each row is priced by the same kernel whatever chunk it lands in, so
+results are bit-identical across backends and worker counts.
+"""
+import concurrent.futures
+import itertools
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+import numpy as np
+
+BACKENDS = ["inline", "threads", "processes"]
+TASKS_PER_WORKER = 4  # a few tasks per worker even out uneven progress; fewer amortize dispatch
+MIN_TASK_ROWS = 4096  # below this a task costs more to dispatch than to price
+POLL_SECONDS = 0.05   # how often a waiting run looks at its cancel token
+ALIGNMENT = 64        # byte alignment of each array in a shared-memory segment
+RETAINED_SEGMENT_BYTES = 512 * 1024 * 1024  # shared memory a process backend keeps between runs
+ATTACHED_SEGMENTS = 2  # segments a worker keeps mapped, and so alive after the backend unlinks them
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+class Cancelled(Exception):
+    """Raised by `run` when its `CancelToken` was cancelled before every chunk was priced."""
+
+
+class CancelToken:
+    """Set from any thread to stop a run at its next chunk boundary."""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+
+def _check(cancel):
+    if cancel is not None and cancel.cancelled:
+        raise Cancelled()
+
+
+def _price_rows(kernel, columns, outputs, args, start, stop, chunk_size, stopped):
+    """Run `kernel` over rows [start, stop) chunk by chunk; returns the rows priced before `stopped()`"""
+    for lo in range(start, stop, chunk_size):
+        if stopped():
+            return lo - start
+        hi = min(lo + chunk_size, stop)
+        kernel({field: values[lo:hi] for field, values in columns.items()}, *args, *(out[lo:hi] for out in outputs))
+    return stop - start
+
+
+def _tasks(n, chunk_size, workers):
+    """(start, stop) row ranges: about TASKS_PER_WORKER per worker, in whole chunks once tasks exceed a chunk"""
+    rows = max(-(-n // (workers * TASKS_PER_WORKER)), MIN_TASK_ROWS)
+    if rows > chunk_size:
+        rows = -(-rows // chunk_size) * chunk_size
+    return [(start, min(start + rows, n)) for start in range(0, n, rows)]
+
+
+def _never():
+    return False
+
+
+class InlineBackend:
+    """Prices every chunk on the calling thread."""
+    name = "inline"
+    workers = 1
+
+    def run(self, kernel, columns, n, outputs=((),), args=(), chunk_size=MIN_TASK_ROWS, progress=None, cancel=None):
+        """
+        Price `n` rows of the flat `columns` with `kernel(chunk_columns, *args,
+        *output_slices)` and return one float64 array of shape (n, *shape)
+        per entry of `outputs`.
+        """
+        results = [np.empty((n, *shape)) for shape in outputs]
+        for start in range(0, n, chunk_size):
+            _check(cancel)
+            stop = min(start + chunk_size, n)
+            _price_rows(kernel, columns, results, args, start, stop, chunk_size, _never)
+            if progress is not None:
+                progress(stop, n)
+        return results
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _PoolBackend(InlineBackend):
+    """A lazily started executor of `workers` workers, kept for the life of the backend."""
+
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._start()
+            return self._executor
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
+
+    def _collect(self, futures, n, progress, cancel, stop):
+        """Wait for `futures`, reporting rows done; on cancel or any error call `stop()` and drain the rest."""
+        pending = set(futures)
+        done = 0
+        try:
+            while pending:
+                _check(cancel)
+                finished, pending = concurrent.futures.wait(
+                    pending, timeout=POLL_SECONDS, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in finished:
+                    done += future.result()
+                if finished and progress is not None:
+                    progress(done, n)
+        except BaseException:
+            stop()
+            for future in pending:
+                future.cancel()
+            concurrent.futures.wait(pending)  # running tasks stop at their next chunk
+            raise
+
+
+class ThreadBackend(_PoolBackend):
+    """Prices chunks on a thread pool, writing straight into the output arrays."""
+    name = "threads"
+
+    def _start(self):
+        return concurrent.futures.ThreadPoolExecutor(self.workers, thread_name_prefix="execution")
+
+    def run(self, kernel, columns, n, outputs=((),), args=(), chunk_size=MIN_TASK_ROWS, progress=None, cancel=None):
+        results = [np.empty((n, *shape)) for shape in outputs]
+        stopped = threading.Event()
+        futures = [
+            self.executor.submit(_price_rows, kernel, columns, results, args, start, stop, chunk_size, stopped.is_set)
+            for start, stop in _tasks(n, chunk_size, self.workers)
+        ]
+        self._collect(futures, n, progress, cancel, stopped.set)
+        return results
+
+
+class ProcessBackend(_PoolBackend):
+    """
+    Prices chunks on a process pool over one shared-memory segment per run.
+    `kernel` and `args` must be picklable (module-level functions and plain
+    values). Up to `retain_bytes` of segments are kept for later runs.
+    """
+    name = "processes"
+
+    def __init__(self, workers=None, retain_bytes=RETAINED_SEGMENT_BYTES):
+        super().__init__(workers)
+        self.retain_bytes = retain_bytes
+        self._free = []  # released segments, oldest first
+
+    def _start(self):
+        return concurrent.futures.ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context(START_METHOD))
+
+    def run(self, kernel, columns, n, outputs=((),), args=(), chunk_size=MIN_TASK_ROWS, progress=None, cancel=None):
+        arrays, constants = {}, {}
+        for field, values in columns.items():
+            values = np.asarray(values)
+            if values.ndim == 1 and values.strides == (0,):
+                constants[field] = values[0]
+            else:
+                arrays[field] = values
+
+        column_layout, output_layout, size = _layout(arrays, [(n, *shape) for shape in outputs])
+        memory = self._acquire(size)
+        try:
+            buf = memory.buf
+            buf[0] = 0  # byte 0 is the stop flag
+            for field, (offset, dtype, shape) in column_layout.items():
+                np.copyto(np.ndarray(shape, dtype, buf, offset), arrays[field])
+            try:
+                futures = [
+                    self.executor.submit(
+                        _price_segment, kernel, memory.name, column_layout, output_layout, constants, n,
+                        args, start, stop, chunk_size,
+                    )
+                    for start, stop in _tasks(n, chunk_size, self.workers)
+                ]
+                self._collect(futures, n, progress, cancel, lambda: buf.__setitem__(0, 1))
+            except BrokenProcessPool:
+                self.close()  # a worker died; the next run starts a fresh pool
+                raise
+            return [np.ndarray(shape, np.float64, buf, offset).copy() for offset, shape in output_layout]
+        finally:
+            self._release(memory)
+
+    def _acquire(self, size):
+        """The smallest retained segment of at least `size` bytes, or a new one"""
+        with self._lock:
+            fits = [memory for memory in self._free if memory.size >= size]
+            if fits:
+                memory = min(fits, key=lambda memory: memory.size)
+                self._free.remove(memory)
+                return memory
+        return shared_memory.SharedMemory(create=True, size=size)
+
+    def _release(self, memory):
+        with self._lock:
+            self._free.append(memory)
+            while self._free and sum(memory.size for memory in self._free) > self.retain_bytes:
+                _unlink(self._free.pop(0))
+
+    def close(self):
+        super().close()
+        with self._lock:
+            while self._free:
+                _unlink(self._free.pop())
+
+
+def _layout(arrays, output_shapes):
+    """Offsets of the input columns and float64 outputs after the stop flag, and the segment size"""
+    offsets = itertools.accumulate(
+        [ALIGNMENT]
+        + [-(-values.nbytes // ALIGNMENT) * ALIGNMENT for values in arrays.values()]
+        + [-(-int(np.prod(shape)) * 8 // ALIGNMENT) * ALIGNMENT for shape in output_shapes]
+    )
+    offsets = list(offsets)
+    columns = {
+        field: (offset, values.dtype.str, values.shape) for (field, values), offset in zip(arrays.items(), offsets)
+    }
+    outputs = list(zip(offsets[len(arrays):], output_shapes))
+    return columns, outputs, offsets[-1]
+
+
+def _unlink(memory):
+    memory.close()
+    memory.unlink()
+
+
+_attached = OrderedDict()  # segment name -> SharedMemory, in a worker process
+
+
+def _attach(name):
+    """Map a segment, reusing the mapping of a recent task"""
+    memory = _attached.pop(name, None)
+    if memory is None:
+        memory = shared_memory.SharedMemory(name=name)
+    _attached[name] = memory
+    while len(_attached) > ATTACHED_SEGMENTS:
+        try:
+            _attached.popitem(last=False)[1].close()
+        except BufferError:  # a traceback still holds views; the mapping goes when they do
+            pass
+    return memory
+
+
+def _price_segment(kernel, name, column_layout, output_layout, constants, n, args, start, stop, chunk_size):
+    """Worker entry point: price rows [start, stop) of the segment into its outputs."""
+    buf = _attach(name).buf
+    return _price_views(buf, kernel, column_layout, output_layout, constants, n, args, start, stop, chunk_size)
+
+
+def _price_views(buf, kernel, column_layout, output_layout, constants, n, args, start, stop, chunk_size):
+    columns = {field: np.ndarray(shape, dtype, buf, offset) for field, (offset, dtype, shape) in column_layout.items()}
+    columns.update({field: np.broadcast_to(value, (n,)) for field, value in constants.items()})
+    outputs = [np.ndarray(shape, np.float64, buf, offset) for offset, shape in output_layout]
+    return _price_rows(kernel, columns, outputs, args, start, stop, chunk_size, lambda: buf[0] != 0)
+
+
+INLINE = InlineBackend()
+
+
+def make_backend(name="inline", workers=None):
+    """A backend by name ("inline", "threads" or "processes"); `workers` defaults to the CPU count."""
+    if name == "inline":
+        return INLINE
+    elif name == "threads":
+        return ThreadBackend(workers)
+    elif name == "processes":
+        return ProcessBackend(workers)
+    raise ValueError(f"Unknown execution backend: {name} (expected one of {', '.join(BACKENDS)})")
+
+
+class ResultCache:
+    """
+    Thread-safe LRU of results by hashable key, for runs that draw their own
+    progress and so cannot sit inside st.cache_data (it refuses elements on
+    blocks created outside the cached function). A run that raises or is
+    cancelled stores nothing.
+    """
+
+    def __init__(self, max_entries=16):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        value = compute()  # outside the lock: sessions pricing other keys don't wait
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
@@ -0,0 +1,269 @@
+"""
+Heterogeneous warehouse fleets.
+
+A `Fleet` holds one row per warehouse as parallel compact arrays (size code,
+hours per day, active days, Gen 2 flag, auto-pause hours, downsize target),
+about 6 bytes per warehouse, so 100k warehouses take ~600 KB. `estimate_fleet`
+reduces the whole fleet to current and optimized monthly credits in one
+vectorized pass and projects them with the account-level settings of a
+`CostInputs`, returning the same `CostEstimate` the page renders.
+
+A uniform fleet of `num_vws` identical warehouses prices exactly like
+`cost_engine.estimate`. `gen2_scaling_discount` applies to the fleet's
+warehouse count, as it does to `num_vws`.
+"""
+from collections import Counter
+from dataclasses import dataclass
+
+import numpy as np
+
+from cost_engine import (
+    GEN2_EFFICIENCY,
+    GEN2_PAUSE_EFFICIENCY,
+    TEMPLATE_ALIASES,
+    WAREHOUSE_SIZES,
+    gen2_scaling_discount,
+    project,
+)
+from scenario_sweep import NO_CHANGE, SIZE_CREDITS, size_codes
+
+FLEET_ALIASES = dict(TEMPLATE_ALIASES, warehouse_name="name", pause="pause_hours_per_day", gen2="use_gen2")
+
+
+@dataclass(frozen=True, eq=False)
+class Fleet:
+    """Struct-of-arrays warehouse fleet, one entry per warehouse."""
+    size_code: np.ndarray         # int8, position in WAREHOUSE_SIZES
+    hours_per_day: np.ndarray     # uint8
+    active_days: np.ndarray       # uint8, per month
+    gen2: np.ndarray              # bool
+    pause_hours: np.ndarray       # uint8, auto-pause hours per day
+    target_size_code: np.ndarray  # int8, downsize target or NO_CHANGE
+
+    def __post_init__(self):
+        if len({len(column) for column in self._columns()}) != 1:
+            raise ValueError("Fleet columns must have one entry per warehouse")
+
+    def _columns(self):
+        return (self.size_code, self.hours_per_day, self.active_days, self.gen2, self.pause_hours, self.target_size_code)
+
+    def __len__(self):
+        return len(self.size_code)
+
+    def __reduce__(self):
+        # Pickled (and so hashed by st.cache_data and sections.fingerprint) as its arrays
+        return (Fleet, self._columns())
+
+    @property
+    def nbytes(self):
+        return sum(column.nbytes for column in self._columns())
+
+    @classmethod
+    def build(cls, vw_size, hours_per_day, active_days_per_month, use_gen2=False, pause_hours_per_day=0, reduce_vw_size="No Change"):
+        """
+        Fleet from per-warehouse columns; scalars are broadcast to the longest
+        column. A missing value (None, NaN, a blank cell) raises ValueError.
+        """
+        columns = np.broadcast_arrays(
+            _size_codes(vw_size, "warehouse size"),
+            _numbers(hours_per_day, "hours per day"),
+            _numbers(active_days_per_month, "active days"),
+            _numbers(use_gen2, "Gen 2").astype(bool),
+            _numbers(pause_hours_per_day, "auto-pause hours"),
+            _size_codes(reduce_vw_size, "downsize target"),
+        )
+        size, hours, days, gen2, pause, target = (np.atleast_1d(column) for column in columns)
+        if (size < 0).any() or (size >= len(WAREHOUSE_SIZES)).any():
+            raise ValueError("Unknown warehouse size in fleet")
+        return cls(
+            size_code=size.astype(np.int8),
+            hours_per_day=np.clip(hours, 0, 24).astype(np.uint8),
+            active_days=np.clip(days, 0, 31).astype(np.uint8),
+            gen2=gen2.copy(),
+            pause_hours=np.clip(pause, 0, 24).astype(np.uint8),
+            target_size_code=target.astype(np.int8),
+        )
+
+    @classmethod
+    def uniform(cls, inputs):
+        """`inputs.num_vws` identical warehouses, as the single-configuration page models them"""
+        return cls.build(
+            np.full(inputs.num_vws, inputs.vw_size),
+            inputs.hours_per_day,
+            inputs.active_days_per_month,
+            inputs.use_gen2,
+            inputs.pause_hours_per_day,
+            inputs.reduce_vw_size,
+        )
+
+    @classmethod
+    def from_frame(cls, frame, defaults):
+        """
+        Fleet from a DataFrame with one row per warehouse. Columns use
+        `CostInputs` names or the template keys (size, hours, days); missing
+        columns take the value from `defaults` (a `CostInputs`).
+        """
+        frame = frame.rename(columns=lambda column: FLEET_ALIASES.get(column.strip().lower(), column.strip().lower()))
+        if "vw_size" not in frame:
+            raise ValueError("Fleet file needs a vw_size (or size) column")
+
+        def column(name):
+            return frame[name] if name in frame else getattr(defaults, name)
+
+        use_gen2 = column("use_gen2")
+        if hasattr(use_gen2, "str"):
+            use_gen2 = use_gen2.str.strip().str.lower().isin(["true", "1", "yes", "y"])
+        return cls.build(
+            column("vw_size"),
+            column("hours_per_day"),
+            column("active_days_per_month"),
+            use_gen2,
+            column("pause_hours_per_day"),
+            column("reduce_vw_size"),
+        )
+
+    @classmethod
+    def from_metering(cls, profile, defaults):
+        """One warehouse per metered warehouse, sized and scheduled from its own usage"""
+        active_hours = profile.daily_active_hours.sum(axis=1)
+        active_days = np.count_nonzero(profile.daily_active_hours, axis=1)
+        used = active_hours > 0
+
+        from metering import nearest_size_codes
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rate = np.where(used, profile.daily_credits.sum(axis=1) / active_hours, 0.0)
+            hours = np.where(used, np.rint(active_hours / active_days), 0)
+        return cls.build(
+            nearest_size_codes(rate[used]),
+            np.maximum(hours[used], 1),
+            np.maximum(np.rint(active_days[used] / profile.months_observed), 1),
+            defaults.use_gen2,
+            defaults.pause_hours_per_day,
+            defaults.reduce_vw_size,
+        )
+
+    # --- summaries for the page ---
+
+    def size_mix(self):
+        """{size name: warehouse count}, largest group first"""
+        counts = Counter(self.size_code.tolist())
+        return {WAREHOUSE_SIZES[code]: count for code, count in counts.most_common()}
+
+    @property
+    def gen2_count(self):
+        return int(np.count_nonzero(self.gen2))
+
+    @property
+    def paused_count(self):
+        return int(np.count_nonzero(self.pause_hours))
+
+    @property
+    def downsized_count(self):
+        return int(np.count_nonzero((self.target_size_code != NO_CHANGE) & (self.target_size_code != self.size_code)))
+
+    @property
+    def mean_hours_per_day(self):
+        return float(self.hours_per_day.mean()) if len(self) else 0.0
+
+    @property
+    def mean_active_days(self):
+        return float(self.active_days.mean()) if len(self) else 0.0
+
+
+def _size_codes(sizes, kind):
+    """`size_codes` that only looks up the distinct names of a large column"""
+    if hasattr(sizes, "factorize"):  # pandas column: hash-based, without materializing Python strings
+        inverse, uniques = sizes.factorize()
+        if (inverse < 0).any():  # -1 would index the last distinct name
+            raise ValueError(f"Missing {kind} values")
+        return size_codes(np.asarray(uniques))[inverse]
+    sizes = np.asarray(sizes)
+    if sizes.dtype.kind == "O" and any(size is None or size != size for size in sizes.ravel().tolist()):
+        raise ValueError(f"Missing {kind} values")
+    if sizes.ndim == 0 or sizes.dtype.kind in "iu":
+        return size_codes(sizes)
+    uniques, inverse = np.unique(sizes.astype(str), return_inverse=True)
+    return size_codes(uniques)[inverse.reshape(sizes.shape)]
+
+
+def _numbers(values, kind):
+    """A numeric column as floats; NaN would otherwise cast to 0 hours (or to True)"""
+    values = np.asarray(values, dtype=float)
+    if np.isnan(values).any():
+        raise ValueError(f"Missing {kind} values")
+    return values
+
+
+def warehouse_credits(fleet):
+    """
+    Per-warehouse monthly credits before Gen 2 factors: (current, optimized,
+    paused, downsized), as int32 arrays. `paused` and `downsized` are the
+    credits removed by each optimization on its own.
+    """
+    size_credits = SIZE_CREDITS.astype(np.int32)
+    size = size_credits[fleet.size_code]
+    hours = fleet.hours_per_day.astype(np.int32)
+    days = fleet.active_days.astype(np.int32)
+    target = size_credits[np.where(fleet.target_size_code == NO_CHANGE, fleet.size_code, fleet.target_size_code)]
+    effective_hours = np.maximum(hours - fleet.pause_hours.astype(np.int32), 0)
+
+    current = size * hours * days
+    optimized = target * effective_hours * days
+    paused = size * (hours - effective_hours) * days
+    downsized = (size - target) * hours * days
+    return current, optimized, paused, downsized
+
+
+def fleet_base_credits(fleet):
+    """Current and optimized monthly base credits of the whole fleet, with Gen 2 factors applied"""
+    current, optimized, _, _ = warehouse_credits(fleet)
+    return gen2_adjusted_totals(fleet, current, optimized)
+
+
+def gen2_adjusted_totals(fleet, current, optimized):
+    """
+    Fleet totals of per-warehouse current/optimized monthly credits, with
+    Gen 2 factors applied per group. Credits may have leading axes (one row
+    per variant of the fleet's settings); the totals keep those axes.
+    """
+    scaling = gen2_scaling_discount(len(fleet))
+    current, optimized = np.asarray(current), np.asarray(optimized)
+    variants = current.shape[:-1]
+
+    # Integer credit sums per Gen 2 / auto-pause group are exact; factors are applied per group
+    group = fleet.gen2.astype(np.int64) * 2 + (fleet.pause_hours > 0)
+    rows = int(np.prod(variants))
+    if variants:
+        group = (np.arange(rows)[:, None] * 4 + group).ravel()
+    current_sums = np.bincount(group, weights=current.ravel(), minlength=rows * 4).reshape(*variants, 4)
+    optimized_sums = np.bincount(group, weights=optimized.ravel(), minlength=rows * 4).reshape(*variants, 4)
+
+    base_credits = (
+        current_sums[..., 0] + current_sums[..., 1]
+        + (current_sums[..., 2] + current_sums[..., 3]) * GEN2_EFFICIENCY * scaling
+    )
+    optimized_base_credits = (
+        optimized_sums[..., 0] + optimized_sums[..., 1]
+        + optimized_sums[..., 2] * GEN2_EFFICIENCY * scaling
+        + optimized_sums[..., 3] * GEN2_EFFICIENCY * scaling * GEN2_PAUSE_EFFICIENCY
+    )
+    return base_credits, optimized_base_credits
+
+
+def estimate_fleet(fleet, inputs):
+    """
+    Price a fleet over the 12-month projection. Per-warehouse settings come
+    from the fleet; credit cost, growth, storage, transfer and discounts
+    from `inputs`.
+    """
+    base_credits, optimized_base_credits = fleet_base_credits(fleet)
+    return project(inputs, base_credits, optimized_base_credits)
+
+
+def optimization_shares(fleet):
+    """Percent of current fleet credits removed by auto-pause alone and by downsizing alone"""
+    current, _, paused, downsized = warehouse_credits(fleet)
+    total = current.sum(dtype=np.int64)
+    if not total:
+        return 0.0, 0.0
+    return paused.sum(dtype=np.int64) / total * 100, downsized.sum(dtype=np.int64) / total * 100
@@ -0,0 +1,143 @@
+"""
+Incremental estimates.
+
+The 12-month estimate is a small DAG: base credits depend on the warehouse
+settings, the growth vectors only on their growth sliders, the discount
+factors only on the discounts, and the optimized storage/transfer costs
+reuse the current ones. `ESTIMATE_GRAPH` lists those nodes in dependency
+order; `IncrementalEstimate` keeps every node's last value in session state
+and, on each rerun, recomputes only nodes downstream of an input that
+changed. A recomputed scalar node whose value comes out the same (say, the
+optimized base credits when pause hours exceed the day either way) does not
+invalidate what depends on it.
+
+The nodes apply the same operations in the same order as
+`cost_engine.project`, so results are bit for bit equal to `estimate`.
+"""
+from collections import Counter
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Callable, Tuple
+
+import numpy as np
+
+from cost_engine import (
+    MONTHS_PER_YEAR,
+    CostEstimate,
+    compound_by_month,
+    compute_growth_factors,
+    discount_factor,
+    monthly_base_credits,
+    optimized_monthly_base_credits,
+)
+
+
+@dataclass(frozen=True)
+class Node:
+    """A derived value and the inputs or nodes it is computed from."""
+    name: str
+    depends_on: Tuple[str, ...]
+    compute: Callable  # (*values of depends_on) -> value
+
+
+def _node(name, depends_on, compute):
+    return Node(name, tuple(depends_on.split()), compute)
+
+
+def _base_credits(num_vws, vw_size, hours_per_day, active_days_per_month, use_gen2):
+    return monthly_base_credits(SimpleNamespace(
+        num_vws=num_vws, vw_size=vw_size, hours_per_day=hours_per_day,
+        active_days_per_month=active_days_per_month, use_gen2=use_gen2,
+    ))
+
+
+def _optimized_base_credits(num_vws, optimized_vw_size, hours_per_day, pause_hours_per_day, active_days_per_month, use_gen2):
+    return optimized_monthly_base_credits(SimpleNamespace(
+        num_vws=num_vws, optimized_vw_size=optimized_vw_size, hours_per_day=hours_per_day,
+        pause_hours_per_day=pause_hours_per_day, active_days_per_month=active_days_per_month, use_gen2=use_gen2,
+    ))
+
+
+ESTIMATE_GRAPH = (
+    _node("base_credits", "num_vws vw_size hours_per_day active_days_per_month use_gen2", _base_credits),
+    _node("optimized_vw_size", "vw_size reduce_vw_size",
+          lambda vw_size, reduce_vw_size: vw_size if reduce_vw_size == "No Change" else reduce_vw_size),
+    _node("optimized_base_credits",
+          "num_vws optimized_vw_size hours_per_day pause_hours_per_day active_days_per_month use_gen2",
+          _optimized_base_credits),
+    _node("compute_growth_factor", "compute_growth", compute_growth_factors),
+    _node("storage_tb_by_month", "storage_tb storage_growth", compound_by_month),
+    _node("transfer_tb_by_month", "data_transfer_tb transfer_growth", compound_by_month),
+    _node("base_factor", "discount_pct", discount_factor),
+    _node("optimized_factor", "discount_pct additional_discount",
+          lambda discount_pct, additional_discount: discount_factor(discount_pct + additional_discount)),
+    _node("compute_costs", "base_credits credit_cost compute_growth_factor base_factor",
+          lambda credits, credit_cost, growth, factor: credits * credit_cost * growth * factor),
+    _node("storage_costs", "storage_tb_by_month storage_cost_per_tb base_factor",
+          lambda tb, rate, factor: tb * rate * factor),
+    _node("transfer_costs", "transfer_tb_by_month transfer_cost_per_tb base_factor",
+          lambda tb, rate, factor: tb * rate * factor),
+    _node("optimized_compute_costs", "optimized_base_credits credit_cost compute_growth_factor optimized_factor",
+          lambda credits, credit_cost, growth, factor: credits * credit_cost * growth * factor),
+    _node("optimized_storage_costs", "storage_costs optimized_factor", lambda costs, factor: costs * factor),
+    _node("optimized_transfer_costs", "transfer_costs optimized_factor", lambda costs, factor: costs * factor),
+    _node("annual_credits", "base_credits", lambda credits: credits * MONTHS_PER_YEAR),
+    _node("avg_storage_tb", "storage_tb_by_month", lambda tb: tb.mean()),
+    _node("estimate", " ".join(CostEstimate.__dataclass_fields__), CostEstimate),
+)
+
+
+def _same(old, new):
+    """Equal scalars (inputs, credits, factors). Arrays and results count as changed: comparing them costs about as much as recomputing."""
+    if type(old) is not type(new) or isinstance(new, (np.ndarray, CostEstimate)):
+        return False
+    return bool(old == new)
+
+
+class IncrementalEstimate:
+    """Per-session `estimate` that only recomputes nodes invalidated since the previous rerun."""
+
+    def __init__(self, state, key="_estimate_graph", graph=ESTIMATE_GRAPH):
+        if key not in state:
+            state[key] = {"values": {}, "pinned": frozenset(), "recomputes": Counter()}
+        self._store = state[key]
+        self.graph = graph
+        self.recomputed = []
+
+    @property
+    def recompute_counts(self):
+        """How many times each node has been computed in this session."""
+        return dict(self._store["recomputes"])
+
+    def evaluate(self, sources):
+        """
+        Bring every node up to date with `sources` (input name -> value). A
+        source named like a node pins that node to the given value instead
+        of computing it; fleets pin their base credits this way.
+        """
+        values = self._store["values"]
+        changed = {name for name, value in sources.items() if name not in values or not _same(values[name], value)}
+        values.update(sources)
+        unpinned = self._store["pinned"] - sources.keys()
+        self._store["pinned"] = frozenset(node.name for node in self.graph if node.name in sources)
+
+        self.recomputed = []
+        for node in self.graph:
+            if node.name in sources:
+                continue
+            if node.name in values and node.name not in unpinned and changed.isdisjoint(node.depends_on):
+                continue
+            value = node.compute(*(values[name] for name in node.depends_on))
+            self._store["recomputes"][node.name] += 1
+            self.recomputed.append(node.name)
+            if node.name not in values or not _same(values[node.name], value):
+                changed.add(node.name)
+            values[node.name] = value
+        return values
+
+    def estimate(self, inputs, base_credits=None, optimized_base_credits=None):
+        """`cost_engine.estimate(inputs)`, or `project(inputs, base_credits, optimized_base_credits)`"""
+        sources = dict(vars(inputs))
+        if base_credits is not None:
+            sources.update(base_credits=base_credits, optimized_base_credits=optimized_base_credits)
+        return self.evaluate(sources)["estimate"]
@@ -0,0 +1,238 @@
+"""
+Calibration from WAREHOUSE_METERING_HISTORY exports.
+
+Reads a CSV export of SNOWFLAKE.ACCOUNT_USAGE.WAREHOUSE_METERING_HISTORY
+(one row per warehouse per hour) in chunks, so memory is bounded by the
+chunk size and the per warehouse x day aggregates, never by the file.
+Each chunk is reduced with vectorized group-bys to credits and active hours
+per warehouse per day plus an hour-of-day credit profile (rows without a
+start time or warehouse are dropped and counted); the resulting
+`MeteringProfile` derives the page inputs (warehouse count, size, hours per
+day, active days per month) and the observed monthly compute growth.
+
+    profile = read_metering_history("metering_history.csv")
+    profile.calibrated_defaults()   # {"vws": 12, "size": "Medium", "hours": 9, "days": 21}
+"""
+import hashlib
+from dataclasses import dataclass
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+from cost_engine import WAREHOUSE_SIZES, size_credit_mapping
+
+DEFAULT_CHUNK_ROWS = 500_000
+HOURS_PER_DAY = 24
+DAYS_PER_MONTH = 365.25 / 12
+REQUIRED_COLUMNS = ("START_TIME", "WAREHOUSE_NAME", "CREDITS_USED")
+OPTIONAL_COLUMNS = ("CREDITS_USED_COMPUTE",)
+
+# Page widget ranges the calibrated values are clamped to
+MAX_WAREHOUSES = 20
+MAX_MONTHLY_GROWTH = 50
+SIZE_CREDITS_LOG2 = np.log2([size_credit_mapping[size] for size in WAREHOUSE_SIZES])
+
+
+def nearest_size_codes(credits_per_hour):
+    """Size codes (positions in WAREHOUSE_SIZES) whose hourly credit rate is closest in ratio; 0 for no usage"""
+    rate = np.asarray(credits_per_hour, dtype=float)
+    distance = np.abs(np.log2(np.where(rate > 0, rate, 1.0))[..., None] - SIZE_CREDITS_LOG2)
+    return np.where(rate > 0, np.argmin(distance, axis=-1), 0)
+
+
+@dataclass(frozen=True)
+class MeteringProfile:
+    """Per warehouse x day aggregates of a metering-history export."""
+    warehouses: Tuple[str, ...]
+    days: np.ndarray                # datetime64[D], every calendar day from first to last row
+    daily_credits: np.ndarray       # (warehouses, days) compute credits
+    daily_active_hours: np.ndarray  # (warehouses, days) hours with credits > 0
+    hourly_profile: np.ndarray      # (warehouses, 24) compute credits by hour of day
+    rows: int
+    dropped_rows: int = 0           # rows without a START_TIME or WAREHOUSE_NAME
+
+    @property
+    def total_credits(self):
+        return float(self.daily_credits.sum())
+
+    @property
+    def active_warehouses(self):
+        return int(np.count_nonzero(self.daily_credits.sum(axis=1)))
+
+    @property
+    def months_observed(self):
+        return len(self.days) / DAYS_PER_MONTH
+
+    @property
+    def num_vws(self):
+        return min(max(self.active_warehouses, 1), MAX_WAREHOUSES)
+
+    @property
+    def hours_per_day(self):
+        """Mean active hours on days a warehouse ran at all"""
+        active_days = np.count_nonzero(self.daily_active_hours)
+        if not active_days:
+            return 1
+        return int(np.clip(round(self.daily_active_hours.sum() / active_days), 1, HOURS_PER_DAY))
+
+    @property
+    def active_days_per_month(self):
+        """Days per month an average active warehouse ran"""
+        if not self.active_warehouses:
+            return 1
+        days = np.count_nonzero(self.daily_active_hours) / self.active_warehouses / self.months_observed
+        return int(np.clip(round(days), 1, 31))
+
+    @property
+    def credits_per_hour(self):
+        """Observed credits per active warehouse-hour"""
+        active_hours = self.daily_active_hours.sum()
+        return self.total_credits / active_hours if active_hours else 0.0
+
+    @property
+    def vw_size(self):
+        """Warehouse size whose hourly credit rate is closest (in ratio) to the observed rate"""
+        return WAREHOUSE_SIZES[int(nearest_size_codes(self.credits_per_hour))]
+
+    def monthly_daily_credits(self):
+        """(months, average credits per observed day) per calendar month"""
+        months = self.days.astype("datetime64[M]")
+        labels, index = np.unique(months, return_inverse=True)
+        credits = np.bincount(index, weights=self.daily_credits.sum(axis=0))
+        return labels, credits / np.bincount(index)
+
+    @property
+    def compute_growth(self):
+        """
+        Observed month-over-month compute growth in percent, from a log-linear
+        fit of average daily credits per calendar month; None with fewer than
+        two months or no usage.
+        """
+        _, credits = self.monthly_daily_credits()
+        if len(credits) < 2 or (credits <= 0).any():
+            return None
+        slope = np.polyfit(np.arange(len(credits)), np.log(credits), 1)[0]
+        return int(np.clip(round(np.expm1(slope) * 100), 0, MAX_MONTHLY_GROWTH))
+
+    def calibrated_defaults(self):
+        """Overrides for a `template_defaults` entry"""
+        return {
+            "vws": self.num_vws,
+            "size": self.vw_size,
+            "hours": self.hours_per_day,
+            "days": self.active_days_per_month,
+        }
+
+
+def file_digest(source, block_size=1 << 20):
+    """blake2b of a path or binary file-like object, read in blocks"""
+    digest = hashlib.blake2b(digest_size=16)
+    if hasattr(source, "read"):
+        source.seek(0)
+        for block in iter(lambda: source.read(block_size), b""):
+            digest.update(block)
+        source.seek(0)
+    else:
+        with open(source, "rb") as f:
+            for block in iter(lambda: f.read(block_size), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def _parse_hours(start_time):
+    """Epoch hours of START_TIME strings, parsing each distinct timestamp once"""
+    codes, uniques = pd.factorize(start_time)
+    # Exports carry the session offset ("2024-01-01 00:00:00.000 -0800"); keep the wall-clock hour
+    hours = pd.to_datetime(pd.Series(uniques).astype(str).str.slice(0, 13), format="%Y-%m-%d %H")
+    return hours.to_numpy().astype("datetime64[h]").astype(np.int64)[codes]
+
+
+def read_metering_chunks(source, name=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    (DataFrame, dropped rows) pairs of a WAREHOUSE_METERING_HISTORY CSV (path
+    or file-like, optionally gzipped), `chunk_rows` rows at a time, with
+    upper-case column names. Rows without a START_TIME or WAREHOUSE_NAME are
+    dropped from the frame and counted; a blank CREDITS_USED is left for the
+    caller to read as 0.
+    """
+    name = str(name or source)
+    if hasattr(source, "seek"):
+        source.seek(0)  # an upload another reader already went through
+    reader = pd.read_csv(
+        source,
+        usecols=lambda column: column.strip().upper() in REQUIRED_COLUMNS + OPTIONAL_COLUMNS,
+        chunksize=chunk_rows,
+        compression="gzip" if name.endswith(".gz") else None,
+    )
+    for chunk in reader:
+        chunk.columns = [column.strip().upper() for column in chunk.columns]
+        missing = [column for column in REQUIRED_COLUMNS if column not in chunk]
+        if missing:
+            raise ValueError(f"Not a WAREHOUSE_METERING_HISTORY export: missing {', '.join(missing)}")
+        rows = len(chunk)
+        chunk = chunk.dropna(subset=["START_TIME", "WAREHOUSE_NAME"])
+        yield chunk, rows - len(chunk)
+
+
+def read_metering_history(source, name=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Aggregate a WAREHOUSE_METERING_HISTORY CSV (path or file-like, optionally
+    gzipped) into a `MeteringProfile`, `chunk_rows` rows at a time.
+    """
+    warehouse_codes = {}
+    daily_parts = []
+    hourly_profile = np.zeros((0, HOURS_PER_DAY))
+    rows = dropped_rows = 0
+    for chunk, dropped in read_metering_chunks(source, name, chunk_rows):
+        dropped_rows += dropped
+        if chunk.empty:
+            continue
+        for warehouse in chunk["WAREHOUSE_NAME"].unique():
+            warehouse_codes.setdefault(warehouse, len(warehouse_codes))
+        codes = chunk["WAREHOUSE_NAME"].map(warehouse_codes).to_numpy()
+        hours = _parse_hours(chunk["START_TIME"])
+        credit_column = "CREDITS_USED_COMPUTE" if "CREDITS_USED_COMPUTE" in chunk else "CREDITS_USED"
+        credits = chunk[credit_column].fillna(0).to_numpy(dtype=float)
+
+        daily_parts.append(
+            pd.DataFrame({
+                "warehouse": codes,
+                "day": hours // HOURS_PER_DAY,
+                "credits": credits,
+                "active_hours": (credits > 0).astype(np.int64),
+            }).groupby(["warehouse", "day"], sort=False).sum()
+        )
+
+        if len(warehouse_codes) > len(hourly_profile):
+            hourly_profile = np.vstack([hourly_profile, np.zeros((len(warehouse_codes) - len(hourly_profile), HOURS_PER_DAY))])
+        hourly_profile += np.bincount(
+            codes * HOURS_PER_DAY + hours % HOURS_PER_DAY,
+            weights=credits,
+            minlength=hourly_profile.size,
+        ).reshape(hourly_profile.shape)
+        rows += len(chunk)
+
+    if not rows:
+        raise ValueError("Metering history export has no rows with a start time and warehouse")
+
+    # Days split across chunks are merged here; the result is warehouses x days, not rows
+    daily = pd.concat(daily_parts).groupby(level=["warehouse", "day"]).sum()
+    warehouse = daily.index.get_level_values("warehouse").to_numpy()
+    day = daily.index.get_level_values("day").to_numpy()
+    first_day = day.min()
+    shape = (len(warehouse_codes), day.max() - first_day + 1)
+    daily_credits = np.zeros(shape)
+    daily_active_hours = np.zeros(shape, dtype=np.int64)
+    daily_credits[warehouse, day - first_day] = daily["credits"].to_numpy()
+    daily_active_hours[warehouse, day - first_day] = daily["active_hours"].to_numpy()
+
+    return MeteringProfile(
+        warehouses=tuple(str(warehouse) for warehouse in warehouse_codes),
+        days=np.arange(first_day, first_day + shape[1]).astype("datetime64[D]"),
+        daily_credits=daily_credits,
+        daily_active_hours=daily_active_hours,
+        hourly_profile=hourly_profile,
+        rows=rows,
+        dropped_rows=dropped_rows,
+    )
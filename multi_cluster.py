@@ -0,0 +1,355 @@
+"""
+Multi-cluster warehouse simulation from query history.
+
+`cost_engine` prices scale-out as `num_vws` times the credits of one
+warehouse, which says nothing about how many clusters a multi-cluster
+warehouse actually runs for a given load or how long its queries queue.
+`simulate_clusters` replays the queries of one warehouse through a
+discrete-event model of multi-cluster scaling:
+
+- each running cluster executes up to `max_concurrency` queries at once; a
+  query that finds every slot taken waits in one first-in, first-out queue
+- the standard policy starts another cluster as soon as a query queues, the
+  economy policy only once the queue holds enough work to keep a new
+  cluster busy for 6 minutes; successive starts are at least 20 s apart
+- once a minute the load is checked; after 2 (standard) or 6 (economy)
+  checks in a row on which one cluster fewer could carry it, the
+  least-loaded cluster takes no more queries and shuts down when its
+  running queries finish
+- after `auto_suspend` seconds with nothing running or queued the warehouse
+  suspends; the next query resumes it with `min_clusters` clusters
+
+Each cluster bills per second from its start to its shutdown, at least
+60 s per start. A started cluster takes queries at once, and a query runs
+as long as it did in the export however busy its cluster is.
+
+    workload = read_query_workload("query_history.parquet")
+    arrival, service = workload.queries("ANALYTICS_WH")
+    result = simulate_clusters(arrival, service, ClusterPolicy(size="Large", max_clusters=4))
+    result.credits, result.queue_percentiles()    # 812.4, array([0., 0., 3.2])
+    cluster_tradeoffs(arrival, service, ClusterPolicy(size="Large"))  # credits vs queueing per cluster limit
+
+The event loop walks the arrivals in order and keeps running queries in
+one heap of (finish time, cluster), with queries held in flat lists rather
+than objects, so a day of a million queries simulates in a few seconds.
+"""
+import heapq
+from collections import deque
+from dataclasses import dataclass, replace
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from auto_suspend import DEFAULT_CHUNK_ROWS, MIN_BILLED_SECONDS, parse_timestamps, read_query_history_chunks
+from cost_engine import size_credit_mapping
+
+SCALING_POLICIES = ["standard", "economy"]
+MAX_CLUSTERS = 10
+MAX_CONCURRENCY = 8           # Snowflake's default MAX_CONCURRENCY_LEVEL
+CLUSTER_START_SPACING = 20    # seconds between successive cluster starts
+SCALE_IN_CHECK_SECONDS = 60
+SCALE_IN_CHECKS = {"standard": 2, "economy": 6}  # consecutive light checks before a cluster shuts down
+ECONOMY_BUSY_SECONDS = 360    # queued work per slot the economy policy waits for before starting a cluster
+QUEUE_PERCENTILES = (50, 90, 99)
+QUEUED_OVERLOAD_COLUMN = "QUEUED_OVERLOAD_TIME"  # ms a query waited for a free slot
+
+_INF = float("inf")
+_STOPPED, _OPEN, _DRAINING = 0, 1, 2
+
+
+@dataclass(frozen=True)
+class ClusterPolicy:
+    """Multi-cluster settings of one warehouse; `auto_suspend` None never suspends."""
+    size: str = "Medium"
+    min_clusters: int = 1
+    max_clusters: int = 1
+    scaling_policy: str = "standard"
+    max_concurrency: int = MAX_CONCURRENCY
+    auto_suspend: Optional[float] = 600  # seconds
+
+    def __post_init__(self):
+        if self.size not in size_credit_mapping:
+            raise ValueError(f"Unknown warehouse size: {self.size}")
+        if self.scaling_policy not in SCALE_IN_CHECKS:
+            raise ValueError(f"Unknown scaling policy {self.scaling_policy!r}; expected one of {', '.join(SCALING_POLICIES)}")
+        if not 1 <= self.min_clusters <= self.max_clusters <= MAX_CLUSTERS:
+            raise ValueError(f"Cluster counts must satisfy 1 <= min_clusters <= max_clusters <= {MAX_CLUSTERS}")
+        if self.max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+
+@dataclass(frozen=True)
+class ClusterResult:
+    """One simulated workload under one `ClusterPolicy`."""
+    policy: ClusterPolicy
+    queue_seconds: np.ndarray  # per query, in arrival order
+    cluster_seconds: float     # billed, at least 60 s per cluster start
+    cluster_starts: int
+    resumes: int
+    peak_clusters: int
+
+    @property
+    def credits(self):
+        return self.cluster_seconds / 3600 * size_credit_mapping[self.policy.size]
+
+    def queued_share(self):
+        """Share of queries that waited for a slot"""
+        return float((self.queue_seconds > 0).mean()) if len(self.queue_seconds) else 0.0
+
+    def queue_percentiles(self, percentiles=QUEUE_PERCENTILES):
+        """Queue seconds at each percentile over all queries"""
+        if not len(self.queue_seconds):
+            return np.zeros(len(percentiles))
+        return np.percentile(self.queue_seconds, percentiles)
+
+    def summary(self):
+        """The row `cluster_tradeoffs` shows for this run"""
+        row = {
+            "Scaling policy": self.policy.scaling_policy,
+            "Clusters (min-max)": f"{self.policy.min_clusters}-{self.policy.max_clusters}",
+            "Credits": self.credits,
+            "Peak clusters": self.peak_clusters,
+            "Queued share": self.queued_share(),
+        }
+        for percentile, seconds in zip(QUEUE_PERCENTILES, self.queue_percentiles()):
+            row[f"P{percentile} queue (s)"] = seconds
+        return row
+
+
+def simulate_clusters(arrival, service, policy=ClusterPolicy()):
+    """
+    Replay queries arriving at `arrival` (seconds, ascending) and running
+    for `service` seconds on a warehouse with `policy`.
+    """
+    arrival = np.asarray(arrival, dtype=float)
+    if len(arrival) > 1 and (arrival[1:] < arrival[:-1]).any():
+        raise ValueError("Arrivals must be in ascending order")
+    arrivals = arrival.tolist()
+    services = np.maximum(np.asarray(service, dtype=float), 0.0).tolist()
+    n = len(arrivals)
+    waits = [0.0] * n
+
+    slots = policy.max_concurrency
+    min_clusters, max_clusters = policy.min_clusters, policy.max_clusters
+    economy = policy.scaling_policy == "economy"
+    checks_to_shut_down = SCALE_IN_CHECKS[policy.scaling_policy]
+    suspend_after = _INF if policy.auto_suspend is None else float(policy.auto_suspend)
+    minimum = float(MIN_BILLED_SECONDS)
+
+    state = [_STOPPED] * max_clusters
+    running = [0] * max_clusters     # queries running per cluster
+    started = [0.0] * max_clusters   # when each cluster that is up started
+    open_clusters = []               # clusters taking queries
+    finishes = []                    # heap of (finish time, cluster)
+    queue = deque()                  # waiting queries
+    queued_work = 0.0                # their service seconds
+    billed = 0.0
+    starts = resumes = peak = up = 0
+    busy = 0                         # queries running on all clusters
+    suspended = True
+    idle_since = _INF                # nothing running or queued since
+    next_check = _INF                # next scale-in check
+    next_start = _INF                # a cluster start held back by the spacing
+    last_start = -_INF
+    light_checks = 0
+    now = 0.0
+    i = 0
+
+    while True:
+        t_arrival = arrivals[i] if i < n else _INF
+        t_finish = finishes[0][0] if finishes else _INF
+        t_suspend = idle_since + suspend_after
+        t = min(t_arrival, t_finish, t_suspend, next_start)
+        if t == _INF:
+            break
+        if next_check < t:
+            # Scale in: could the open clusters but one carry what they run?
+            now = next_check
+            next_check += SCALE_IN_CHECK_SECONDS
+            load = sum(running[c] for c in open_clusters)
+            if len(open_clusters) > min_clusters and not queue and load <= (len(open_clusters) - 1) * slots:
+                light_checks += 1
+                if light_checks >= checks_to_shut_down:
+                    light_checks = 0
+                    c = min(open_clusters, key=running.__getitem__)
+                    open_clusters.remove(c)
+                    if running[c]:
+                        state[c] = _DRAINING
+                    else:
+                        state[c] = _STOPPED
+                        billed += max(now - started[c], minimum)
+                        up -= 1
+            else:
+                light_checks = 0
+            continue
+        now = t
+
+        if t_finish == t:
+            c = heapq.heappop(finishes)[1]
+            busy -= 1
+            running[c] -= 1
+            if state[c] == _OPEN:
+                if queue:
+                    q = queue.popleft()
+                    queued_work -= services[q]
+                    waits[q] = t - arrivals[q]
+                    running[c] += 1
+                    busy += 1
+                    heapq.heappush(finishes, (t + services[q], c))
+            elif not running[c]:
+                state[c] = _STOPPED
+                billed += max(t - started[c], minimum)
+                up -= 1
+            if not busy and not queue:
+                idle_since = t
+            continue
+
+        if t_arrival == t:
+            q = i
+            i += 1
+            idle_since = _INF
+            if suspended:
+                suspended = False
+                resumes += 1
+                for c in range(min_clusters):
+                    state[c] = _OPEN
+                    started[c] = t
+                    open_clusters.append(c)
+                starts += min_clusters
+                up = min_clusters
+                peak = max(peak, up)
+                last_start = t
+                next_check = t + SCALE_IN_CHECK_SECONDS
+                light_checks = 0
+            c = open_clusters[0] if len(open_clusters) == 1 else min(open_clusters, key=running.__getitem__)
+            if running[c] < slots and not queue:
+                running[c] += 1
+                busy += 1
+                heapq.heappush(finishes, (t + services[q], c))
+                continue
+            queue.append(q)
+            queued_work += services[q]
+        elif t_suspend == t:
+            for c in open_clusters:
+                state[c] = _STOPPED
+                billed += max(t - started[c], minimum)
+            open_clusters = []
+            up = 0
+            suspended = True
+            idle_since = next_check = next_start = _INF
+            continue
+        else:
+            next_start = _INF
+
+        # Scale out: start (or keep) a cluster for the queue, at most one per spacing
+        if (
+            queue and len(open_clusters) < max_clusters and next_start == _INF
+            and (not economy or queued_work >= ECONOMY_BUSY_SECONDS * slots)
+        ):
+            if t < last_start + CLUSTER_START_SPACING:
+                next_start = last_start + CLUSTER_START_SPACING
+                continue
+            c = next((c for c in range(max_clusters) if state[c] == _DRAINING), None)
+            if c is None:
+                c = state.index(_STOPPED)
+                started[c] = t
+                starts += 1
+                up += 1
+                peak = max(peak, up)
+            state[c] = _OPEN
+            open_clusters.append(c)
+            last_start = t
+            light_checks = 0
+            while queue and running[c] < slots:
+                q = queue.popleft()
+                queued_work -= services[q]
+                waits[q] = t - arrivals[q]
+                running[c] += 1
+                busy += 1
+                heapq.heappush(finishes, (t + services[q], c))
+            if queue and len(open_clusters) < max_clusters:
+                next_start = t + CLUSTER_START_SPACING
+
+    # Never suspended: clusters still up bill until the last query finished
+    for c in range(max_clusters):
+        if state[c] != _STOPPED:
+            billed += max(now - started[c], minimum)
+
+    return ClusterResult(
+        policy=policy,
+        queue_seconds=np.array(waits),
+        cluster_seconds=billed,
+        cluster_starts=starts,
+        resumes=resumes,
+        peak_clusters=peak,
+    )
+
+
+def cluster_tradeoffs(arrival, service, policy=ClusterPolicy(), max_clusters=None, scaling_policies=SCALING_POLICIES):
+    """
+    Credits against queueing: `policy` simulated for each maximum cluster
+    count in `max_clusters` (default: `policy.min_clusters` to MAX_CLUSTERS)
+    under each scaling policy, one row per run.
+    """
+    if max_clusters is None:
+        max_clusters = range(policy.min_clusters, MAX_CLUSTERS + 1)
+    rows = [
+        simulate_clusters(arrival, service, replace(policy, max_clusters=limit, scaling_policy=scaling)).summary()
+        for scaling in scaling_policies
+        for limit in max_clusters
+    ]
+    return pd.DataFrame(rows)
+
+
+@dataclass(frozen=True, eq=False)
+class QueryWorkload:
+    """Queries of every warehouse in a query history, sorted by warehouse then arrival."""
+    warehouses: Tuple[str, ...]
+    warehouse: np.ndarray  # int32 code (position in warehouses) per query
+    arrival: np.ndarray    # int64 epoch ms, UTC
+    service: np.ndarray    # int32 ms on the warehouse, without queueing for a slot
+
+    def __len__(self):
+        return len(self.arrival)
+
+    def query_counts(self):
+        return np.bincount(self.warehouse, minlength=len(self.warehouses))
+
+    def queries(self, warehouse):
+        """(arrival seconds after the warehouse's first query, service seconds) of one warehouse"""
+        code = self.warehouses.index(warehouse)
+        lo, hi = np.searchsorted(self.warehouse, [code, code + 1])
+        arrival = self.arrival[lo:hi]
+        return (arrival - arrival[0]) / 1000, self.service[lo:hi] / 1000
+
+
+def read_query_workload(source, name=None, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    The queries of a QUERY_HISTORY export (as read by
+    `auto_suspend.read_query_trace`) as arrivals and service times. A
+    query's service time is END_TIME - START_TIME, less QUEUED_OVERLOAD_TIME
+    when the export has it, since the simulation does its own queueing.
+    """
+    warehouse_codes = {}
+    parts = []
+    for chunk in read_query_history_chunks(source, name, chunk_rows, optional=(QUEUED_OVERLOAD_COLUMN,)):
+        for warehouse in chunk["WAREHOUSE_NAME"].unique():
+            warehouse_codes.setdefault(warehouse, len(warehouse_codes))
+        codes = chunk["WAREHOUSE_NAME"].map(warehouse_codes).to_numpy(dtype=np.int32)
+        start = parse_timestamps(chunk["START_TIME"])
+        service = parse_timestamps(chunk["END_TIME"]) - start
+        if QUEUED_OVERLOAD_COLUMN in chunk:
+            service -= chunk[QUEUED_OVERLOAD_COLUMN].fillna(0).to_numpy(dtype=np.int64)
+        parts.append((codes, start, np.clip(service, 0, np.iinfo(np.int32).max).astype(np.int32)))
+
+    if not parts:
+        raise ValueError("Query history export has no queries with a warehouse")
+    warehouse, arrival, service = (np.concatenate(column) for column in zip(*parts))
+    order = np.lexsort((arrival, warehouse))
+    return QueryWorkload(
+        warehouses=tuple(str(warehouse) for warehouse in warehouse_codes),
+        warehouse=warehouse[order],
+        arrival=arrival[order],
+        service=service[order],
+    )
@@ -0,0 +1,370 @@
+"""
+Automatic optimization of the "Optimization Settings" sidebar values.
+
+Searches downsize targets and auto-pause hours for the cheapest
+configuration that still delivers a capacity floor, priced over the
+projection horizon, and returns the Pareto frontier of cost versus
+delivered capacity, drawn through the cheapest configurations at floors of
+10%, 20%, ... 100%. A single configuration is one group of `num_vws`
+identical warehouses; a fleet is split into groups of identical warehouses
+(same size, hours, active days and Gen 2 flag) and each group gets its own
+target size and auto-pause hours.
+
+Capacity is measured in nominal credit-hours per year
+(warehouses x credits/hour x running hours x active days x 12), i.e. the
+compute delivered before any Gen 2 efficiency is applied.
+
+The additional discount is not searched: it never changes capacity and
+always lowers cost, so the cheapest configuration always takes its ceiling.
+For fixed account settings the optimized cost rises with the optimized
+monthly credits, so the search compares credits and only the
+configurations it keeps are priced with `evaluate_totals`.
+
+The search is a depth-first branch and bound over the groups:
+  * each group keeps only its (target size, pause hours) options that are
+    not dominated on (capacity, credits);
+  * a partial setting is dropped when the largest options left cannot
+    reach the floor, or when a lower bound on its credits (the cheapest
+    option of every group left, plus the missing capacity at the lowest
+    credits per capacity of any upgrade left) is no better than the best
+    configuration found so far;
+  * the first incumbent is the greedy solution of the relaxed problem:
+    each group's upgrades along the lower convex hull of its options, taken
+    across groups from the lowest credits per capacity up until the floor
+    is met. The same upgrades with the last one taken fractionally give a
+    lower bound on the credits of any configuration, so an incumbent at
+    that bound ends the search;
+  * the search stops after `max_nodes` partial settings and keeps the best
+    configuration found, reported with its gap to the lower bound.
+"""
+from dataclasses import dataclass, replace
+from math import prod
+
+import numpy as np
+
+from cost_engine import (
+    GEN2_EFFICIENCY,
+    GEN2_PAUSE_EFFICIENCY,
+    MONTHS_PER_YEAR,
+    WAREHOUSE_SIZES,
+    gen2_scaling_discount,
+    monthly_base_credits,
+    size_credit_mapping,
+)
+from fleet import fleet_base_credits
+from scenario_sweep import NO_CHANGE, SCENARIO_FIELDS, SIZE_CREDITS, evaluate_totals
+
+MAX_PAUSE_HOURS = 12  # Upper bound of the "Auto-Pause Hours Per Day" input
+MAX_SEARCH_NODES = 20_000  # partial settings explored per capacity floor
+FRONTIER_FLOORS_PCT = tuple(range(10, 101, 10))  # floors whose cheapest configurations draw the frontier
+
+
+def annual_capacity(num_vws, size_credits, effective_hours, active_days_per_month):
+    """Nominal credit-hours delivered per year."""
+    return num_vws * size_credits * effective_hours * active_days_per_month * MONTHS_PER_YEAR
+
+
+def current_capacity(inputs, fleet=None):
+    if fleet is not None:
+        monthly = SIZE_CREDITS[fleet.size_code] * fleet.hours_per_day * fleet.active_days.astype(np.int64)
+        return float(monthly.sum() * MONTHS_PER_YEAR)
+    return annual_capacity(inputs.num_vws, size_credit_mapping[inputs.vw_size], inputs.hours_per_day, inputs.active_days_per_month)
+
+
+@dataclass(frozen=True)
+class OptimizationResult:
+    """Cheapest feasible configuration plus the cost/capacity frontier."""
+    best: object                 # CostInputs with the chosen optimization settings
+    best_fleet: object           # the fleet with each group's chosen settings, or None
+    best_cost: float             # optimized cost over `months`
+    best_capacity: float
+    current_capacity: float
+    frontier_capacity: np.ndarray
+    frontier_cost: np.ndarray
+    frontier_labels: list        # settings of each frontier point, for hover text
+    months: int
+    evaluated: int               # distinct complete configurations reached by the searches
+    nodes: int                   # partial settings explored
+    search_space: int            # configurations an exhaustive search would price
+    exhaustive: bool             # False when the node budget ran out first
+    gap: float                   # credits of the best configuration above the lower bound, as a fraction; 0 if exhaustive
+
+
+@dataclass(frozen=True)
+class _Group:
+    """Non-dominated options of one group of identical warehouses, by ascending capacity"""
+    capacity: np.ndarray         # monthly nominal credit-hours of the whole group
+    credits: np.ndarray          # monthly optimized credits of the whole group
+    target: np.ndarray           # size code
+    pause: np.ndarray            # auto-pause hours
+    options: int                 # options before pruning
+
+
+def pareto_frontier(capacity, cost):
+    """Indices of the points not dominated on (higher capacity, lower cost), by descending capacity."""
+    order = np.lexsort((cost, -capacity))
+    best_cost = np.minimum.accumulate(cost[order])
+    keep = np.r_[True, cost[order][1:] < best_cost[:-1]]
+    return order[keep]
+
+
+def _warehouse_groups(inputs, fleet):
+    """(size code, hours, active days, Gen 2, warehouse count) per group, and each warehouse's group"""
+    if fleet is None:
+        group = np.array([[WAREHOUSE_SIZES.index(inputs.vw_size), inputs.hours_per_day, inputs.active_days_per_month, inputs.use_gen2]])
+        return group, np.array([inputs.num_vws]), None
+    keys = np.column_stack([fleet.size_code, fleet.hours_per_day, fleet.active_days, fleet.gen2]).astype(np.int64)
+    groups, inverse, counts = np.unique(keys, axis=0, return_inverse=True, return_counts=True)
+    return groups, counts, inverse.ravel()
+
+
+def _group_options(size, hours, days, gen2, count, scaling):
+    """Every downsize target and pause length of a group, reduced to the non-dominated ones"""
+    target, pause = np.meshgrid(np.arange(size + 1), np.arange(min(MAX_PAUSE_HOURS, hours) + 1), indexing="ij")
+    target, pause = target.ravel(), pause.ravel()
+    capacity = count * SIZE_CREDITS[target] * (hours - pause) * days
+    # Same operation order as the page's optimized base credits
+    credits = capacity.astype(float)
+    if gen2:
+        credits = credits * GEN2_EFFICIENCY * scaling
+        credits = np.where(pause > 0, credits * GEN2_PAUSE_EFFICIENCY, credits)
+    keep = pareto_frontier(capacity, credits)[::-1]
+    return _Group(capacity[keep], credits[keep], target[keep], pause[keep], len(target))
+
+
+def _hull(group):
+    """Option indices on the lower convex hull of a group's (capacity, credits), from its cheapest option"""
+    c, w = group.capacity, group.credits
+    hull = [0]
+    for j in range(1, len(c)):
+        while len(hull) >= 2:
+            a, b = hull[-2], hull[-1]
+            if (w[b] - w[a]) * (c[j] - c[b]) < (w[j] - w[b]) * (c[b] - c[a]):
+                break
+            hull.pop()
+        hull.append(j)
+    return hull
+
+
+def _upgrades(groups):
+    """(credits per capacity, group, option index, capacity step) of every hull upgrade, cheapest rate first"""
+    steps = []
+    for g, group in enumerate(groups):
+        hull = _hull(group)
+        for a, b in zip(hull, hull[1:]):
+            step = int(group.capacity[b] - group.capacity[a])
+            steps.append(((group.credits[b] - group.credits[a]) / step, g, b, step))
+    return sorted(steps)
+
+
+def _greedy(groups, upgrades, floor):
+    """
+    (option index per group, lower bound on credits) from the upgrades in
+    order until the floor is met; (None, inf) if it is out of reach.
+    """
+    pick = [0] * len(groups)
+    total = sum(int(group.capacity[0]) for group in groups)
+    bound = sum(float(group.credits[0]) for group in groups)
+    for rate, g, j, step in upgrades:
+        if total >= floor:
+            break
+        bound += rate * min(step, floor - total)
+        total += step
+        pick[g] = j
+    return (tuple(pick), bound) if total >= floor else (None, np.inf)
+
+
+@dataclass(frozen=True)
+class _Tables:
+    """Options as lists and bounds over the groups from each depth on, shared by the searches at every floor"""
+    capacity: list
+    credits: list
+    max_left: list               # largest capacity of the groups from depth k on
+    min_left: list               # smallest capacity ...
+    credits_left: list           # credits of their cheapest options
+    rate_left: list              # lowest credits per capacity of any of their upgrades
+    upgrades: list
+
+
+def _tables(groups):
+    n = len(groups)
+    max_left, min_left, credits_left = [0] * (n + 1), [0] * (n + 1), [0.0] * (n + 1)
+    rate_left = [np.inf] * (n + 1)
+    for k in range(n - 1, -1, -1):
+        c, w = groups[k].capacity, groups[k].credits
+        max_left[k] = max_left[k + 1] + int(c[-1])
+        min_left[k] = min_left[k + 1] + int(c[0])
+        credits_left[k] = credits_left[k + 1] + float(w[0])
+        rate = ((w[1:] - w[0]) / (c[1:] - c[0])).min() if len(c) > 1 else np.inf
+        rate_left[k] = min(rate_left[k + 1], rate)
+    return _Tables(
+        capacity=[group.capacity.tolist() for group in groups],
+        credits=[group.credits.tolist() for group in groups],
+        max_left=max_left,
+        min_left=min_left,
+        credits_left=credits_left,
+        rate_left=rate_left,
+        upgrades=_upgrades(groups),
+    )
+
+
+def _search(groups, tables, floor, max_nodes):
+    """
+    Branch and bound for the lowest-credit choice of one option per group
+    with a total capacity of at least `floor`. Returns (option index per
+    group or None, complete configurations reached, nodes, gap).
+    """
+    n = len(groups)
+    capacity, credits = tables.capacity, tables.credits
+    max_left, min_left, credits_left, rate_left = tables.max_left, tables.min_left, tables.credits_left, tables.rate_left
+
+    best_pick, lower_bound = _greedy(groups, tables.upgrades, floor)
+    if best_pick is None:
+        return None, [], 0, 0.0
+    best_credits = sum(credits[k][j] for k, j in enumerate(best_pick))
+    reached = [best_pick]
+    if best_credits <= lower_bound * (1 + 1e-12):
+        return best_pick, reached, 0, 0.0
+    pick = [-1] * n
+    spent_capacity, spent_credits = [0] * (n + 1), [0.0] * (n + 1)
+    nodes = 0
+    k = 0
+    while k >= 0:
+        if nodes >= max_nodes:
+            return best_pick, reached, nodes, max(best_credits - lower_bound, 0.0) / best_credits
+        if k == n:
+            reached.append(tuple(pick))
+            if spent_credits[n] < best_credits:
+                best_credits, best_pick = spent_credits[n], tuple(pick)
+            k -= 1
+            continue
+
+        options, j = len(capacity[k]), pick[k] + 1
+        while j < options:
+            total = spent_capacity[k] + capacity[k][j]
+            if total + max_left[k + 1] < floor:
+                j += 1  # larger options of this group may still reach the floor
+                continue
+            spent = spent_credits[k] + credits[k][j]
+            missing = floor - total - min_left[k + 1]
+            bound = spent + credits_left[k + 1] + (missing * rate_left[k + 1] if missing > 0 else 0.0)
+            if bound < best_credits:
+                break
+            if missing <= 0:
+                j = options  # larger options of this group only add credits
+            else:
+                j += 1
+        if j < options:
+            pick[k] = j
+            spent_capacity[k + 1], spent_credits[k + 1] = total, spent
+            nodes += 1
+            k += 1
+        else:
+            pick[k] = -1
+            k -= 1
+    return best_pick, reached, nodes, 0.0
+
+
+def optimize(inputs, capacity_floor_pct=80, max_additional_discount=None, months=MONTHS_PER_YEAR, fleet=None,
+             max_nodes=MAX_SEARCH_NODES):
+    """
+    Find the cheapest optimization settings delivering at least
+    `capacity_floor_pct` % of the current configuration's capacity, with
+    costs over `months` months.
+
+    `max_additional_discount` caps the additional discount the solver may
+    assume (defaults to the one already on `inputs`). With a `fleet`, each
+    group of identical warehouses is given its own settings and the
+    result's `best_fleet` carries them.
+    """
+    if max_additional_discount is None:
+        max_additional_discount = inputs.additional_discount
+
+    keys, counts, warehouse_group = _warehouse_groups(inputs, fleet)
+    scaling = gen2_scaling_discount(int(counts.sum()))
+    groups = [_group_options(*(int(v) for v in key), int(count), scaling) for key, count in zip(keys, counts)]
+    # Largest groups first: their choice moves the bound the most
+    order = sorted(range(len(groups)), key=lambda g: -int(groups[g].capacity[-1]))
+    groups = [groups[g] for g in order]
+    tables = _tables(groups)
+    monthly_capacity = current_capacity(inputs, fleet) / MONTHS_PER_YEAR
+
+    # The cheapest configuration at each floor is on the frontier; the requested floor gives the answer
+    found, chosen = {}, None
+    reached, nodes = set(), 0
+    gap = 0.0
+    for floor_pct in sorted(set(FRONTIER_FLOORS_PCT) | {capacity_floor_pct}):
+        pick, floor_reached, floor_nodes, floor_gap = _search(groups, tables, monthly_capacity * floor_pct / 100, max_nodes)
+        reached.update(floor_reached)
+        nodes += floor_nodes
+        if pick is None:
+            continue
+        found[pick] = None
+        if floor_pct == capacity_floor_pct:
+            chosen, gap = pick, floor_gap
+    if chosen is None:
+        raise ValueError("No configuration meets the capacity floor")
+
+    picks = list(found)
+    capacity = np.array([sum(int(g.capacity[j]) for g, j in zip(groups, pick)) for pick in picks], dtype=float) * MONTHS_PER_YEAR
+    credits = np.array([sum(float(g.credits[j]) for g, j in zip(groups, pick)) for pick in picks])
+    base_credits = monthly_base_credits(inputs) if fleet is None else fleet_base_credits(fleet)[0]
+    cost = evaluate_totals(
+        months=months,
+        base_credits=base_credits,
+        optimized_base_credits=credits,
+        **{field: getattr(inputs, field) for field in SCENARIO_FIELDS if field != "additional_discount"},
+        additional_discount=max_additional_discount,
+    ).optimized_annual_cost
+    frontier = pareto_frontier(capacity, cost)
+
+    # Settings per group in the original group order
+    def settings(pick):
+        target, pause = np.empty(len(groups), dtype=np.int64), np.empty(len(groups), dtype=np.int64)
+        for g, group, j in zip(order, groups, pick):
+            target[g], pause[g] = group.target[j], group.pause[j]
+        return target, pause
+
+    def label(pick):
+        target, pause = settings(pick)
+        if fleet is None:
+            return f"{WAREHOUSE_SIZES[target[0]]}, {pause[0]}h pause"
+        downsized = counts[target < keys[:, 0]].sum()
+        paused = counts[pause > 0].sum()
+        return f"{downsized:,} downsized, {paused:,} paused"
+
+    best = picks.index(chosen)
+    target, pause = settings(chosen)
+    best_inputs = replace(inputs, additional_discount=max_additional_discount)
+    best_fleet = None
+    if fleet is None:
+        size = WAREHOUSE_SIZES[target[0]]
+        best_inputs = replace(
+            best_inputs,
+            reduce_vw_size="No Change" if size == inputs.vw_size else size,
+            pause_hours_per_day=int(pause[0]),
+        )
+    else:
+        target = target[warehouse_group]
+        best_fleet = replace(
+            fleet,
+            target_size_code=np.where(target == fleet.size_code, NO_CHANGE, target).astype(np.int8),
+            pause_hours=pause[warehouse_group].astype(np.uint8),
+        )
+
+    return OptimizationResult(
+        best=best_inputs,
+        best_fleet=best_fleet,
+        best_cost=float(cost[best]),
+        best_capacity=float(capacity[best]),
+        current_capacity=float(monthly_capacity * MONTHS_PER_YEAR),
+        frontier_capacity=capacity[frontier],
+        frontier_cost=cost[frontier],
+        frontier_labels=[label(picks[i]) for i in frontier],
+        months=months,
+        evaluated=len(reached),
+        nodes=nodes,
+        search_space=prod(group.options for group in groups),
+        exhaustive=gap == 0,
+        gap=gap,
+    )
@@ -0,0 +1,130 @@
+"""
+Span timing for the page.
+
+`span(name)` times a block of the current rerun:
+
+    with span("estimate"):
+        result = ...
+
+Spans only record while a `Trace` is active on the script thread, i.e.
+between `start_trace()` and `Trace.finish()`; otherwise `span` returns a
+shared no-op context manager, so instrumentation left in the hot path
+costs one thread-local lookup when profiling is off. Spans nest: each
+records its depth, its start relative to the trace and its duration.
+
+Finished traces can be appended to a size-rotated JSON-lines file
+(`TraceFile`), one line per rerun.
+"""
+import json
+import logging
+import logging.handlers
+import threading
+import time
+from contextlib import nullcontext
+from datetime import datetime, timezone
+
+TRACE_MAX_BYTES = 5 * 1024 * 1024
+TRACE_BACKUPS = 3
+
+
+class _ThreadState(threading.local):
+    trace = None  # class default: the lookup never raises, which a missing attribute would
+
+
+_local = _ThreadState()
+_NO_SPAN = nullcontext()
+
+
+class Trace:
+    """Spans of one rerun, in the order they started."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans = []  # [name, depth, start_ms, duration_ms]
+        self.total_ms = None
+        self._depth = 0
+
+    def span(self, name):
+        return _Span(self, name)
+
+    def finish(self):
+        """Stop recording on this thread and fix the total."""
+        self.total_ms = (time.perf_counter() - self.started) * 1e3
+        if _local.trace is self:
+            _local.trace = None
+        return self
+
+    def totals(self):
+        """{name: total ms} over all spans with that name"""
+        totals = {}
+        for name, _, _, duration in self.spans:
+            totals[name] = totals.get(name, 0.0) + duration
+        return totals
+
+    def to_record(self, **fields):
+        """JSON-ready record of the trace plus any extra `fields`"""
+        return {
+            "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            **fields,
+            "total_ms": round(self.total_ms, 3) if self.total_ms is not None else None,
+            "spans": [
+                {"name": name, "depth": depth, "start_ms": round(start, 3), "ms": round(duration, 3)}
+                for name, depth, start, duration in self.spans
+            ],
+        }
+
+
+class _Span:
+    __slots__ = ("trace", "name", "index", "start")
+
+    def __init__(self, trace, name):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        trace = self.trace
+        self.index = len(trace.spans)
+        trace.spans.append([self.name, trace._depth, 0.0, 0.0])
+        trace._depth += 1
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        trace = self.trace
+        trace._depth -= 1
+        entry = trace.spans[self.index]
+        entry[2] = (self.start - trace.started) * 1e3
+        entry[3] = (end - self.start) * 1e3
+        return False
+
+
+def start_trace():
+    """Start recording spans on this thread; replaces any trace a stopped rerun left behind."""
+    _local.trace = Trace()
+    return _local.trace
+
+
+def span(name):
+    """Time the enclosed block in the active trace; a shared no-op when none is active."""
+    trace = _local.trace
+    return _NO_SPAN if trace is None else _Span(trace, name)
+
+
+class TraceFile:
+    """Appends trace records as JSON lines, rotating at `max_bytes` and keeping `backups` old files."""
+
+    def __init__(self, path, max_bytes=TRACE_MAX_BYTES, backups=TRACE_BACKUPS):
+        self.path = path
+        # The handler's lock serializes lines from concurrent sessions
+        self._handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8", delay=True
+        )
+        self._handler.setFormatter(logging.Formatter("%(message)s"))
+
+    def write(self, record):
+        line = json.dumps(record, separators=(",", ":"))
+        self._handler.handle(logging.makeLogRecord({"msg": line, "levelno": logging.INFO}))
+
+    def close(self):
+        self._handler.close()
@@ -0,0 +1,116 @@
+"""
+Long-horizon projections.
+
+Extends the page's monthly model past 12 months and down to daily or hourly
+periods. Monthly values come from `cost_engine.project`: compute keeps its
+linear monthly growth, storage and transfer keep compounding. Each month's
+cost is then spread evenly over its days or hours, so any month of a daily or
+hourly projection sums back to the monthly figure. All six series are written
+into one preallocated (6, periods) block.
+
+A 12-month monthly projection equals `cost_engine.estimate` bit for bit.
+"""
+from dataclasses import dataclass
+from datetime import date
+
+import numpy as np
+
+from cost_engine import monthly_base_credits, optimized_monthly_base_credits, project
+
+GRANULARITIES = ("Monthly", "Daily", "Hourly")
+HORIZON_YEARS = (1, 2, 3, 4, 5)
+PERIOD_UNITS = {"Monthly": "M", "Daily": "D", "Hourly": "h"}
+COMPONENTS = (
+    "compute_costs",
+    "storage_costs",
+    "transfer_costs",
+    "optimized_compute_costs",
+    "optimized_storage_costs",
+    "optimized_transfer_costs",
+)
+
+
+def projection_start(today=None):
+    """January of the current year, so a one-year monthly projection reads Jan-Dec like the page"""
+    return np.datetime64(f"{(today or date.today()).year}-01", "M")
+
+
+@dataclass(frozen=True, eq=False)
+class Projection:
+    """Current/optimized cost per period over the horizon."""
+    granularity: str
+    period_start: np.ndarray  # datetime64 at the granularity's unit
+    month_index: np.ndarray   # months since the start, per period
+    costs: np.ndarray         # (len(COMPONENTS), periods)
+
+    def __len__(self):
+        return self.costs.shape[1]
+
+    @property
+    def months(self):
+        return int(self.month_index[-1]) + 1
+
+    @property
+    def compute_costs(self):
+        return self.costs[0]
+
+    @property
+    def storage_costs(self):
+        return self.costs[1]
+
+    @property
+    def transfer_costs(self):
+        return self.costs[2]
+
+    @property
+    def total_costs(self):
+        return self.costs[0] + self.costs[1] + self.costs[2]
+
+    @property
+    def total_optimized_costs(self):
+        return self.costs[3] + self.costs[4] + self.costs[5]
+
+    @property
+    def savings(self):
+        return self.total_costs - self.total_optimized_costs
+
+    def savings_over(self, months):
+        """Total savings over the first `months` months of the horizon"""
+        if months > self.months:
+            raise ValueError(f"Projection covers {self.months} months, not {months}")
+        within = self.month_index < months
+        return float(self.total_costs[within].sum() - self.total_optimized_costs[within].sum())
+
+
+def project_horizon(inputs, months, granularity="Monthly", base_credits=None, optimized_base_credits=None, start=None):
+    """
+    Project `inputs` over `months` months at `granularity` (one of
+    GRANULARITIES). Base credits default to those of `inputs`; fleets pass
+    their own.
+    """
+    if granularity not in PERIOD_UNITS:
+        raise ValueError(f"Unknown granularity {granularity!r}; expected one of {', '.join(GRANULARITIES)}")
+    if base_credits is None:
+        base_credits = monthly_base_credits(inputs)
+        optimized_base_credits = optimized_monthly_base_credits(inputs)
+    monthly = project(inputs, base_credits, optimized_base_credits, months=months)
+
+    month_starts = (projection_start() if start is None else np.datetime64(start, "M")) + np.arange(months)
+    unit = PERIOD_UNITS[granularity]
+    if unit == "M":
+        periods_per_month = np.ones(months, dtype=np.int64)
+    else:
+        boundaries = np.r_[month_starts, month_starts[-1] + 1].astype(f"datetime64[{unit}]")
+        periods_per_month = np.diff(boundaries).astype(np.int64)
+    month_index = np.repeat(np.arange(months), periods_per_month)
+
+    costs = np.empty((len(COMPONENTS), len(month_index)))
+    for row, component in zip(costs, COMPONENTS):
+        np.take(getattr(monthly, component) / periods_per_month, month_index, out=row)
+
+    return Projection(
+        granularity=granularity,
+        period_start=month_starts[0].astype(f"datetime64[{unit}]") + np.arange(len(month_index)),
+        month_index=month_index,
+        costs=costs,
+    )
@@ -0,0 +1,189 @@
+"""
+Region, cloud and edition pricing.
+
+The rate card is a JSON file (`rate_card.json` next to this module, or the
+path in `RATE_CARD_PATH`) listing, per cloud region, the list price of a
+credit by edition, the storage price per TB-month and the transfer price
+per TB by destination. `load_rate_card` compiles it once per process into a
+`RateCard` of integer-coded lookup arrays, and again only when the file
+changes, so any number of configurations are priced by array indexing:
+
+    rates = load_rate_card()
+    columns = rates.price_columns(region=regions, edition=editions, transfer_destination=destinations)
+    evaluate_totals(**scenario, **columns)
+
+Prices land in the `CostInputs` fields `storage_cost_per_tb`,
+`transfer_cost_per_tb` and `credit_cost`; everything cached on a
+`CostInputs` is therefore invalidated by a rate-card edit only when the
+rates it was priced with actually changed. Warehouse credits per hour are
+the same in every region and edition and stay in `cost_engine`.
+"""
+import functools
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Tuple
+
+import numpy as np
+
+from cost_engine import DATA_TRANSFER_COST_PER_TB, STORAGE_COST_PER_TB
+
+DEFAULT_RATE_CARD_PATH = Path(__file__).with_name("rate_card.json")
+
+# Used when no rate card can be read: the module constants, one region
+BUILTIN_RATE_CARD = {
+    "name": "Built-in defaults",
+    "editions": ["Standard"],
+    "transfer_destinations": ["Internet"],
+    "default": {"region": "Default", "edition": "Standard", "transfer_destination": "Internet"},
+    "regions": {
+        "Default": {
+            "credit_price": {"Standard": 2.0},
+            "storage_per_tb": STORAGE_COST_PER_TB,
+            "transfer_per_tb": {"Internet": DATA_TRANSFER_COST_PER_TB},
+        },
+    },
+}
+
+
+@dataclass(frozen=True, eq=False)
+class RateCard:
+    """Compiled rate card: names map to positions, prices are arrays indexed by those positions."""
+    name: str
+    regions: Tuple[str, ...]
+    editions: Tuple[str, ...]
+    destinations: Tuple[str, ...]
+    credit_price: np.ndarray     # (regions, editions), $ per credit
+    storage_per_tb: np.ndarray   # (regions,), $ per TB-month
+    transfer_per_tb: np.ndarray  # (regions, destinations), $ per TB
+    default_region: str
+    default_edition: str
+    default_destination: str
+
+    @classmethod
+    def compile(cls, card):
+        """RateCard from the parsed JSON document; every region must price every edition and destination."""
+        try:
+            editions = tuple(card["editions"])
+            destinations = tuple(card["transfer_destinations"])
+            regions = tuple(card["regions"])
+            entries = [card["regions"][region] for region in regions]
+            credit_price = [[entry["credit_price"][edition] for edition in editions] for entry in entries]
+            storage_per_tb = [entry["storage_per_tb"] for entry in entries]
+            transfer_per_tb = [[entry["transfer_per_tb"][destination] for destination in destinations] for entry in entries]
+            default = card.get("default", {})
+        except KeyError as error:
+            raise ValueError(f"Rate card is missing {error}") from None
+        if not regions:
+            raise ValueError("Rate card has no regions")
+
+        rates = cls(
+            name=card.get("name", "Rate card"),
+            regions=regions,
+            editions=editions,
+            destinations=destinations,
+            credit_price=np.array(credit_price, dtype=float).reshape(len(regions), len(editions)),
+            storage_per_tb=np.array(storage_per_tb, dtype=float),
+            transfer_per_tb=np.array(transfer_per_tb, dtype=float).reshape(len(regions), len(destinations)),
+            default_region=default.get("region", regions[0]),
+            default_edition=default.get("edition", editions[0]),
+            default_destination=default.get("transfer_destination", destinations[-1]),
+        )
+        # Validates the defaults against the lists
+        rates.region_codes(rates.default_region)
+        rates.edition_codes(rates.default_edition)
+        rates.destination_codes(rates.default_destination)
+        return rates
+
+    # --- names -> codes ---
+
+    def region_codes(self, regions):
+        return _codes(regions, self.regions, "region")
+
+    def edition_codes(self, editions):
+        return _codes(editions, self.editions, "edition")
+
+    def destination_codes(self, destinations):
+        return _codes(destinations, self.destinations, "transfer destination")
+
+    # --- pricing ---
+
+    def list_price(self, region, edition):
+        """List price of a credit in one region and edition"""
+        return float(self.credit_price[self.region_codes(region), self.edition_codes(edition)])
+
+    def price_columns(self, region=None, edition=None, transfer_destination=None):
+        """
+        `CostInputs` rate columns for the given regions and transfer
+        destinations (defaults when omitted) and, when `edition` is given,
+        the list credit price. Each argument may be a name, an array of
+        names or codes, or a pandas column; they broadcast together.
+        """
+        region = self.region_codes(self.default_region if region is None else region)
+        destination = self.destination_codes(self.default_destination if transfer_destination is None else transfer_destination)
+        columns = {
+            "storage_cost_per_tb": self.storage_per_tb[region],
+            "transfer_cost_per_tb": self.transfer_per_tb[region, destination],
+        }
+        if edition is not None:
+            columns["credit_cost"] = self.credit_price[region, self.edition_codes(edition)]
+        return columns
+
+    def rates(self, region, transfer_destination):
+        """(storage, transfer) prices per TB for one region and destination, as `CostInputs` takes them"""
+        columns = self.price_columns(region, transfer_destination=transfer_destination)
+        return float(columns["storage_cost_per_tb"]), float(columns["transfer_cost_per_tb"])
+
+
+def _codes(values, names, kind):
+    """Positions of `values` in `names`; integer codes pass through."""
+    if isinstance(values, str):
+        try:
+            return names.index(values)
+        except ValueError:
+            raise ValueError(f"Unknown {kind}: {values}") from None
+
+    if hasattr(values, "factorize"):  # pandas column: hash-based, each distinct name looked up once
+        inverse, uniques = values.factorize()
+        if (inverse < 0).any():
+            raise ValueError(f"Missing {kind} values")
+        return _codes(np.asarray(uniques, dtype=str), names, kind)[inverse]
+
+    values = np.asarray(values)
+    if values.dtype.kind in "iu":
+        if values.size and (values.min() < 0 or values.max() >= len(names)):
+            raise ValueError(f"Unknown {kind} code")
+        return values.astype(np.intp)
+
+    # Binary search over the handful of names instead of hashing every row in Python
+    values = values.astype(str)
+    ordered = np.argsort(names)
+    sorted_names = np.array(names)[ordered]
+    position = np.searchsorted(sorted_names, values).clip(max=len(names) - 1)
+    known = sorted_names[position] == values
+    if not known.all():
+        unknown = np.unique(values[~known]).tolist()
+        raise ValueError(f"Unknown {kind}: {', '.join(unknown[:5])}")
+    return ordered[position]
+
+
+@functools.lru_cache(maxsize=4)
+def _compiled(path, mtime_ns, size):
+    with open(path, encoding="utf-8") as f:
+        return RateCard.compile(json.load(f))
+
+
+def load_rate_card(path=None):
+    """
+    The rate card at `path` (default: `RATE_CARD_PATH` or rate_card.json),
+    compiled on first use and recompiled only after the file changes.
+    """
+    path = str(path or os.environ.get("RATE_CARD_PATH") or DEFAULT_RATE_CARD_PATH)
+    stat = os.stat(path)
+    return _compiled(path, stat.st_mtime_ns, stat.st_size)
+
+
+@functools.lru_cache(maxsize=1)
+def builtin_rate_card():
+    return RateCard.compile(BUILTIN_RATE_CARD)
@@ -0,0 +1,73 @@
+"""
+Dependency-scoped page sections.
+
+Each section declares the values it depends on and is split into
+`build` (turn those values into content: strings, figures, frames) and
+`show` (emit the content as Streamlit elements). `SectionRunner` keeps the
+last content per section in session state and only calls `build` when a
+declared dependency changed since the previous rerun; unchanged sections
+replay their stored content. Large values (a fleet, a projection, a
+simulation) are not serialized to compare them: the caller passes `keys`,
+a cheap stand-in per such value (the arguments its cached builder was
+called with), and the fingerprint covers the stand-in instead. Unchanged elements then serialize to the same
+bytes, which Streamlit's client message cache sends as hash references.
+With profiling on, each section's fingerprint, build and show are spans.
+"""
+import hashlib
+import pickle
+from collections import Counter
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Callable, Tuple
+
+from profiling import span
+
+
+@dataclass(frozen=True)
+class Section:
+    """A rerunnable block of the page."""
+    name: str
+    depends_on: Tuple[str, ...]
+    build: Callable  # (SimpleNamespace of depends_on) -> content
+    show: Callable   # (content) -> None
+
+
+def fingerprint(values):
+    """Stable digest of a tuple of picklable values (NumPy arrays included)."""
+    return hashlib.blake2b(pickle.dumps(values, protocol=pickle.HIGHEST_PROTOCOL), digest_size=16).hexdigest()
+
+
+class SectionRunner:
+    """Builds sections whose dependencies changed and replays the rest."""
+
+    def __init__(self, state, key="_sections"):
+        if key not in state:
+            state[key] = {"content": {}, "builds": Counter()}
+        self._store = state[key]
+        self.rebuilt = []
+        self.reused = []
+
+    @property
+    def build_counts(self):
+        """How many times each section has been built in this session."""
+        return dict(self._store["builds"])
+
+    def run(self, section, values, keys=None):
+        """Build or replay `section`; `keys` maps value names to the stand-ins fingerprinted in their place."""
+        keys = keys or {}
+        deps = {name: values[name] for name in section.depends_on}
+        with span(f"fingerprint:{section.name}"):
+            digest = fingerprint(tuple(keys[name] if name in keys else deps[name] for name in section.depends_on))
+        cached = self._store["content"].get(section.name)
+        if cached is not None and cached[0] == digest:
+            content = cached[1]
+            self.reused.append(section.name)
+        else:
+            with span(f"build:{section.name}"):
+                content = section.build(SimpleNamespace(**deps))
+            self._store["content"][section.name] = (digest, content)
+            self._store["builds"][section.name] += 1
+            self.rebuilt.append(section.name)
+        with span(f"show:{section.name}"):
+            section.show(content)
+        return content
@@ -0,0 +1,191 @@
+"""
+Input sensitivity.
+
+Swings each numeric input by -/+ `swing_pct` percent of its current value,
+everything else held, and prices the base case and all 2N variants in one
+closed-form `scenario_sweep.evaluate_totals` call, so the whole tornado
+costs about as much as a single estimate. Swings are clamped to the
+sidebar ranges (1-20 warehouses, hours <= 24, days <= 31, auto-pause <= 12
+hours, discounts <= 100%); an input at 0 has no swing. The warehouse count
+moves by whole warehouses, at least one each way, since a fractional count
+would land between the bands of the Gen 2 scaling discount.
+
+For a fleet, hours per day, active days and auto-pause hours are scaled on
+every warehouse at once; each such variant recomputes the fleet's base
+credits in one vectorized pass over its arrays (the warehouse count is not
+an input then). Account-level inputs reuse the fleet's base credits.
+
+    result = sensitivity(CostInputs.from_template("Large Enterprise"), swing_pct=10)
+    result.ranked("annual_cost")   # input names, largest swing first
+"""
+from dataclasses import dataclass
+from typing import Tuple
+
+import numpy as np
+
+from fleet import fleet_base_credits, gen2_adjusted_totals
+from scenario_sweep import NO_CHANGE, SIZE_CREDITS, SCENARIO_FIELDS, ScenarioResults, evaluate_totals
+
+DEFAULT_SWING_PCT = 10
+
+# Swung inputs and their display names
+SENSITIVITY_INPUTS = {
+    "credit_cost": "Cost per credit",
+    "num_vws": "Number of warehouses",
+    "hours_per_day": "Hours per day",
+    "active_days_per_month": "Active days / month",
+    "compute_growth": "Compute growth",
+    "storage_tb": "Storage (TB)",
+    "storage_growth": "Storage growth",
+    "data_transfer_tb": "Data transfer (TB)",
+    "transfer_growth": "Transfer growth",
+    "discount_pct": "Base discount",
+    "pause_hours_per_day": "Auto-pause hours",
+    "additional_discount": "Optimization discount",
+}
+UPPER_BOUNDS = {
+    "num_vws": 20,
+    "hours_per_day": 24,
+    "active_days_per_month": 31,
+    "pause_hours_per_day": 12,
+    "discount_pct": 100,
+    "additional_discount": 100,
+}
+LOWER_BOUNDS = {"num_vws": 1}
+WHOLE_INPUTS = ("num_vws",)  # swung by whole units, at least one
+SENSITIVITY_METRICS = {
+    "Annual Cost": "annual_cost",
+    "Optimized Annual Cost": "optimized_annual_cost",
+    "Annual Savings": "savings",
+}
+
+# Per-warehouse fleet settings, scaled across the fleet
+FLEET_INPUTS = ("hours_per_day", "active_days_per_month", "pause_hours_per_day")
+
+
+@dataclass(frozen=True, eq=False)
+class Sensitivity:
+    """Annual totals at the base case and at each input's low/high swing."""
+    inputs: Tuple[str, ...]
+    base_values: np.ndarray
+    low_values: np.ndarray   # input values at -swing_pct, after clamping
+    high_values: np.ndarray  # input values at +swing_pct, after clamping
+    results: ScenarioResults  # base case first, then (low, high) per input
+    swing_pct: float
+
+    def __len__(self):
+        return len(self.inputs)
+
+    def swings(self, metric="annual_cost"):
+        """(base, low, high): `metric` at the base case and at each input's low and high value"""
+        values = getattr(self.results, metric)
+        return float(values[0]), values[1::2], values[2::2]
+
+    def elasticities(self, metric="annual_cost"):
+        """Percent change in `metric` per percent change in each input (central difference)"""
+        base, low, high = self.swings(metric)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            input_change = (self.high_values - self.low_values) / self.base_values
+            elasticity = (high - low) / base / input_change
+        return np.where(np.isfinite(elasticity), elasticity, 0.0)
+
+    def order(self, metric="annual_cost"):
+        """Input positions ordered by the largest move of `metric` in either direction"""
+        base, low, high = self.swings(metric)
+        spread = np.maximum(np.abs(low - base), np.abs(high - base))
+        return np.argsort(-spread, kind="stable")
+
+    def ranked(self, metric="annual_cost"):
+        """Input names, largest move of `metric` first"""
+        return [self.inputs[i] for i in self.order(metric)]
+
+
+def _swung_values(base_values, names, swing_pct):
+    lower = np.array([LOWER_BOUNDS.get(name, 0) for name in names])
+    upper = np.array([UPPER_BOUNDS.get(name, np.inf) for name in names])
+    swing = base_values * swing_pct / 100
+    whole = np.isin(names, WHOLE_INPUTS)
+    swing[whole] = np.maximum(np.rint(swing[whole]), 1)
+    low_values = np.clip(base_values - swing, np.minimum(lower, base_values), upper)
+    high_values = np.clip(base_values + swing, np.minimum(lower, base_values), upper)
+    return low_values, high_values
+
+
+def _fleet_variant_credits(fleet, variants):
+    """
+    Fleet base credits for each (input, factor) in `variants`, the input
+    being a FLEET_INPUTS setting scaled by `factor` on every warehouse.
+    Returns (current, optimized) arrays, one entry per variant.
+    """
+    size = SIZE_CREDITS.take(fleet.size_code).astype(float)
+    target = SIZE_CREDITS.take(np.where(fleet.target_size_code == NO_CHANGE, fleet.size_code, fleet.target_size_code))
+    hours = fleet.hours_per_day.astype(float)
+    days = fleet.active_days.astype(float)
+    pause = fleet.pause_hours.astype(float)
+    size_days = size * days
+    target_days = target * days
+
+    current = np.empty((len(variants), len(fleet)))
+    optimized = np.empty((len(variants), len(fleet)))
+    for row, (name, factor) in enumerate(variants):
+        if name == "hours_per_day":
+            scaled = np.minimum(hours * factor, 24)
+            np.multiply(size_days, scaled, out=current[row])
+            np.multiply(target_days, np.maximum(scaled - pause, 0), out=optimized[row])
+        elif name == "active_days_per_month":
+            scaled = np.minimum(days * factor, 31)
+            np.multiply(size * hours, scaled, out=current[row])
+            np.multiply(target * np.maximum(hours - pause, 0), scaled, out=optimized[row])
+        else:  # auto-pause hours only change the optimized credits; a fleet file may already be past the sidebar cap
+            scaled = np.minimum(pause * factor, np.maximum(pause, UPPER_BOUNDS["pause_hours_per_day"]))
+            np.multiply(size_days, hours, out=current[row])
+            np.multiply(target_days, np.maximum(hours - scaled, 0), out=optimized[row])
+    return gen2_adjusted_totals(fleet, current, optimized)
+
+
+def sensitivity(inputs, swing_pct=DEFAULT_SWING_PCT, fleet=None, months=12):
+    """
+    -/+ `swing_pct`% swings of every SENSITIVITY_INPUTS field of `inputs`
+    (a `CostInputs`), priced over `months` months in one batch. With a
+    `fleet`, warehouse settings come from the fleet as on the page.
+    """
+    names = [name for name in SENSITIVITY_INPUTS if fleet is None or name != "num_vws"]
+    current = {name: getattr(inputs, name) for name in names}
+    if fleet is not None:  # fleet means, for display; each warehouse is scaled by the same factor
+        current.update(
+            hours_per_day=fleet.mean_hours_per_day,
+            active_days_per_month=fleet.mean_active_days,
+            pause_hours_per_day=float(fleet.pause_hours.mean()) if len(fleet) else 0.0,
+        )
+    base_values = np.array([float(current[name]) for name in names])
+    low_values, high_values = _swung_values(base_values, names, swing_pct)
+
+    # Row 0 is the base case; rows 2i+1 / 2i+2 swing input i down / up
+    rows = 1 + 2 * len(names)
+    columns = {field: np.full(rows, getattr(inputs, field)) for field in SCENARIO_FIELDS}
+    for i, name in enumerate(names):
+        column = columns[name].astype(float)
+        column[2 * i + 1], column[2 * i + 2] = low_values[i], high_values[i]
+        columns[name] = column
+
+    pinned = {}
+    if fleet is not None:
+        base_credits = np.empty(rows)
+        optimized_base_credits = np.empty(rows)
+        base_credits[:], optimized_base_credits[:] = fleet_base_credits(fleet)
+        swung = [i for i, name in enumerate(names) if name in FLEET_INPUTS and base_values[i] > 0]
+        if swung:
+            variants = [(names[i], values[i] / base_values[i]) for i in swung for values in (low_values, high_values)]
+            rows_swung = [row for i in swung for row in (2 * i + 1, 2 * i + 2)]
+            base_credits[rows_swung], optimized_base_credits[rows_swung] = _fleet_variant_credits(fleet, variants)
+        pinned = dict(base_credits=base_credits, optimized_base_credits=optimized_base_credits)
+
+    results = evaluate_totals(months=months, **pinned, **columns)
+    return Sensitivity(
+        inputs=tuple(names),
+        base_values=base_values,
+        low_values=low_values,
+        high_values=high_values,
+        results=results,
+        swing_pct=swing_pct,
+    )
@@ -0,0 +1,407 @@
+"""
+Out-of-core scenario sweeps.
+
+`sweep_to_store` prices the cartesian product of a few axes, e.g. every
+`template_defaults` profile x every rate-card price x growth grids, one
+fixed-size block at a time. Each block's result columns are appended to
+.npy files in a directory, which queries memory-map, so neither side holds
+more than a block and the grid can be far larger than RAM:
+
+    store = sweep_to_store("sweeps/q3", {
+        "profile": template_axis(fields=USAGE_FIELDS),
+        "rates": rate_card_axis(load_rate_card(), editions=["Enterprise", "Business Critical"]),
+        "compute_growth": np.arange(0, 51),
+        "storage_growth": np.arange(0, 31),
+    })
+    cheapest = store.top_k(100, "annual_cost", where=[("credit_hours", ">=", 50_000)])
+    store.frame(cheapest)
+    store.count([("savings_pct", ">", 30)])
+
+Scenario inputs are not stored. Row i is the mixed-radix number of its axis
+positions (last axis fastest, like `scenario_grid`), so its inputs are
+decoded from the small axis tables. The store also keeps a zone map: the
+min and max of every column in every block. Queries only read blocks whose
+range can satisfy their conditions. Blocks entirely inside the conditions
+are counted without being read. `top_k` visits blocks in order of the best
+value they could hold and stops once no remaining block can beat the k-th
+result. Blocks span narrow ranges, and prune best, when the axes that move
+costs most come first.
+"""
+import itertools
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from cost_engine import MONTHS_PER_YEAR, TEMPLATE_ALIASES, WAREHOUSE_SIZES, CostInputs, template_defaults
+from execution import INLINE
+from scenario_sweep import NO_CHANGE, SCENARIO_FIELDS, SIZE_CREDITS, evaluate_scenarios, evaluate_totals, size_codes
+
+BLOCK_SIZE = 65536  # rows per evaluation chunk and per zone-map entry
+RESULT_COLUMNS = (
+    "annual_cost",
+    "optimized_annual_cost",
+    "savings",
+    "savings_pct",
+    "credit_hours",            # nominal credit-hours per year, as `optimizer.annual_capacity`
+    "optimized_credit_hours",  # the same after auto-pause and downsizing
+)
+PROFILE_FIELDS = tuple(TEMPLATE_ALIASES.values())  # the fields a template sets
+USAGE_FIELDS = tuple(field for field in PROFILE_FIELDS if field != "credit_cost")  # for pairing with rate-card credit prices
+SIZE_FIELDS = ("vw_size", "reduce_vw_size")
+META_FILE = "meta.json"
+ZONES_FILE = "zones.npy"
+
+# (block may hold a matching row, every row of the block matches) from the block's min and max
+ZONE_TESTS = {
+    ">": (lambda low, high, value: high > value, lambda low, high, value: low > value),
+    ">=": (lambda low, high, value: high >= value, lambda low, high, value: low >= value),
+    "<": (lambda low, high, value: low < value, lambda low, high, value: high < value),
+    "<=": (lambda low, high, value: low <= value, lambda low, high, value: high <= value),
+    "==": (lambda low, high, value: (low <= value) & (high >= value), lambda low, high, value: (low == value) & (high == value)),
+}
+OPERATORS = {">": np.greater, ">=": np.greater_equal, "<": np.less, "<=": np.less_equal, "==": np.equal}
+
+
+# === AXES ===
+
+@dataclass(frozen=True)
+class Axis:
+    """One dimension of the grid: equal-length value columns for one or more `CostInputs` fields."""
+    columns: Dict[str, np.ndarray]
+    labels: Optional[Tuple[str, ...]] = None  # one per position, shown by `SweepStore.frame`
+
+    def __len__(self):
+        return len(next(iter(self.columns.values())))
+
+
+def template_axis(templates=None, fields=PROFILE_FIELDS):
+    """The `template_defaults` profiles (all by default) as one axis; `fields` picks what they set."""
+    templates = list(templates or template_defaults)
+    profiles = [CostInputs.from_template(template) for template in templates]
+    return Axis({field: np.array([getattr(inputs, field) for inputs in profiles]) for field in fields}, tuple(templates))
+
+
+def rate_card_axis(rates, regions=None, editions=None, destinations=None):
+    """
+    Every combination of the given regions (default: all), transfer
+    destinations (default: the card's default) and, when given, editions
+    priced from a `rate_card.RateCard`. Without editions the axis sets only
+    the storage and transfer rates.
+    """
+    regions = list(regions or rates.regions)
+    destinations = list(destinations or [rates.default_destination])
+    combinations = list(itertools.product(regions, editions or [None], destinations))
+    region, edition, destination = (np.array(names) for names in zip(*combinations))
+    columns = rates.price_columns(region, edition if editions else None, destination)
+    labels = tuple(" · ".join(name for name in combination if name is not None) for combination in combinations)
+    return Axis(columns, labels)
+
+
+def _as_axis(name, values):
+    axis = values if isinstance(values, Axis) else Axis({name: np.asarray(values)})
+    lengths = {len(column) if np.ndim(column) == 1 else 0 for column in axis.columns.values()}
+    if len(lengths) != 1 or 0 in lengths:
+        raise ValueError(f"Axis {name!r} needs 1-D, non-empty columns of one length")
+    unknown = set(axis.columns) - set(SCENARIO_FIELDS)
+    if unknown:
+        raise TypeError(f"Unknown scenario fields in axis {name!r}: {', '.join(sorted(unknown))}")
+    return axis
+
+
+def _check_fields(axes, fixed):
+    """Each field may be set by one axis or by `fixed`, not several"""
+    owner = {}
+    for name, axis in [*axes.items(), ("fixed", Axis({field: [value] for field, value in fixed.items()}))]:
+        for field in axis.columns:
+            if field in owner:
+                raise ValueError(f"{field} is set by both {owner[field]!r} and {name!r}")
+            owner[field] = name
+
+
+# === WRITING ===
+
+def sweep_to_store(path, axes, fixed=None, months=None, columns=RESULT_COLUMNS, block_size=BLOCK_SIZE,
+                   overwrite=False, backend=INLINE, progress=None, cancel=None):
+    """
+    Price every combination of `axes` (name -> `Axis` or 1-D array of one
+    field's values, in order, last fastest) with the `fixed` field values,
+    writing `columns` to .npy files under `path`.
+
+    With `months=None` each scenario is priced month by month over the
+    page's 12 months and matches the page bit for bit; with a number of
+    months the closed-form horizon totals are used (`evaluate_totals`).
+    Fields set by neither take the `CostInputs` defaults. Each block is
+    priced on `backend`; `progress(rows_written, rows)` is called after each
+    block and `cancel` raises `execution.Cancelled` at the next chunk. The
+    metadata is written last, so an interrupted sweep leaves no openable store.
+    """
+    path = Path(path)
+    fixed = dict(fixed or {})
+    axes = {name: _as_axis(name, values) for name, values in axes.items()}
+    _check_fields(axes, fixed)
+    unknown = set(columns) - set(RESULT_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown result columns: {', '.join(sorted(unknown))}")
+    if (path / META_FILE).exists() and not overwrite:
+        raise FileExistsError(f"A sweep store already exists at {path}")
+
+    rows = int(np.prod([len(axis) for axis in axes.values()]))
+    blocks = -(-rows // block_size)
+    path.mkdir(parents=True, exist_ok=True)
+    (path / META_FILE).unlink(missing_ok=True)
+
+    grid = _Grid(axes, fixed)
+    zones = np.empty((blocks, len(columns), 2))
+    # Blocks are written through plain file handles; a writable memory map
+    # would keep every page it touched in this process's resident set
+    outputs = {name: _open_column(path / f"{name}.npy", rows) for name in columns}
+    try:
+        for block in range(blocks):
+            start, stop = block * block_size, min((block + 1) * block_size, rows)
+            results = _price_block(grid.columns(start, stop), months, columns, backend, cancel)
+            for j, name in enumerate(columns):
+                outputs[name].write(np.ascontiguousarray(results[name], dtype=np.float64).tobytes())
+                zones[block, j] = results[name].min(), results[name].max()
+            if progress is not None:
+                progress(stop, rows)
+    finally:
+        for f in outputs.values():
+            f.close()
+
+    np.save(path / ZONES_FILE, zones)
+    meta = {
+        "rows": rows,
+        "block_size": block_size,
+        "months": months,
+        "columns": list(columns),
+        "axes": [
+            {"name": name, "fields": {field: values.tolist() for field, values in axis.columns.items()},
+             "labels": list(axis.labels) if axis.labels is not None else None}
+            for name, axis in axes.items()
+        ],
+        "fixed": {field: np.asarray(value).tolist() for field, value in fixed.items()},
+    }
+    with open(path / META_FILE, "w") as f:
+        json.dump(meta, f, indent=1)
+    return SweepStore(path)
+
+
+def _open_column(path, rows):
+    """File handle positioned at the data of a new float64 .npy file of `rows` entries"""
+    header = np.lib.format.open_memmap(path, mode="w+", dtype=np.float64, shape=(rows,))
+    offset = header.offset
+    del header
+    f = open(path, "r+b")
+    f.seek(offset)
+    return f
+
+
+class _Grid:
+    """Decodes row numbers into scenario columns: mixed radix over the axis lengths, last axis fastest."""
+
+    def __init__(self, axes, fixed):
+        self.axes = list(axes.values())
+        lengths = [len(axis) for axis in self.axes]
+        self.strides = [int(np.prod(lengths[i + 1:])) for i in range(len(lengths))]
+        defaults = CostInputs()
+        self.fixed = {field: getattr(defaults, field) for field in SCENARIO_FIELDS}
+        self.fixed.update(fixed)
+        # Sizes as integer codes once per axis instead of once per row
+        self.encoded = [
+            {field: size_codes(values) if field in SIZE_FIELDS else values for field, values in axis.columns.items()}
+            for axis in self.axes
+        ]
+        for field in SIZE_FIELDS:
+            self.fixed[field] = size_codes(self.fixed[field])
+
+    def positions(self, rows):
+        """Position on each axis of each row"""
+        return [rows // stride % len(axis) for axis, stride in zip(self.axes, self.strides)]
+
+    def columns(self, start, stop, encoded=True):
+        columns = dict(self.fixed)
+        tables = self.encoded if encoded else [axis.columns for axis in self.axes]
+        for table, position in zip(tables, self.positions(np.arange(start, stop))):
+            for field, values in table.items():
+                columns[field] = values[position]
+        return columns
+
+
+def _price_block(columns, months, names, backend=INLINE, cancel=None):
+    """The requested result columns for one block of encoded scenario columns"""
+    if months is None:
+        results = evaluate_scenarios(backend=backend, cancel=cancel, **columns)
+    else:
+        results = evaluate_totals(months=months, backend=backend, cancel=cancel, **columns)
+    out = {
+        "annual_cost": results.annual_cost,
+        "optimized_annual_cost": results.optimized_annual_cost,
+        "savings": results.savings,
+        "savings_pct": results.savings_pct,
+    }
+    if "credit_hours" in names or "optimized_credit_hours" in names:
+        # Nominal capacity, as optimizer.annual_capacity
+        size = SIZE_CREDITS[columns["vw_size"]]
+        optimized_size = np.where(columns["reduce_vw_size"] == NO_CHANGE, size, SIZE_CREDITS[columns["reduce_vw_size"]])
+        days = columns["num_vws"] * columns["active_days_per_month"] * MONTHS_PER_YEAR
+        effective_hours = np.maximum(columns["hours_per_day"] - columns["pause_hours_per_day"], 0)
+        out["credit_hours"] = np.broadcast_to(days * size * columns["hours_per_day"], results.annual_cost.shape)
+        out["optimized_credit_hours"] = np.broadcast_to(days * optimized_size * effective_hours, results.annual_cost.shape)
+    return {name: out[name] for name in names}
+
+
+# === QUERIES ===
+
+class SweepStore:
+    """
+    Read side of a sweep directory: result columns as read-only memory maps,
+    the zone map in memory. `blocks_read` is the number of blocks the last
+    query had to read.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        try:
+            with open(self.path / META_FILE) as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"No complete sweep store at {self.path}") from None
+        self.rows = meta["rows"]
+        self.block_size = meta["block_size"]
+        self.months = meta["months"]
+        self.column_names = tuple(meta["columns"])
+        self.fixed = meta["fixed"]
+        self.axes = {
+            axis["name"]: Axis({field: np.array(values) for field, values in axis["fields"].items()},
+                               tuple(axis["labels"]) if axis["labels"] is not None else None)
+            for axis in meta["axes"]
+        }
+        self.columns = {name: np.load(self.path / f"{name}.npy", mmap_mode="r") for name in self.column_names}
+        self.zones = np.load(self.path / ZONES_FILE)
+        self.blocks_read = 0
+        self._grid = _Grid(self.axes, self.fixed)
+
+    def __len__(self):
+        return self.rows
+
+    @property
+    def blocks(self):
+        return len(self.zones)
+
+    def _zone(self, column):
+        try:
+            j = self.column_names.index(column)
+        except ValueError:
+            raise KeyError(f"Column not stored: {column}") from None
+        return self.zones[:, j, 0], self.zones[:, j, 1]
+
+    def _prune(self, where):
+        """(blocks that may hold a match, blocks whose rows all match) for the conditions"""
+        maybe = np.ones(self.blocks, dtype=bool)
+        every = np.ones(self.blocks, dtype=bool)
+        for column, op, value in where:
+            if op not in ZONE_TESTS:
+                raise ValueError(f"Unknown operator {op!r}; use one of {', '.join(ZONE_TESTS)}")
+            low, high = self._zone(column)
+            may_match, all_match = ZONE_TESTS[op]
+            maybe &= may_match(low, high, value)
+            every &= all_match(low, high, value)
+        return maybe, every & maybe
+
+    def _read(self, block, where, every, column=None):
+        """(row numbers, values of `column`) of the block's matching rows"""
+        start = block * self.block_size
+        stop = min(start + self.block_size, self.rows)
+        if every[block]:
+            return np.arange(start, stop), np.array(self.columns[column][start:stop]) if column else None
+        mask = np.ones(stop - start, dtype=bool)
+        for name, op, value in where:
+            mask &= OPERATORS[op](self.columns[name][start:stop], value)
+        positions = np.flatnonzero(mask)
+        return positions + start, self.columns[column][start:stop][positions] if column else None
+
+    def count(self, where=()):
+        """Number of rows matching every (column, op, value) condition"""
+        maybe, every = self._prune(where)
+        partial = np.flatnonzero(maybe & ~every)
+        full = np.flatnonzero(every)
+        sizes = np.minimum(self.block_size, self.rows - full * self.block_size)
+        self.blocks_read = len(partial)
+        return int(sizes.sum()) + sum(len(self._read(block, where, every)[0]) for block in partial)
+
+    def select(self, where=(), limit=None):
+        """Row numbers matching every (column, op, value) condition, ascending; the first `limit` when given"""
+        maybe, every = self._prune(where)
+        found = []
+        total = 0
+        self.blocks_read = 0
+        for block in np.flatnonzero(maybe):
+            rows, _ = self._read(block, where, every)
+            self.blocks_read += not every[block]
+            found.append(rows)
+            total += len(rows)
+            if limit is not None and total >= limit:
+                break
+        rows = np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+        return rows[:limit] if limit is not None else rows
+
+    def top_k(self, k, by, where=(), largest=False):
+        """Row numbers of the `k` rows with the smallest (or largest) `by` among those matching `where`, best first"""
+        if k < 1:
+            return np.empty(0, dtype=np.int64)
+        maybe, every = self._prune(where)
+        low, high = self._zone(by)
+        bound = high if largest else low  # best value each block could hold
+        candidates = np.flatnonzero(maybe)
+        order = candidates[np.argsort(-bound[candidates] if largest else bound[candidates], kind="stable")]
+
+        best_rows = np.empty(0, dtype=np.int64)
+        best_values = np.empty(0)
+        self.blocks_read = 0
+        for block in order:
+            full = len(best_rows) == k
+            if full:
+                kth = best_values[-1]
+                if (bound[block] < kth) if largest else (bound[block] > kth):
+                    break
+            rows, values = self._read(block, where, every, by)
+            self.blocks_read += 1
+            if full:  # only rows that can still make the cut get sorted
+                better = values >= kth if largest else values <= kth
+                rows, values = rows[better], values[better]
+            # Ranked by value, ties by row number, so results don't depend on block order
+            best_rows = np.concatenate([best_rows, rows])
+            best_values = np.concatenate([best_values, values])
+            ranking = np.lexsort((best_rows, -best_values if largest else best_values))[:k]
+            best_rows, best_values = best_rows[ranking], best_values[ranking]
+        return best_rows
+
+    # --- scenarios ---
+
+    def inputs(self, row):
+        """The `CostInputs` priced in `row`"""
+        row = int(row)
+        columns = self._grid.columns(row, row + 1, encoded=False)
+        fields = {field: np.asarray(columns[field]).reshape(-1)[0].item() for field in SCENARIO_FIELDS}
+        for field in SIZE_FIELDS:
+            code = np.asarray(columns[field]).reshape(-1)[0].item()
+            fields[field] = code if isinstance(code, str) else ("No Change" if code == NO_CHANGE else WAREHOUSE_SIZES[code])
+        return CostInputs(**fields)
+
+    def frame(self, rows):
+        """DataFrame of `rows`: each axis's label (when it has labels) and fields, then the stored results"""
+        import pandas as pd
+
+        rows = np.asarray(rows, dtype=np.int64)
+        frame = pd.DataFrame(index=pd.Index(rows, name="row"))
+        for (name, axis), position in zip(self.axes.items(), self._grid.positions(rows)):
+            if axis.labels is not None:
+                frame[name] = np.array(axis.labels)[position]
+            for field, values in axis.columns.items():
+                frame[field] = values[position]
+        for name, column in self.columns.items():
+            frame[name] = column[rows]
+        return frame
@@ -0,0 +1,82 @@
+"""
+Reference for the closed-form totals: the page's original month-by-month
+loops and a generator of random configurations across (and just beyond) the
+sidebar ranges. Used by tests/test_closed_form.py and
+benchmarks/closed_form_check.py.
+"""
+import numpy as np
+
+from cost_engine import (
+    DATA_TRANSFER_COST_PER_TB,
+    STORAGE_COST_PER_TB,
+    WAREHOUSE_SIZES,
+    CostInputs,
+    gen2_scaling_discount,
+    size_credit_mapping,
+)
+
+HORIZONS = [1, 2, 12, 36, 60, 120]
+
+
+def loop_totals(inputs, months):
+    """The page's original month-by-month loops, run for `months` months."""
+    compute_costs, storage_costs, transfer_costs = [], [], []
+    storage_current = inputs.storage_tb
+    transfer_current = inputs.data_transfer_tb
+    for month in range(months):
+        base_credits = inputs.num_vws * size_credit_mapping[inputs.vw_size] * inputs.hours_per_day * inputs.active_days_per_month
+        if inputs.use_gen2:
+            base_credits *= 0.70
+            base_credits *= gen2_scaling_discount(inputs.num_vws)
+        compute_costs.append(base_credits * inputs.credit_cost * (1 + (month * inputs.compute_growth / 100)))
+        storage_costs.append(storage_current * STORAGE_COST_PER_TB)
+        storage_current *= (1 + inputs.storage_growth / 100)
+        transfer_costs.append(transfer_current * DATA_TRANSFER_COST_PER_TB)
+        transfer_current *= (1 + inputs.transfer_growth / 100)
+
+    compute_costs = [c * (1 - inputs.discount_pct / 100) for c in compute_costs]
+    storage_costs = [s * (1 - inputs.discount_pct / 100) for s in storage_costs]
+    transfer_costs = [t * (1 - inputs.discount_pct / 100) for t in transfer_costs]
+    total_cost = (np.array(compute_costs) + np.array(storage_costs) + np.array(transfer_costs)).sum()
+
+    optimized_size = inputs.vw_size if inputs.reduce_vw_size == "No Change" else inputs.reduce_vw_size
+    optimized_compute_costs = []
+    for month in range(months):
+        effective_hours = max(inputs.hours_per_day - inputs.pause_hours_per_day, 0)
+        base_credits_opt = inputs.num_vws * size_credit_mapping[optimized_size] * effective_hours * inputs.active_days_per_month
+        if inputs.use_gen2:
+            base_credits_opt *= 0.70
+            base_credits_opt *= gen2_scaling_discount(inputs.num_vws)
+            if inputs.pause_hours_per_day > 0:
+                base_credits_opt *= 0.90
+        optimized_compute_costs.append(base_credits_opt * inputs.credit_cost * (1 + (month * inputs.compute_growth / 100)))
+
+    total_discount_opt = inputs.discount_pct + inputs.additional_discount
+    total_optimized_cost = (
+        np.array([c * (1 - total_discount_opt / 100) for c in optimized_compute_costs])
+        + np.array([s * (1 - total_discount_opt / 100) for s in storage_costs])
+        + np.array([t * (1 - total_discount_opt / 100) for t in transfer_costs])
+    ).sum()
+    avg_storage_tb = sum([inputs.storage_tb * ((1 + inputs.storage_growth / 100) ** month) for month in range(months)]) / months
+    return {"total_cost": total_cost, "total_optimized_cost": total_optimized_cost, "avg_storage_tb": avg_storage_tb}
+
+
+def random_inputs(rng):
+    sizes = WAREHOUSE_SIZES
+    return CostInputs(
+        num_vws=int(rng.integers(1, 21)),
+        vw_size=sizes[rng.integers(len(sizes))],
+        hours_per_day=int(rng.integers(0, 25)),
+        active_days_per_month=int(rng.integers(1, 32)),
+        credit_cost=float(rng.choice([rng.uniform(0.1, 20.0), 2.0, 3.5])),
+        use_gen2=bool(rng.integers(2)),
+        compute_growth=float(rng.choice([0, rng.integers(0, 51), rng.uniform(-5, 60)])),
+        storage_tb=float(rng.choice([0.0, rng.uniform(0, 1000)])),
+        storage_growth=float(rng.choice([0, 1e-9, rng.integers(0, 31), rng.uniform(-10, 40)])),
+        data_transfer_tb=float(rng.uniform(0, 100)),
+        transfer_growth=float(rng.choice([0, -1e-9, rng.integers(0, 26), rng.uniform(-10, 40)])),
+        discount_pct=int(rng.integers(0, 61)),
+        pause_hours_per_day=int(rng.integers(0, 25)),
+        reduce_vw_size=["No Change", *sizes[:-1]][rng.integers(len(sizes))],
+        additional_discount=int(rng.integers(0, 26)),
+    )
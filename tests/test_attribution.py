@@ -0,0 +1,45 @@
+"""
+Cost attribution on a hand-checked export: an hour's credits split by
+query-seconds, a query cut at the hour boundary, idle hours, and metering
+rows without a start time or warehouse dropped as the calibration drops them.
+"""
+import io
+
+import pytest
+
+from attribution import UNSET, attribute_costs, read_hourly_credits, read_query_usage
+
+QUERIES = """WAREHOUSE_NAME,START_TIME,END_TIME,USER_NAME,ROLE_NAME
+WH_A,2024-01-01 08:00:00.000 -0800,2024-01-01 08:30:00.000 -0800,ANA,ANALYST
+WH_A,2024-01-01 08:30:00.000 -0800,2024-01-01 08:40:00.000 -0800,BEN,
+WH_A,2024-01-01 09:50:00.000 -0800,2024-01-01 10:10:00.000 -0800,ANA,ANALYST
+"""
+METERING = """START_TIME,WAREHOUSE_NAME,CREDITS_USED
+2024-01-01 08:00:00.000 -0800,WH_A,4
+2024-01-01 09:00:00.000 -0800,WH_A,1
+2024-01-01 10:00:00.000 -0800,WH_A,2
+2024-01-01 11:00:00.000 -0800,WH_A,0.5
+,WH_A,100
+2024-01-01 11:00:00.000 -0800,,100
+"""
+
+
+def attribution():
+    queries = io.BytesIO(QUERIES.encode())
+    usage = read_query_usage(queries, "queries.csv", chunk_rows=2)
+    credits = read_hourly_credits(io.BytesIO(METERING.encode()), "metering.csv", chunk_rows=2)
+    return usage, attribute_costs(usage, credits, queries, "queries.csv", chunk_rows=2)
+
+
+def test_credits_follow_query_seconds_per_hour():
+    usage, result = attribution()
+    assert usage.queries == 3
+    assert usage.slot_seconds.tolist() == [2400, 600, 600]
+    credits = {dimension: dict(zip(result.names[dimension], result.credits[dimension])) for dimension in result.names}
+    # 08:00 splits 4 credits 30:10, 09:00 and 10:00 are all ANA's; 11:00 is idle
+    assert credits["user"] == pytest.approx({"ANA": 3 + 1 + 2, "BEN": 1})
+    assert credits["role"] == pytest.approx({"ANALYST": 6, UNSET: 1})
+    assert credits["query_tag"] == pytest.approx({UNSET: 7})
+    assert result.metered_credits == pytest.approx(7.5)
+    assert result.idle_credits == pytest.approx(0.5)
+    assert result.top("user", 1)["Credits"].tolist() == pytest.approx([6, 1, 0.5])
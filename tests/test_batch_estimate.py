@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from batch_estimate import run_batch
+
+pytest.importorskip("pyarrow")
+
+
+def sparse_configs(path):
+    """20 configurations whose pass-through columns change type between the two 10-row chunks"""
+    pd.DataFrame({
+        "vws": np.arange(1, 21),
+        "size": "Small",
+        "business_unit": [None] * 10 + [f"bu{i}" for i in range(10)],  # all empty in chunk 1
+        "cost_center": list(range(10)) + [None] * 10,                  # int in chunk 1, NaN in chunk 2
+        "project": list(range(10)) + [f"p{i}" for i in range(10)],     # numbers, then text
+    }).to_csv(path, index=False)
+
+
+def test_parquet_output_widens_schema_across_chunks(tmp_path):
+    sparse_configs(tmp_path / "configs.csv")
+
+    rows = run_batch(tmp_path / "configs.csv", tmp_path / "results.parquet", chunk_size=10, workers=1)
+    run_batch(tmp_path / "configs.csv", tmp_path / "results.csv", chunk_size=10, workers=1)
+
+    assert rows == 20
+    parquet = pd.read_parquet(tmp_path / "results.parquet")
+    csv = pd.read_csv(tmp_path / "results.csv")
+    assert parquet["business_unit"].isna().sum() == 10
+    assert parquet["business_unit"].iloc[10:].tolist() == [f"bu{i}" for i in range(10)]
+    assert parquet["cost_center"].iloc[:10].tolist() == list(range(10))
+    assert parquet["project"].tolist() == [str(i) for i in range(10)] + [f"p{i}" for i in range(10)]
+    np.testing.assert_allclose(parquet["annual_cost"], csv["annual_cost"])
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["configs.csv", "results.csv", "results.parquet"]
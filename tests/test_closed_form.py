@@ -0,0 +1,75 @@
+"""
+Closed-form horizon totals against the page's original month-by-month loops
+(`closed_form_reference.py`), on randomized configurations across and
+just beyond the sidebar ranges. The 12-month paths must match the loops bit
+for bit; the O(1) totals reorder the sums, so they must match to 1e-12.
+"""
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from cost_engine import CostInputs, estimate, horizon_totals
+from scenario_sweep import SCENARIO_FIELDS, evaluate_scenarios, evaluate_totals
+from tests.closed_form_reference import HORIZONS, loop_totals, random_inputs
+
+SEEDS = range(5)
+CASES = 200
+RTOL = 1e-12
+
+
+def cases(seed):
+    rng = np.random.default_rng(seed)
+    return [random_inputs(rng) for _ in range(CASES)]
+
+
+def columns(inputs_list):
+    return {field: [getattr(inputs, field) for inputs in inputs_list] for field in SCENARIO_FIELDS}
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_estimate_is_the_12_month_loop_bit_for_bit(seed):
+    for inputs in cases(seed):
+        expected = loop_totals(inputs, 12)
+        result = estimate(inputs)
+        assert result.total_annual_cost == expected["total_cost"]
+        assert result.total_optimized_annual == expected["total_optimized_cost"]
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_evaluate_scenarios_is_estimate_bit_for_bit(seed):
+    inputs_list = cases(seed)
+    results = evaluate_scenarios(**columns(inputs_list))
+    assert results.annual_cost.tolist() == [estimate(inputs).total_annual_cost for inputs in inputs_list]
+    assert results.optimized_annual_cost.tolist() == [estimate(inputs).total_optimized_annual for inputs in inputs_list]
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("months", HORIZONS)
+def test_horizon_totals_match_the_loop(seed, months):
+    for inputs in cases(seed):
+        expected = loop_totals(inputs, months)
+        totals = horizon_totals(inputs, months)
+        assert totals.total_cost == pytest.approx(expected["total_cost"], rel=RTOL, abs=1e-9)
+        assert totals.total_optimized_cost == pytest.approx(expected["total_optimized_cost"], rel=RTOL, abs=1e-9)
+        assert totals.avg_storage_tb == pytest.approx(expected["avg_storage_tb"], rel=RTOL, abs=1e-9)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+@pytest.mark.parametrize("months", HORIZONS)
+def test_evaluate_totals_match_the_loop(seed, months):
+    inputs_list = cases(seed)
+    results = evaluate_totals(months=months, **columns(inputs_list))
+    expected = [loop_totals(inputs, months) for inputs in inputs_list]
+    np.testing.assert_allclose(results.annual_cost, [e["total_cost"] for e in expected], rtol=RTOL, atol=1e-9)
+    np.testing.assert_allclose(results.optimized_annual_cost, [e["total_optimized_cost"] for e in expected], rtol=RTOL, atol=1e-9)
+
+
+@pytest.mark.parametrize("growth", [0.0, 1e-9, -1e-9, 1e-6, 50.0])
+@pytest.mark.parametrize("months", [1, 2, 12, 600])
+def test_growth_edge_cases(growth, months):
+    inputs = replace(CostInputs.from_template("Large Enterprise"), compute_growth=growth, storage_growth=growth, transfer_growth=growth)
+    expected = loop_totals(inputs, months)
+    totals = horizon_totals(inputs, months)
+    assert totals.total_cost == pytest.approx(expected["total_cost"], rel=RTOL)
+    assert totals.total_optimized_cost == pytest.approx(expected["total_optimized_cost"], rel=RTOL)
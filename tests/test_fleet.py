@@ -0,0 +1,49 @@
+"""
+Fleet files with blank cells: a missing size, hours or active days raises
+instead of being priced as another size or as 0 hours.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from cost_engine import CostInputs
+from fleet import Fleet
+
+ROWS = {
+    "vw_size": ["Small", "Medium", "Large"],
+    "hours_per_day": [8, 12, 24],
+    "active_days_per_month": [22, 30, 31],
+}
+
+
+def test_complete_frame_loads():
+    fleet = Fleet.from_frame(pd.DataFrame(ROWS), CostInputs())
+    np.testing.assert_array_equal(fleet.size_code, [1, 2, 3])
+    np.testing.assert_array_equal(fleet.hours_per_day, [8, 12, 24])
+    np.testing.assert_array_equal(fleet.active_days, [22, 30, 31])
+
+
+@pytest.mark.parametrize("column", list(ROWS))
+def test_blank_cell_in_a_required_column_raises(column):
+    frame = pd.DataFrame(ROWS)
+    frame[column] = frame[column].astype(object)
+    frame.loc[1, column] = None
+    with pytest.raises(ValueError, match="Missing"):
+        Fleet.from_frame(frame, CostInputs())
+
+
+@pytest.mark.parametrize("column", list(ROWS))
+def test_blank_cell_read_from_csv_raises(column, tmp_path):
+    frame = pd.DataFrame(ROWS).astype(object)
+    frame.loc[1, column] = ""
+    path = tmp_path / "fleet.csv"
+    frame.to_csv(path, index=False)
+    with pytest.raises(ValueError, match="Missing"):
+        Fleet.from_frame(pd.read_csv(path), CostInputs())
+
+
+def test_build_rejects_missing_values():
+    with pytest.raises(ValueError, match="warehouse size"):
+        Fleet.build(["Small", None, "Large"], 8, 22)
+    with pytest.raises(ValueError, match="hours per day"):
+        Fleet.build(["Small", "Large"], [8, np.nan], 22)
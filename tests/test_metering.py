@@ -0,0 +1,28 @@
+"""
+Blank cells in a metering export: rows without a start time or warehouse are
+dropped and counted instead of being booked to another hour or to a "nan"
+warehouse; a blank credit count reads as 0.
+"""
+import io
+
+import numpy as np
+
+from metering import read_metering_history
+
+EXPORT = """START_TIME,WAREHOUSE_NAME,CREDITS_USED
+2024-01-01 08:00:00.000 -0800,WH_A,2
+2024-01-01 09:00:00.000 -0800,WH_A,2
+,WH_A,5
+2024-01-02 10:00:00.000 -0800,,7
+2024-01-02 10:00:00.000 -0800,WH_B,
+2024-01-02 11:00:00.000 -0800,WH_B,1
+"""
+
+
+def test_rows_without_start_time_or_warehouse_are_dropped_and_counted():
+    profile = read_metering_history(io.BytesIO(EXPORT.encode()), name="metering.csv", chunk_rows=4)
+    assert profile.warehouses == ("WH_A", "WH_B")
+    assert (profile.rows, profile.dropped_rows) == (4, 2)
+    assert profile.total_credits == 5
+    np.testing.assert_array_equal(profile.daily_credits, [[4, 0], [0, 1]])
+    np.testing.assert_array_equal(profile.daily_active_hours, [[2, 0], [0, 1]])
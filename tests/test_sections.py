@@ -0,0 +1,34 @@
+"""
+SectionRunner rebuilds a section only when a dependency's fingerprint
+changes; values with a stand-in key are compared by the key, never pickled.
+"""
+from sections import Section, SectionRunner
+
+
+class Unpicklable:
+    def __reduce__(self):
+        raise AssertionError("large values are fingerprinted through their key")
+
+
+def runner_and_section():
+    built = []
+    section = Section("s", ("total", "fleet"), lambda v: built.append(v.total) or v.total, lambda content: None)
+    return SectionRunner({}), section, built
+
+
+def test_unchanged_dependencies_replay_the_stored_content():
+    runner, section, built = runner_and_section()
+    for _ in range(3):
+        runner.run(section, {"total": 1.0, "fleet": None})
+    assert built == [1.0]
+    assert runner.build_counts == {"s": 1}
+    assert runner.reused == ["s", "s"]
+
+
+def test_keyed_values_are_compared_by_their_key():
+    runner, section, built = runner_and_section()
+    runner.run(section, {"total": 1.0, "fleet": Unpicklable()}, {"fleet": ("digest", 1)})
+    runner.run(section, {"total": 1.0, "fleet": Unpicklable()}, {"fleet": ("digest", 1)})
+    runner.run(section, {"total": 1.0, "fleet": Unpicklable()}, {"fleet": ("digest", 2)})
+    runner.run(section, {"total": 2.0, "fleet": Unpicklable()}, {"fleet": ("digest", 2)})
+    assert built == [1.0, 1.0, 2.0]
@@ -0,0 +1,21 @@
+"""
+Tornado swings stay inside the sidebar ranges, and the warehouse count moves
+by whole warehouses so the Gen 2 bar measures sensitivity, not a band edge.
+"""
+import pytest
+
+from cost_engine import CostInputs
+from sensitivity import sensitivity
+
+
+@pytest.mark.parametrize("num_vws, low, high", [(1, 1, 2), (3, 2, 4), (4, 3, 5), (15, 13, 17), (20, 18, 20)])
+def test_warehouse_count_swings_by_whole_warehouses(num_vws, low, high):
+    result = sensitivity(CostInputs(num_vws=num_vws, use_gen2=True), 10)
+    row = result.inputs.index("num_vws")
+    assert (result.low_values[row], result.high_values[row]) == (low, high)
+
+
+def test_auto_pause_swing_stops_at_sidebar_cap():
+    result = sensitivity(CostInputs(pause_hours_per_day=12), 25)
+    row = result.inputs.index("pause_hours_per_day")
+    assert (result.low_values[row], result.high_values[row]) == (9, 12)
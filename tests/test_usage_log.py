@@ -0,0 +1,107 @@
+"""
+UsageLogWriter against a SQLite file: batches go out at `batch_size` and on
+`flush_interval`, a full queue drops and counts, backend errors are counted
+as failed, and `close` drains what is still queued.
+"""
+import threading
+import time
+
+import pytest
+
+from usage_log import SQLiteBackend, UsageLogWriter
+
+TIMEOUT = 5.0
+
+
+class GatedBackend(SQLiteBackend):
+    """SQLiteBackend whose writes wait until `gate` is set, like a slow warehouse"""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.entered = threading.Event()
+        self.gate = threading.Event()
+
+    def write(self, records):
+        self.entered.set()
+        self.gate.wait(TIMEOUT)
+        super().write(records)
+
+
+def wait_for(condition):
+    deadline = time.monotonic() + TIMEOUT
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "usage.db")
+
+
+def test_batch_is_written_when_batch_size_is_reached(path):
+    backend = SQLiteBackend(path)
+    writer = UsageLogWriter(backend, batch_size=5, flush_interval=60)
+    for i in range(4):
+        writer.log("estimate_viewed", str(i), user_name="ANALYST")
+    time.sleep(0.1)
+    assert backend.rows() == []  # four pending; the interval is a minute away
+    writer.log("estimate_viewed", "4", user_name="ANALYST")
+    wait_for(lambda: len(backend.rows()) == 5)
+    for i in range(5, 7):
+        writer.log("estimate_viewed", str(i), user_name="ANALYST")
+    time.sleep(0.1)
+    assert len(backend.rows()) == 5
+    assert writer.stats()["batches"] == 1
+    writer.close()
+    assert [row[1:] for row in backend.rows()] == [("ANALYST", "estimate_viewed", str(i)) for i in range(7)]
+
+
+def test_batch_is_written_after_flush_interval(path):
+    backend = SQLiteBackend(path)
+    writer = UsageLogWriter(backend, batch_size=100, flush_interval=0.2)
+    for _ in range(3):
+        writer.log("template_chosen", "Large Enterprise")
+    wait_for(lambda: len(backend.rows()) == 3)
+    assert writer.stats() == {"queued": 3, "flushed": 3, "dropped": 0, "failed": 0, "batches": 1, "pending": 0}
+    writer.close()
+
+
+def test_full_queue_drops_and_counts(path):
+    backend = GatedBackend(path)
+    writer = UsageLogWriter(backend, batch_size=1, flush_interval=60, max_pending=3)
+    assert writer.log("first")
+    assert backend.entered.wait(TIMEOUT)  # the writer thread is now stuck in write
+    assert all(writer.log("queued") for _ in range(3))
+    assert not writer.log("dropped")
+    assert not writer.log("dropped")
+    assert writer.stats()["dropped"] == 2
+    backend.gate.set()
+    writer.close()
+    assert [row[2] for row in backend.rows()] == ["first", "queued", "queued", "queued"]
+    assert writer.stats()["pending"] == 0
+
+
+def test_backend_errors_count_as_failed(path):
+    backend = SQLiteBackend(path)
+    with backend._connection:
+        backend._connection.execute(f"DROP TABLE {backend.table}")
+    writer = UsageLogWriter(backend, batch_size=100, flush_interval=60)
+    for _ in range(4):
+        writer.log("estimate_viewed")
+    assert writer.flush(TIMEOUT)
+    stats = writer.stats()
+    assert (stats["failed"], stats["flushed"], stats["pending"]) == (4, 0, 0)
+    assert "no such table" in str(writer.last_error)
+    writer.close()
+
+
+def test_close_drains_the_queue(path):
+    backend = SQLiteBackend(path)
+    writer = UsageLogWriter(backend, batch_size=1000, flush_interval=60)
+    for i in range(50):
+        writer.log("export_run", str(i))
+    writer.close()
+    assert len(backend.rows()) == 50
+    assert writer.stats()["pending"] == 0
+    assert not writer.log("after_close")
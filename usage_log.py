@@ -0,0 +1,226 @@
+"""
+Buffered usage logging into APP_COST_ESTIMATORS.USAGE_LOG.
+
+`UsageLogWriter.log` only appends a record to a bounded in-memory queue, so
+the Streamlit script thread never waits on the database. A daemon thread
+drains the queue and writes batches with one bulk insert when `batch_size`
+records are pending or the oldest pending record is `flush_interval`
+seconds old; a backlog that built up during a slow write goes out in
+batches of up to MAX_BATCH_ROWS. When the queue is full (a burst larger than `max_pending`
+while a write is slow), new records are dropped and counted rather than
+blocking the page.
+
+Backends take a list of `UsageRecord`s and write them in one statement:
+`SnowparkBackend` for the app's table inside Snowflake, `SQLiteBackend` as a
+local stand-in with the same columns.
+
+    writer = UsageLogWriter(SQLiteBackend("usage.db"))
+    writer.log("template_chosen", "Large Enterprise", user_name="ANALYST")
+    writer.flush()
+    writer.stats()   # {"queued": 1, "flushed": 1, "dropped": 0, "failed": 0, "batches": 1, "pending": 0}
+"""
+import atexit
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import NamedTuple, Optional
+
+USAGE_LOG_TABLE = "APP_COST_ESTIMATORS.USAGE_LOG"
+SQLITE_PATH_ENV = "USAGE_LOG_SQLITE"  # log locally instead of to Snowflake
+
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_FLUSH_INTERVAL = 5.0  # seconds a record may wait before its batch is written
+DEFAULT_MAX_PENDING = 10_000
+MAX_BATCH_ROWS = 4000  # per INSERT; a backlog behind a slow write goes out in fewer, larger batches
+
+
+class UsageRecord(NamedTuple):
+    """One USAGE_LOG row."""
+    created_at: datetime
+    user_name: Optional[str]
+    action: str
+    remarks: Optional[str]
+
+
+class SQLiteBackend:
+    """USAGE_LOG in a local SQLite file (or ":memory:")."""
+
+    def __init__(self, path, table="USAGE_LOG"):
+        import sqlite3
+
+        # Written from the writer thread, read from wherever; the lock serializes both
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self.table = table
+        with self._lock, self._connection:
+            self._connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} (CREATED_AT TEXT, USER_NAME TEXT, ACTION TEXT, REMARKS TEXT)"
+            )
+
+    def write(self, records):
+        rows = [(record.created_at.isoformat(), record.user_name, record.action, record.remarks) for record in records]
+        with self._lock, self._connection:
+            self._connection.executemany(f"INSERT INTO {self.table} VALUES (?, ?, ?, ?)", rows)
+
+    def rows(self):
+        with self._lock:
+            return self._connection.execute(f"SELECT * FROM {self.table} ORDER BY rowid").fetchall()
+
+
+class SnowparkBackend:
+    """USAGE_LOG in Snowflake through a Snowpark session; one multi-row INSERT per batch."""
+
+    def __init__(self, session, table=USAGE_LOG_TABLE):
+        self.session = session
+        self.table = table
+
+    def write(self, records):
+        placeholders = ", ".join(["(?, ?, ?, ?)"] * len(records))
+        params = [value for record in records for value in (record.created_at, record.user_name, record.action, record.remarks)]
+        self.session.sql(
+            f"INSERT INTO {self.table} (CREATED_AT, USER_NAME, ACTION, REMARKS) VALUES {placeholders}",
+            params=params,
+        ).collect()
+
+
+def default_backend():
+    """SQLite when USAGE_LOG_SQLITE is set, else the active Snowpark session; None outside Snowflake"""
+    path = os.environ.get(SQLITE_PATH_ENV)
+    if path:
+        return SQLiteBackend(path)
+    try:
+        from snowflake.snowpark.context import get_active_session
+
+        return SnowparkBackend(get_active_session())
+    except Exception:  # no Snowpark, or no active session (running locally)
+        return None
+
+
+class _Flush:
+    """Queue marker: write whatever is pending, then set `done`."""
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+_STOP = object()
+
+
+class UsageLogWriter:
+    """Background, batching USAGE_LOG writer."""
+
+    def __init__(self, backend, batch_size=DEFAULT_BATCH_SIZE, flush_interval=DEFAULT_FLUSH_INTERVAL,
+                 max_pending=DEFAULT_MAX_PENDING):
+        self.backend = backend
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.last_error = None
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._counts_lock = threading.Lock()
+        self._counts = {"queued": 0, "flushed": 0, "dropped": 0, "failed": 0, "batches": 0}
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="usage-log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def log(self, action, remarks=None, user_name=None):
+        """Queue one record; never blocks. Returns False if it was dropped."""
+        record = UsageRecord(datetime.now(timezone.utc), user_name, action, remarks)
+        try:
+            if self._closed:
+                raise queue.Full
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self._count("dropped")
+            return False
+        self._count("queued")
+        return True
+
+    def flush(self, timeout=None):
+        """Write everything queued so far; True once it has been handed to the backend"""
+        marker = _Flush()
+        try:
+            self._queue.put(marker, timeout=timeout)
+        except queue.Full:
+            return False
+        return marker.done.wait(timeout)
+
+    def close(self, timeout=10.0):
+        """Write what is pending and stop the writer thread"""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+
+    def stats(self):
+        """
+        Counters since start: queued, flushed (written), dropped (queue full),
+        failed (lost to backend errors), batches; plus records pending now.
+        """
+        with self._counts_lock:
+            counts = dict(self._counts)
+        counts["pending"] = counts["queued"] - counts["flushed"] - counts["failed"]
+        return counts
+
+    # --- writer thread ---
+
+    def _count(self, name, amount=1):
+        with self._counts_lock:
+            self._counts[name] += amount
+
+    def _write(self, batch):
+        if not batch:
+            return
+        try:
+            self.backend.write(batch)
+        except Exception as error:  # a logging outage must not take the page down
+            self.last_error = error
+            self._count("failed", len(batch))
+        else:
+            with self._counts_lock:
+                self._counts["flushed"] += len(batch)
+                self._counts["batches"] += 1
+        batch.clear()
+
+    def _run(self):
+        batch = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0.0)
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            # Drain a burst in one go instead of waking per record
+            items = [] if item is None else [item]
+            while item is not None and len(batch) + len(items) < MAX_BATCH_ROWS:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                items.append(item)
+
+            for item in items:
+                if item is _STOP:
+                    self._write(batch)
+                    return
+                if isinstance(item, _Flush):
+                    self._write(batch)
+                    item.done.set()
+                    continue
+                batch.append(item)
+
+            if not batch:
+                deadline = None
+            elif deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+            if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._write(batch)
+                deadline = None